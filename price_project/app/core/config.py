@@ -11,20 +11,101 @@ PROJECT_ROOT = BASE_DIR.parent
 # Директории для файлов
 UPLOAD_DIR = BASE_DIR / "uploads"
 OUTPUT_DIR = BASE_DIR / "output"
+JOBS_DIR = BASE_DIR / "jobs"  # Состояние фоновых задач (по файлу на задачу)
+CACHE_DIR = BASE_DIR / "cache"  # Индекс кэша результатов
+LAYOUTS_DIR = BASE_DIR / "layouts"  # Сопоставления колонок по раскладкам поставщиков
 
 # Создаем директории если не существуют
 UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
+JOBS_DIR.mkdir(exist_ok=True)
+CACHE_DIR.mkdir(exist_ok=True)
+LAYOUTS_DIR.mkdir(exist_ok=True)
 
 # Директория с шаблонами Excel
 TEMPLATES_EXCEL_DIR = PROJECT_ROOT / "templates_excel"
 DEFAULT_TEMPLATE = TEMPLATES_EXCEL_DIR / "Temlate2-color.xlsx"
 
+# Шаблон оформления Excel по умолчанию: имя файла в TEMPLATES_EXCEL_DIR без .xlsx
+# ("default" - DEFAULT_TEMPLATE). Пусто - встроенное оформление ExcelExporter
+# (и запись книги движком EXPORTER_BACKEND)
+EXCEL_TEMPLATE = os.getenv("EXCEL_TEMPLATE", "default")
+
+# Как часто проверяется, не изменился ли файл загруженного шаблона, секунд
+TEMPLATE_CHECK_SECONDS = float(os.getenv("TEMPLATE_CHECK_SECONDS", "10"))
+
 # Максимальный размер файла (10MB)
-MAX_FILE_SIZE = 10 * 1024 * 1024
+MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", str(10 * 1024 * 1024)))
+
+# Размер части при приёме загружаемого файла (1MB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Загрузки до этого размера обрабатываются в памяти (8MB),
+# больше - буферизуются во временном файле в UPLOAD_DIR
+SPOOL_MAX_SIZE = int(os.getenv("SPOOL_MAX_SIZE", str(8 * 1024 * 1024)))
+
+# Запас на заголовки multipart-формы сверх MAX_FILE_SIZE: тело запроса больше
+# отклоняется по Content-Length до чтения, без него - по прочитанным байтам
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+# Принимаемые файлы: Excel и текстовые выгрузки (CSV/TSV)
+INPUT_SUFFIXES = ('.xlsx', '.xls', '.ods', '.csv', '.tsv')
+
+# Чтение Excel: "auto", "openpyxl" или "calamine" (python-calamine: быстрее, читает .xls и .ods)
+READER_ENGINE = os.getenv("READER_ENGINE", "auto")
+
+# В режиме auto .xlsx больше этого размера и все .xlsx в потоковом режиме читаются
+# openpyxl: calamine держит в памяти весь лист, openpyxl read-only - только текущую часть (100MB)
+CALAMINE_MAX_FILE_SIZE = int(os.getenv("CALAMINE_MAX_FILE_SIZE", str(100 * 1024 * 1024)))
+
+# Файлы больше этого размера обрабатываются в потоковом режиме (5MB)
+STREAMING_FILE_SIZE = 5 * 1024 * 1024
+
+# Размер части (строк) при потоковой обработке
+STREAM_CHUNK_ROWS = 10000
+
+# Компактные типы колонок в памяти: статусы и повторяющиеся наименования - категории,
+# цены - float32 без потерь, коды - интернированные строки. 0 - как прочитано (object)
+COMPACT_FRAMES = os.getenv("COMPACT_FRAMES", "1") != "0"
+
+# Запись Excel: "openpyxl" или "xlsxwriter" (быстрее, постоянная память)
+EXPORTER_BACKEND = os.getenv("EXPORTER_BACKEND", "openpyxl")
 
-# Время хранения файлов (часов)
-FILE_RETENTION_HOURS = 24
+# Листы книги: "active" - только активный лист, "merge" - все листы с прайсом
+# в один лист результата, "split" - лист результата на каждый лист с прайсом
+SHEET_MODE = os.getenv("SHEET_MODE", "merge")
+
+# Параллельная обработка листов книги: пул "thread" или "process" и число обработчиков
+SHEET_EXECUTOR_KIND = os.getenv("SHEET_EXECUTOR_KIND", "thread")
+SHEET_WORKERS = int(os.getenv("SHEET_WORKERS", "4"))
+
+# Пул обработки файлов: "thread" или "process"
+EXECUTOR_KIND = os.getenv("EXECUTOR_KIND", "thread")
+
+# Максимум одновременно обрабатываемых файлов
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
+
+# Сколько запросов может ждать свободного обработчика
+MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", "4"))
+
+# Через сколько секунд повторить запрос, если очередь заполнена (Retry-After)
+RETRY_AFTER_SECONDS = 10
+
+# Максимальный суммарный размер закэшированных результатов (500MB)
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+
+# Версия логики обработки (входит в ключ кэша результатов).
+# Увеличивать при любом изменении результата обработки.
+PIPELINE_VERSION = "4"
+
+# Время хранения файлов после последнего использования (часов)
+FILE_RETENTION_HOURS = int(os.getenv("FILE_RETENTION_HOURS", "24"))
+
+# Квота на каталог результатов (2GB): сверх неё удаляются давно не использованные файлы
+OUTPUT_MAX_BYTES = int(os.getenv("OUTPUT_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# Период очистки каталога результатов (секунд)
+JANITOR_INTERVAL_SECONDS = int(os.getenv("JANITOR_INTERVAL_SECONDS", "600"))
 
 # Настройки маркеров по умолчанию
 DEFAULT_MARKERS = {
@@ -51,3 +132,7 @@ STATUS_MAPPING = {
     "sale": "РАСПРОДАЖА",
     "акция": "РАСПРОДАЖА",
 }
+
+# Файл маппинга статусов (JSON-объект {"подстрока статуса": "результат"}, порядок - приоритет).
+# Перечитывается при изменении без перезапуска; пусто - используется STATUS_MAPPING
+STATUS_MAPPING_FILE = os.getenv("STATUS_MAPPING_FILE") or None
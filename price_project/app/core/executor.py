@@ -0,0 +1,108 @@
+"""
+Пул обработки файлов с ограничением числа одновременных задач
+"""
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from app.core.config import EXECUTOR_KIND, MAX_CONCURRENT_JOBS, MAX_QUEUED_JOBS
+
+
+class ExecutorBusyError(Exception):
+    """Все обработчики заняты и очередь заполнена"""
+
+
+class ProcessingExecutor:
+    """
+    Пул потоков или процессов для тяжёлой обработки вне event loop.
+    Одновременно принимается не больше max_workers + max_queued задач,
+    остальные сразу отклоняются с ExecutorBusyError.
+    """
+
+    def __init__(self,
+                 kind: str = EXECUTOR_KIND,
+                 max_workers: int = MAX_CONCURRENT_JOBS,
+                 max_queued: int = MAX_QUEUED_JOBS,
+                 initializer: Optional[Callable] = None):
+        """
+        Args:
+            kind: Пул потоков ("thread") или процессов ("process")
+            max_workers: Число обработчиков
+            max_queued: Сколько задач может ждать свободного обработчика
+            initializer: Вызывается при запуске каждого обработчика
+                (подготовка процесса пула: чтение шаблонов и т.п.)
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Неизвестный тип пула: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.initializer = initializer
+        self._pool: Optional[Executor] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        """Максимум принятых задач (выполняются + ждут)"""
+        return self.max_workers + self.max_queued
+
+    @property
+    def is_full(self) -> bool:
+        """Новую задачу сейчас принять нельзя"""
+        return self._in_flight >= self.capacity
+
+    @property
+    def in_flight(self) -> int:
+        """Число принятых и ещё не завершённых задач"""
+        return self._in_flight
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=self.initializer
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="price-worker",
+                    initializer=self.initializer
+                )
+        return self._pool
+
+    def _release(self, _future: Future = None):
+        with self._lock:
+            self._in_flight -= 1
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Поставить задачу в пул.
+        Слот освобождается, когда задача завершится (даже если результат
+        уже никто не ждёт).
+
+        Raises:
+            ExecutorBusyError: очередь заполнена
+        """
+        with self._lock:
+            if self.is_full:
+                raise ExecutorBusyError("Очередь обработки заполнена")
+            self._in_flight += 1
+
+        try:
+            future = self._get_pool().submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Выполнить задачу в пуле и дождаться результата, не блокируя event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        """Остановка пула"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,80 @@
+"""
+Метрики в текстовом формате Prometheus (prometheus_client)
+Счётчики, гистограммы и показатели хранятся в памяти процесса приложения,
+в собственном реестре (без метрик процесса и платформы по умолчанию).
+"""
+from typing import Dict, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+    disable_created_metrics, generate_latest
+)
+
+
+# Без рядов *_created: время создания счётчиков дашбордам не нужно
+disable_created_metrics()
+
+# Границы гистограмм времени (секунды)
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Реестр метрик приложения
+REGISTRY = CollectorRegistry()
+
+# Тип содержимого ответа /metrics
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+FILES_PROCESSED = Counter(
+    "price_files_processed", "Обработанные файлы по результату", ["result"], registry=REGISTRY
+)
+PROCESSING_SECONDS = Histogram(
+    "price_processing_duration_seconds", "Полное время обработки файла",
+    buckets=DURATION_BUCKETS, registry=REGISTRY
+)
+STAGE_SECONDS = Histogram(
+    "price_stage_duration_seconds", "Время этапа обработки", ["stage"],
+    buckets=DURATION_BUCKETS, registry=REGISTRY
+)
+STAGE_ROWS = Counter(
+    "price_stage_rows", "Строк на выходе этапа", ["stage"], registry=REGISTRY
+)
+STAGE_BYTES = Counter(
+    "price_stage_bytes", "Байт прочитано (parse) или записано (save)", ["stage"], registry=REGISTRY
+)
+JOBS_IN_FLIGHT = Gauge(
+    "price_jobs_in_flight", "Принятые и ещё не завершённые задачи", registry=REGISTRY
+)
+JOBS_CAPACITY = Gauge(
+    "price_jobs_capacity", "Максимум принятых задач (выполняются + ждут)", registry=REGISTRY
+)
+OUTPUT_BYTES_RECLAIMED = Counter(
+    "price_output_bytes_reclaimed", "Байт освобождено очисткой каталога результатов", registry=REGISTRY
+)
+
+
+def render_metrics() -> bytes:
+    """Все метрики в текстовом формате Prometheus"""
+    return generate_latest(REGISTRY)
+
+
+def record_processing(success: bool, timings: Optional[Dict[str, Dict]], cached: bool = False):
+    """
+    Учёт результата обработки файла и времени его этапов.
+    Полное время - timings['total'] (по часам), без него - сумма этапов.
+    """
+    if cached:
+        FILES_PROCESSED.labels(result="cached").inc()
+        return
+    FILES_PROCESSED.labels(result="success" if success else "error").inc()
+    if not timings:
+        return
+    stages = {stage: stats for stage, stats in timings.items() if stage != 'total'}
+    for stage, stats in stages.items():
+        STAGE_SECONDS.labels(stage=stage).observe(stats["seconds"])
+        if stats.get("rows") is not None:
+            STAGE_ROWS.labels(stage=stage).inc(stats["rows"])
+        if stats.get("bytes") is not None:
+            STAGE_BYTES.labels(stage=stage).inc(stats["bytes"])
+    total = timings.get('total')
+    PROCESSING_SECONDS.observe(
+        total["seconds"] if total is not None else sum(stats["seconds"] for stats in stages.values())
+    )
@@ -2,6 +2,11 @@
 Утилиты
 """
 from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
 
 
 def round_half_up(value: float) -> int:
@@ -15,6 +20,19 @@ def round_half_up(value: float) -> int:
     return int(d.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
 
 
+def round_half_up_array(values: np.ndarray) -> np.ndarray:
+    """
+    Векторное округление half-up для массива float (как round_half_up).
+    Половины представимы в float точно, поэтому сравнение дробной части
+    с 0.5 даёт тот же результат, что и Decimal(str(value)).
+    """
+    values = np.asarray(values, dtype=float)
+    magnitude = np.abs(values)
+    whole = np.floor(magnitude)
+    rounded = whole + (magnitude - whole >= 0.5)
+    return np.copysign(rounded, values).astype(np.int64)
+
+
 def clean_text(text) -> str:
     """
     Очистка текста: удаление лишних пробелов, приведение к строке.
@@ -28,8 +46,16 @@ def parse_price(value) -> float:
     """
     Парсинг цены из различных форматов.
     """
+    price = parse_price_or_none(value)
+    return 0.0 if price is None else price
+
+
+def parse_price_or_none(value) -> Optional[float]:
+    """
+    Цена как в parse_price, но None для пустых и нечисловых значений.
+    """
     if value is None:
-        return 0.0
+        return None
     if isinstance(value, (int, float)):
         return float(value)
     try:
@@ -37,4 +63,21 @@ def parse_price(value) -> float:
         cleaned = str(value).replace(' ', '').replace('₽', '').replace('руб', '').replace(',', '.')
         return float(cleaned)
     except (ValueError, TypeError):
-        return 0.0
+        return None
+
+
+def parse_price_series(values: pd.Series) -> np.ndarray:
+    """
+    Парсинг колонки цен в массив float.
+    Числовые колонки берутся как есть, для остальных parse_price
+    вызывается один раз на каждое уникальное значение.
+    Пустые значения дают 0.0.
+    """
+    if is_numeric_dtype(values) and not is_bool_dtype(values):
+        prices = values.to_numpy(dtype=float)
+    else:
+        codes, uniques = pd.factorize(values.to_numpy())
+        # Последний элемент - для пустых значений (код -1)
+        parsed = np.array([parse_price(value) for value in uniques] + [0.0], dtype=float)
+        prices = parsed[codes]
+    return np.where(np.isnan(prices), 0.0, prices)
@@ -2,21 +2,68 @@
 FastAPI приложение для обработки прайс-листов
 """
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
-import shutil
+import asyncio
+import re
 import os
+import time
+import aiofiles
+
+from app.core.config import (
+    OUTPUT_DIR, DEFAULT_MARKERS, RETRY_AFTER_SECONDS, MAX_FILE_SIZE, UPLOAD_FORM_OVERHEAD,
+    INPUT_SUFFIXES, SHEET_MODE, EXCEL_TEMPLATE
+)
+from app.core.executor import ProcessingExecutor, ExecutorBusyError
+from app.core.metrics import (
+    METRICS_CONTENT_TYPE, JOBS_IN_FLIGHT, JOBS_CAPACITY, record_processing, render_metrics
+)
+from app.services.processor import check_sheet_mode, process_bytes_with_stats
+from app.services.exporter import OUTPUT_FORMATS, check_output_format, generate_output_filename
+from app.services.excel_template import check_template, preload_templates
+from app.services.jobs import JobStore, job_timings, run_job
+from app.services.cache import ResultCache
+from app.services.uploads import (
+    UploadLimitMiddleware, UploadTooLargeError, save_upload, spool_upload, unique_upload_path
+)
+from app.services.janitor import OutputJanitor, mark_used
+
+# Пул для обработки файлов вне event loop
+executor = ProcessingExecutor(initializer=preload_templates)
+
+# Состояния фоновых задач
+job_store = JobStore()
+
+# Готовые результаты по хэшу файла и настройкам
+result_cache = ResultCache()
+
+# Очистка каталога результатов
+janitor = OutputJanitor()
+
+FILE_HASH_PATTERN = re.compile(r'^[0-9a-fA-F]{64}$')
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Шаблоны оформления читаются при запуске (ошибка в шаблоне по умолчанию - сразу)
+    await asyncio.to_thread(preload_templates)
+    janitor_task = asyncio.create_task(janitor.run_forever())
+    yield
+    janitor_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await janitor_task
+    executor.shutdown(wait=False)
 
-from app.core.config import UPLOAD_DIR, OUTPUT_DIR, DEFAULT_MARKERS
-from app.services.processor import process_file
 
 app = FastAPI(
     title="Прайс-Стандарт",
     description="SaaS-сервис автоматической обработки и стандартизации прайс-листов",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS для локальной разработки
@@ -28,6 +75,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Пути, принимающие файлы
+UPLOAD_PATHS = ("/process", "/jobs")
+
+
+def too_large_message() -> str:
+    """Текст ошибки 413"""
+    return f"Файл больше {MAX_FILE_SIZE // (1024 * 1024)} МБ"
+
+
+# Размер тела загрузки - по Content-Length и по фактически прочитанным байтам
+app.add_middleware(
+    UploadLimitMiddleware,
+    paths=UPLOAD_PATHS,
+    max_bytes=MAX_FILE_SIZE + UPLOAD_FORM_OVERHEAD,
+    detail=too_large_message(),
+)
+
+
 # Директории
 BASE_DIR = Path(__file__).resolve().parent.parent
 STATIC_DIR = BASE_DIR / "static"
@@ -44,6 +109,73 @@ app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
 
+def busy_error() -> HTTPException:
+    """Ответ 503, когда очередь обработки заполнена"""
+    return HTTPException(
+        status_code=503,
+        detail="Сервер занят обработкой других файлов, повторите позже",
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
+def unsupported_file_message() -> str:
+    """Текст ошибки 400 для неподдерживаемого типа файла"""
+    return f"Разрешены только файлы {', '.join(INPUT_SUFFIXES)}"
+
+
+def output_file(filename: str) -> Path:
+    """
+    Файл результата в OUTPUT_DIR; ответ 404, если его нет
+    или имя указывает за пределы каталога результатов ("../", абсолютный путь)
+    """
+    output_dir = OUTPUT_DIR.resolve()
+    file_path = (output_dir / filename).resolve()
+    if file_path.parent != output_dir or not file_path.is_file():
+        raise HTTPException(status_code=404, detail="Файл не найден")
+    return file_path
+
+
+def output_media_type(filename: str) -> str:
+    """MIME-тип результата по расширению файла"""
+    return OUTPUT_FORMATS.get(Path(filename).suffix.lstrip(".").lower(), OUTPUT_FORMATS["xlsx"])
+
+
+async def validate_output_format(output_format: str, sheet_mode: str = SHEET_MODE,
+                                 template: str = EXCEL_TEMPLATE):
+    """
+    Ответ 400 для неизвестного или недоступного формата результата, режима листов и шаблона.
+    Шаблон при первом обращении или после изменения файла читается с диска - вне event loop.
+    """
+    try:
+        check_output_format(output_format)
+        check_sheet_mode(sheet_mode, output_format)
+        await asyncio.to_thread(check_template, template, output_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def process_result(message: str, output_filename: str, file_hash: str, cached: bool,
+                   timings: dict = None) -> dict:
+    """Ответ /process"""
+    return {
+        "success": True,
+        "message": message,
+        "output_filename": output_filename,
+        "download_url": f"/download/{output_filename}",
+        "file_hash": file_hash,
+        "cached": cached,
+        "timings": timings,
+    }
+
+
+def record_job_result(future):
+    """Учёт завершённой фоновой задачи в метриках"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    success, timings = future.result()
+    record_processing(success, timings)
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     """Главная страница"""
@@ -62,25 +194,36 @@ async def process_price_list(
     k2_discount: int = Form(default=30),
     k3_discount: int = Form(default=40),
     recalculate_existing: bool = Form(default=False),
+    output_format: str = Form(default="xlsx", alias="format"),
+    sheet_mode: str = Form(default=SHEET_MODE, alias="sheets"),
+    template: str = Form(default=EXCEL_TEMPLATE),
 ):
     """
     Обработка прайс-листа
     
     Args:
-        file: Загружаемый Excel-файл
+        file: Загружаемый Excel- или CSV/TSV-файл
         k2_discount: Скидка для маркера К2 (%)
         k3_discount: Скидка для маркера К3 (%)
         recalculate_existing: Пересчитывать существующие спец. цены
+        output_format: Формат результата (поле format): xlsx, csv, jsonl или parquet
+        sheet_mode: Листы книги (поле sheets): active, merge или split
+        template: Шаблон оформления xlsx (имя файла в templates_excel без .xlsx,
+            "default" - корпоративный шаблон); пусто - встроенное оформление
     """
     # Проверка типа файла
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="Разрешены только файлы .xlsx или .xls")
+    if not file.filename.lower().endswith(INPUT_SUFFIXES):
+        raise HTTPException(status_code=400, detail=unsupported_file_message())
+    await validate_output_format(output_format, sheet_mode, template)
+    
+    # Очередь заполнена - не принимаем файл
+    if executor.is_full:
+        raise busy_error()
     
-    # Сохранение загруженного файла
-    file_path = UPLOAD_DIR / file.filename
+    # Файл принимается в буфер: небольшие - в памяти, без записи на диск
+    buffer = None
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        buffer, file_hash, _ = await spool_upload(file)
         
         # Настройки скидок
         discount_settings = {
@@ -88,52 +231,229 @@ async def process_price_list(
             "К3": k3_discount,
         }
         
-        # Обработка
-        success, message, output_filename = process_file(
-            str(file_path),
-            discount_settings,
-            recalculate_existing
-        )
+        # Тот же файл с теми же настройками уже обрабатывался
+        # (ключ кэша читает шаблон оформления, индекс кэша - на диске)
+        cached = await asyncio.to_thread(result_cache.get, file_hash, discount_settings,
+                                         recalculate_existing, output_format, sheet_mode, template)
+        if cached is not None:
+            record_processing(True, None, cached=True)
+            message, output_filename = cached
+            return process_result(message, output_filename, file_hash, cached=True)
+        
+        # Потоку пула передаётся сам буфер, процессу - его содержимое
+        source = buffer if executor.kind == "thread" else buffer.read()
+        
+        # Обработка в пуле, чтобы не блокировать остальные запросы
+        try:
+            future = executor.submit(
+                process_bytes_with_stats,
+                source,
+                discount_settings,
+                recalculate_existing,
+                output_format,
+                sheet_mode,
+                template
+            )
+        except ExecutorBusyError:
+            raise busy_error()
         
+        # Буфер закрывается, когда обработчик закончит с ним: запрос может
+        # оборваться раньше, а поток пула ещё читает файл
+        worker_buffer, buffer = buffer, None
+        future.add_done_callback(lambda _future: worker_buffer.close())
+        success, message, output_bytes, timings = await asyncio.wrap_future(future)
+        
+        record_processing(success, timings)
         if not success:
             raise HTTPException(status_code=400, detail=message)
         
-        return {
-            "success": True,
-            "message": message,
-            "output_filename": output_filename,
-            "download_url": f"/download/{output_filename}",
-        }
+        # Результат сохраняется один раз - для скачивания и кэша
+        output_filename = generate_output_filename(output_format)
+        async with aiofiles.open(OUTPUT_DIR / output_filename, "wb") as output:
+            await output.write(output_bytes)
+        
+        await asyncio.to_thread(result_cache.put, file_hash, discount_settings, recalculate_existing,
+                                message, output_filename, output_format, sheet_mode, template)
+        return process_result(message, output_filename, file_hash, cached=False, timings=timings)
         
     except HTTPException:
         raise
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail=too_large_message())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка обработки: {str(e)}")
     finally:
-        # Удаляем загруженный файл
-        if file_path.exists():
-            file_path.unlink()
+        if buffer is not None:
+            buffer.close()
+
+
+@app.post("/process/by-hash")
+async def process_by_hash(
+    file_hash: str = Form(...),
+    k2_discount: int = Form(default=30),
+    k3_discount: int = Form(default=40),
+    recalculate_existing: bool = Form(default=False),
+    output_format: str = Form(default="xlsx", alias="format"),
+    sheet_mode: str = Form(default=SHEET_MODE, alias="sheets"),
+    template: str = Form(default=EXCEL_TEMPLATE),
+):
+    """
+    Результат обработки по SHA-256 файла без его загрузки.
+    404 - результата нет в кэше, файл нужно отправить в /process.
+    """
+    if not FILE_HASH_PATTERN.match(file_hash):
+        raise HTTPException(status_code=400, detail="Некорректный SHA-256 файла")
+    await validate_output_format(output_format, sheet_mode, template)
+    
+    discount_settings = {
+        "К2": k2_discount,
+        "К3": k3_discount,
+    }
+    
+    cached = await asyncio.to_thread(result_cache.get, file_hash, discount_settings,
+                                     recalculate_existing, output_format, sheet_mode, template)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Результат не найден, загрузите файл")
+    
+    record_processing(True, None, cached=True)
+    message, output_filename = cached
+    return process_result(message, output_filename, file_hash.lower(), cached=True)
 
 
 @app.get("/download/{filename}")
 async def download_file(filename: str):
     """Скачивание обработанного файла"""
-    file_path = OUTPUT_DIR / filename
-    
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="Файл не найден")
+    file_path = output_file(filename)
     
+    mark_used(file_path)
     return FileResponse(
         path=str(file_path),
         filename=filename,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        media_type=output_media_type(filename)
+    )
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    k2_discount: int = Form(default=30),
+    k3_discount: int = Form(default=40),
+    recalculate_existing: bool = Form(default=False),
+    output_format: str = Form(default="xlsx", alias="format"),
+    sheet_mode: str = Form(default=SHEET_MODE, alias="sheets"),
+    template: str = Form(default=EXCEL_TEMPLATE),
+):
+    """
+    Постановка прайс-листа в фоновую обработку.
+    Сразу возвращает id задачи, состояние - GET /jobs/{job_id}.
+    Поля format, sheets и template - как у /process.
+    """
+    if not file.filename.lower().endswith(INPUT_SUFFIXES):
+        raise HTTPException(status_code=400, detail=unsupported_file_message())
+    await validate_output_format(output_format, sheet_mode, template)
+    
+    if executor.is_full:
+        raise busy_error()
+    
+    job = job_store.create()
+    
+    # Файл удаляет обработчик после завершения задачи
+    file_path = unique_upload_path(file.filename, job.job_id)
+    try:
+        file_hash, _ = await save_upload(file, file_path)
+    except UploadTooLargeError:
+        job_store.update(job.job_id, state="failed", message=too_large_message())
+        raise HTTPException(status_code=413, detail=too_large_message())
+    
+    discount_settings = {
+        "К2": k2_discount,
+        "К3": k3_discount,
+    }
+    
+    # Готовый результат - задача сразу завершена
+    cached = await asyncio.to_thread(result_cache.get, file_hash, discount_settings,
+                                     recalculate_existing, output_format, sheet_mode, template)
+    if cached is not None:
+        file_path.unlink()
+        record_processing(True, None, cached=True)
+        message, output_filename = cached
+        now = time.time()
+        job = job_store.update(job.job_id, state="done", message=message,
+                               output_filename=output_filename,
+                               started_at=now, finished_at=now)
+    else:
+        try:
+            future = executor.submit(run_job, job.job_id, str(file_path), discount_settings,
+                                     recalculate_existing, file_hash, output_format, sheet_mode,
+                                     template)
+            future.add_done_callback(record_job_result)
+        except ExecutorBusyError:
+            file_path.unlink()
+            job_store.update(job.job_id, state="failed", message="Очередь обработки заполнена")
+            raise busy_error()
+    
+    return {
+        "job_id": job.job_id,
+        "state": job.state,
+        "status_url": f"/jobs/{job.job_id}",
+        "result_url": f"/jobs/{job.job_id}/result",
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Состояние задачи: state, stage, сообщение и время выполнения"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    
+    return {**job.model_dump(), **job_timings(job)}
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Скачивание результата задачи"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    
+    if job.state == "failed":
+        raise HTTPException(status_code=400, detail=job.message)
+    if job.state != "done":
+        raise HTTPException(
+            status_code=409,
+            detail="Задача ещё выполняется",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    
+    file_path = output_file(job.output_filename)
+    
+    mark_used(file_path)
+    return FileResponse(
+        path=str(file_path),
+        filename=job.output_filename,
+        media_type=output_media_type(job.output_filename)
     )
 
 
 @app.get("/health")
 async def health_check():
     """Проверка работоспособности"""
-    return {"status": "ok", "service": "Прайс-Стандарт"}
+    return {
+        "status": "ok",
+        "service": "Прайс-Стандарт",
+        "jobs_in_flight": executor.in_flight,
+        "jobs_capacity": executor.capacity,
+        "janitor": janitor.stats,
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Метрики в текстовом формате Prometheus"""
+    JOBS_IN_FLIGHT.set(executor.in_flight)
+    JOBS_CAPACITY.set(executor.capacity)
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
 
 
 if __name__ == "__main__":
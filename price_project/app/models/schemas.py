@@ -26,3 +26,16 @@ class ProcessingResult(BaseModel):
     output_filename: Optional[str] = None
     rows_processed: int = 0
     rows_with_sale: int = 0
+
+
+class JobStatus(BaseModel):
+    """Состояние фоновой задачи обработки"""
+    job_id: str
+    state: str = "queued"  # queued / running / done / failed
+    stage: Optional[str] = None  # detect / parse / clean / transform / export
+    message: Optional[str] = None
+    output_filename: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    timings: Optional[Dict[str, Dict[str, Optional[float]]]] = None  # {этап: {seconds, rows, bytes, memory}}
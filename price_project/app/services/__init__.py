@@ -1,6 +1,9 @@
 # App services
-from app.services.parser import ExcelParser
+from app.services.parser import ExcelParser, create_parser
+from app.services.csv_parser import CsvParser
 from app.services.cleaner import DataCleaner
 from app.services.transformer import DataTransformer
-from app.services.exporter import ExcelExporter, generate_output_filename
-from app.services.processor import PriceProcessor, process_file
+from app.services.exporter import ExcelExporter, create_exporter, generate_output_filename
+from app.services.processor import (
+    PriceProcessor, process_file, process_file_with_stats, process_bytes_with_stats
+)
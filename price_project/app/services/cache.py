@@ -0,0 +1,156 @@
+"""
+Кэш результатов обработки
+Ключ - SHA-256 загруженного файла, настройки скидок, флаг пересчёта,
+формат результата, режим листов, шаблон оформления, маппинг статусов из файла
+и версия логики обработки. Результаты лежат в OUTPUT_DIR, в кэше - индекс
+(JSON-файл на ключ), по времени изменения которого вытесняются старые записи.
+"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.core.config import (
+    CACHE_DIR, OUTPUT_DIR, PIPELINE_VERSION, RESULT_CACHE_MAX_BYTES, SHEET_MODE, EXCEL_TEMPLATE
+)
+from app.services.excel_template import template_store
+from app.services.janitor import mark_used
+from app.services.status_normalizer import status_normalizer
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    """SHA-256 файла (читается частями)"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Кэш готовых файлов с ограничением по суммарному размеру"""
+
+    def __init__(self,
+                 cache_dir: Path = CACHE_DIR,
+                 output_dir: Path = OUTPUT_DIR,
+                 max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.output_dir = Path(output_dir)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(file_hash: str,
+                 discount_settings: Dict[str, int],
+                 recalculate_existing: bool,
+                 output_format: str = "xlsx",
+                 sheet_mode: str = SHEET_MODE,
+                 template: str = EXCEL_TEMPLATE) -> str:
+        """Ключ кэша для файла и настроек обработки"""
+        settings = json.dumps(discount_settings, sort_keys=True, ensure_ascii=False)
+        raw = f"{file_hash.lower()}|{settings}|{bool(recalculate_existing)}|{PIPELINE_VERSION}"
+        # Ключи xlsx - прежние, чтобы не сбрасывать накопленный кэш
+        if output_format != "xlsx":
+            raw += f"|{output_format}"
+        if sheet_mode != "merge":
+            raw += f"|sheets={sheet_mode}"
+        # Шаблон оформления - по имени и содержимому файла (новый шаблон - новый результат)
+        if template and output_format == "xlsx":
+            raw += f"|template={template}:{template_store.get(template).digest}"
+        # Маппинг статусов из файла меняет результат - ключ зависит от его содержимого
+        status_digest = status_normalizer.digest
+        if status_digest is not None:
+            raw += f"|statuses={status_digest}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self,
+            file_hash: str,
+            discount_settings: Dict[str, int],
+            recalculate_existing: bool,
+            output_format: str = "xlsx",
+            sheet_mode: str = SHEET_MODE,
+            template: str = EXCEL_TEMPLATE) -> Optional[Tuple[str, str]]:
+        """
+        Поиск готового результата.
+        Возвращает (message, output_filename) или None.
+        """
+        entry_path = self._entry_path(
+            self.make_key(file_hash, discount_settings, recalculate_existing, output_format, sheet_mode,
+                          template)
+        )
+        try:
+            entry = json.loads(entry_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # Результат мог быть удалён при очистке каталога
+        if not (self.output_dir / entry["output_filename"]).exists():
+            entry_path.unlink(missing_ok=True)
+            return None
+
+        # Отмечаем использование: время изменения индекса - для вытеснения из кэша,
+        # файла результата - чтобы очистка каталога не удалила выдаваемый файл
+        os.utime(entry_path)
+        mark_used(self.output_dir / entry["output_filename"])
+        return entry["message"], entry["output_filename"]
+
+    def put(self,
+            file_hash: str,
+            discount_settings: Dict[str, int],
+            recalculate_existing: bool,
+            message: str,
+            output_filename: str,
+            output_format: str = "xlsx",
+            sheet_mode: str = SHEET_MODE,
+            template: str = EXCEL_TEMPLATE):
+        """Сохранение результата в кэш с вытеснением старых записей"""
+        output_path = self.output_dir / output_filename
+        entry = {
+            "message": message,
+            "output_filename": output_filename,
+            "size": output_path.stat().st_size,
+            "created_at": time.time(),
+        }
+        entry_path = self._entry_path(
+            self.make_key(file_hash, discount_settings, recalculate_existing, output_format, sheet_mode,
+                          template)
+        )
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, entry_path)
+
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Удаление давно не использованных записей (и их файлов),
+        пока суммарный размер не станет меньше max_bytes.
+        Возвращает число освобождённых байт.
+        """
+        entries = []
+        total = 0
+        for entry_path in self.cache_dir.glob("*.json"):
+            try:
+                entry = json.loads(entry_path.read_text(encoding="utf-8"))
+                last_used = entry_path.stat().st_mtime
+            except (FileNotFoundError, ValueError):
+                continue
+            entries.append((last_used, entry_path, entry))
+            total += entry["size"]
+
+        freed = 0
+        for _, entry_path, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            entry_path.unlink(missing_ok=True)
+            (self.output_dir / entry["output_filename"]).unlink(missing_ok=True)
+            total -= entry["size"]
+            freed += entry["size"]
+        return freed
@@ -1,11 +1,27 @@
 """
 Модуль очистки данных (Data Cleaning)
 """
+import numpy as np
 import pandas as pd
 import re
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
 from typing import List, Optional
 
 
+def _combine_patterns(patterns: List[str], flags: int = 0) -> re.Pattern:
+    """Объединение списка паттернов в одно скомпилированное выражение"""
+    return re.compile('|'.join(f'(?:{p})' for p in patterns), flags)
+
+
+# Строка, которую принимает float(): знак, цифры с "_", дробь, экспонента, inf/nan
+_DIGITS = r'\d(?:_?\d)*'
+_FLOAT_RE = re.compile(
+    rf'[+-]?(?:(?:{_DIGITS}(?:\.(?:{_DIGITS})?)?|\.{_DIGITS})(?:[eE][+-]?{_DIGITS})?'
+    r'|(?i:inf|infinity|nan))'
+)
+_CODE_RE = re.compile(r'\d{5,}')
+
+
 class DataCleaner:
     """Очистка данных от служебной информации"""
     
@@ -43,29 +59,95 @@ class DataCleaner:
         r'распродажа',
     ]
     
-    def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
+    # Те же паттерны, объединённые в одно выражение на класс строк
+    _HEADER_FOOTER_RE = _combine_patterns(HEADER_FOOTER_PATTERNS)
+    _CATEGORY_RE = _combine_patterns(CATEGORY_PATTERNS, re.IGNORECASE)
+    
+    def __init__(self, df: pd.DataFrame, has_header_row: bool = True):
+        """
+        Args:
+            df: DataFrame с данными (не копируется и не меняется)
+            has_header_row: Первая строка - заголовок таблицы (не удаляется
+                как дубликат). False для последующих частей при потоковой обработке.
+        """
+        self.df = df
+        self.has_header_row = has_header_row
+        # Шаги очистки только снимают строки с маски, удаление - один раз в result()
+        self._keep = np.ones(len(df), dtype=bool)
+        self._row_text = None
+    
+    def _get_row_text(self) -> pd.Series:
+        """
+        Текст строки: непустые значения ячеек через пробел.
+        Строится один раз на все шаги очистки.
+        """
+        if self._row_text is None:
+            parts = []
+            for col in self.df.columns:
+                values = self.df[col]
+                # Как `if c and pd.notna(c)`: пропускаем NaN, 0, False и ""
+                present = values.notna() & ~values.isin([0, ''])
+                parts.append(values.astype(object).where(present, '').astype(str).to_numpy())
+            # Строки склеиваются за один проход, без промежуточных колонок текста
+            text = [' '.join(filter(None, row)) for row in zip(*parts)] if parts else ''
+            self._row_text = pd.Series(text, index=self.df.index, dtype=object)
+        return self._row_text
+    
+    def _kept(self) -> np.ndarray:
+        """Позиции строк, которые пока остаются"""
+        return np.flatnonzero(self._keep)
+    
+    def _kept_text(self, kept: np.ndarray) -> pd.Series:
+        """Текст оставшихся строк (позиции kept)"""
+        return self._get_row_text().iloc[kept]
+    
+    def _drop(self, positions: np.ndarray):
+        """Снять строки (позиции) с маски"""
+        self._keep[positions] = False
+    
+    def _has_code_or_price(self) -> np.ndarray:
+        """
+        Маска оставшихся строк, в которых есть код товара (5+ цифр в начале
+        ячейки) или цена (ячейка, которую можно привести к float).
+        Каждая колонка проверяется только для ещё не найденных строк.
+        """
+        # Снятые строки не проверяются
+        found = ~self._keep
+        
+        # Числовые колонки первыми: в них любое значение - цена
+        columns = sorted(
+            self.df.columns,
+            key=lambda col: not (is_numeric_dtype(self.df[col]) and not is_bool_dtype(self.df[col]))
+        )
+        for col in columns:
+            values = self.df[col]
+            present = values.notna().to_numpy() & ~found
+            if not present.any():
+                continue
+            
+            if is_numeric_dtype(values) and not is_bool_dtype(values):
+                found |= present
+                continue
+            
+            cell_str = values[present].astype(object).astype(str).str.strip()
+            cell_num = cell_str.str.replace(' ', '', regex=False).str.replace(',', '.', regex=False)
+            matched = cell_str.str.match(_CODE_RE) | cell_num.str.fullmatch(_FLOAT_RE)
+            found[np.flatnonzero(present)] = matched.to_numpy(dtype=bool)
+        
+        return found & self._keep
         
     def remove_empty_rows(self) -> 'DataCleaner':
         """Удаление полностью пустых строк"""
-        initial_count = len(self.df)
-        self.df = self.df.dropna(how='all')
-        removed = initial_count - len(self.df)
+        self._keep &= self.df.notna().any(axis=1).to_numpy()
         return self
     
     def remove_header_footer(self) -> 'DataCleaner':
         """Удаление шапок и подвалов документа"""
-        indices_to_drop = []
-        
-        for idx, row in self.df.iterrows():
-            row_text = ' '.join(str(c) for c in row if c and pd.notna(c)).lower()
-            
-            for pattern in self.HEADER_FOOTER_PATTERNS:
-                if re.search(pattern, row_text):
-                    indices_to_drop.append(idx)
-                    break
+        kept = self._kept()
+        row_text = self._kept_text(kept).str.lower()
+        is_header_footer = row_text.str.contains(self._HEADER_FOOTER_RE).to_numpy(dtype=bool)
         
-        self.df = self.df.drop(indices_to_drop).reset_index(drop=True)
+        self._drop(kept[is_header_footer])
         return self
     
     def remove_category_headers(self) -> 'DataCleaner':
@@ -73,72 +155,48 @@ class DataCleaner:
         Удаление заголовков разделов (категорий).
         Строки, содержащие только названия категорий без цены или кода товара.
         """
-        indices_to_drop = []
-        
-        for idx, row in self.df.iterrows():
-            # Проверяем, есть ли в строке код товара или цена
-            has_code = False
-            has_price = False
-            
-            for cell in row:
-                if pd.notna(cell):
-                    cell_str = str(cell).strip()
-                    # Код товара - обычно цифры
-                    if re.match(r'^\d{5,}', cell_str):
-                        has_code = True
-                    # Цена - число
-                    try:
-                        float(cell_str.replace(' ', '').replace(',', '.'))
-                        has_price = True
-                    except ValueError:
-                        pass
-            
-            # Если нет кода и цены, проверяем на категорию
-            if not has_code and not has_price:
-                row_text = ' '.join(str(c) for c in row if c and pd.notna(c)).upper()
-                for pattern in self.CATEGORY_PATTERNS:
-                    if re.search(pattern, row_text, re.IGNORECASE):
-                        indices_to_drop.append(idx)
-                        break
+        # Если нет кода и цены, проверяем на категорию
+        candidates = np.flatnonzero(self._keep & ~self._has_code_or_price())
+        row_text = self._kept_text(candidates).str.upper()
+        is_category = row_text.str.contains(self._CATEGORY_RE).to_numpy(dtype=bool)
         
-        self.df = self.df.drop(indices_to_drop).reset_index(drop=True)
+        self._drop(candidates[is_category])
         return self
     
     def remove_duplicate_headers(self) -> 'DataCleaner':
         """Удаление дублирующихся строк заголовков таблицы"""
-        indices_to_drop = []
+        kept = self._kept()
+        row_text = self._kept_text(kept).str.lower()
         
-        # Первая строка - это заголовок, его не трогаем
-        if len(self.df) > 0:
-            first_row = self.df.iloc[0]
-            first_row_text = ' '.join(str(c) for c in first_row if c and pd.notna(c)).lower()
-            
-            # Проверяем остальные строки
-            for idx in range(1, len(self.df)):
-                row = self.df.iloc[idx]
-                row_text = ' '.join(str(c) for c in row if c and pd.notna(c)).lower()
-                
-                # Если строка содержит ключевые слова заголовков
-                has_header_words = sum(
-                    1 for pattern in self.DUPLICATE_HEADER_PATTERNS 
-                    if pattern in row_text
-                )
-                
-                if has_header_words >= 2:  # Если есть хотя бы 2 слова из заголовка
-                    indices_to_drop.append(idx)
+        # Если строка содержит хотя бы 2 ключевых слова заголовков
+        header_words = sum(
+            row_text.str.contains(pattern, regex=False).to_numpy(dtype=int)
+            for pattern in self.DUPLICATE_HEADER_PATTERNS
+        )
+        is_duplicate = header_words >= 2
+        
+        # Первая оставшаяся строка - это заголовок, его не трогаем
+        if self.has_header_row and len(kept) > 0:
+            is_duplicate[0] = False
         
-        self.df = self.df.drop(indices_to_drop).reset_index(drop=True)
+        self._drop(kept[is_duplicate])
         return self
     
+    def result(self) -> pd.DataFrame:
+        """Оставшиеся строки: маска применяется к DataFrame один раз"""
+        if self._keep.all():
+            return self.df.reset_index(drop=True)
+        return self.df[self._keep].reset_index(drop=True)
+    
     def clean(self) -> pd.DataFrame:
         """
         Полный цикл очистки данных.
         Возвращает очищенный DataFrame.
         """
+        # Шаги не меняют ячейки, поэтому пустые строки достаточно отметить один раз
         return (self
                 .remove_empty_rows()
                 .remove_header_footer()
                 .remove_category_headers()
                 .remove_duplicate_headers()
-                .remove_empty_rows()  # Повторно удаляем пустые строки
-                .df)
+                .result())
@@ -0,0 +1,226 @@
+"""
+Определение колонок прайс-листа по строке заголовков
+Строка заголовков ищется в первых строках листа, колонки оцениваются по
+скомпилированным паттернам. Найденное сопоставление запоминается по отпечатку
+заголовков (раскладке поставщика) - повторные прайсы того же поставщика
+берут его из хранилища без оценки.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import LAYOUTS_DIR
+
+
+# Версия паттернов и оценки (входит в отпечаток):
+# при изменении логики старые сопоставления не используются
+DETECTOR_VERSION = "3"
+
+
+def _normalize_cell(value) -> str:
+    """Текст ячейки заголовка: нижний регистр, пробелы схлопнуты"""
+    if value is None:
+        return ''
+    return ' '.join(str(value).lower().split())
+
+
+def normalize_row(row) -> List[str]:
+    """Тексты ячеек строки без пустых ячеек в конце"""
+    cells = [_normalize_cell(value) for value in row]
+    while cells and not cells[-1]:
+        cells.pop()
+    return cells
+
+
+def layout_fingerprint(header: List[str], super_header_hits: List[str] = ()) -> str:
+    """
+    Отпечаток раскладки: заголовки колонок, совпадения паттернов в строке
+    над ними (ColumnDetector.super_header_hits) и версия определения.
+    Текст строки над заголовками не входит - в ней бывают даты и названия
+    складов, меняющиеся от выпуска к выпуску прайса; но надзаголовки
+    «Спец. цены» / «Розничные» меняют сопоставление и отпечаток.
+    """
+    raw = '\x1e'.join(['\x1f'.join(header), '\x1f'.join(super_header_hits), DETECTOR_VERSION])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class LayoutStore:
+    """Хранилище сопоставлений колонок: JSON-файл на отпечаток раскладки"""
+
+    def __init__(self, layouts_dir: Path = LAYOUTS_DIR):
+        self.layouts_dir = Path(layouts_dir)
+
+    def _entry_path(self, fingerprint: str) -> Path:
+        return self.layouts_dir / f"{fingerprint}.json"
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, int]]:
+        """Сохранённое сопоставление {тип_колонки: индекс} или None"""
+        try:
+            entry = json.loads(self._entry_path(fingerprint).read_text(encoding="utf-8"))
+            return {col_type: int(col_idx) for col_type, col_idx in entry["mapping"].items()}
+        except (FileNotFoundError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def put(self, fingerprint: str, mapping: Dict[str, int], header: List[str]):
+        """Сохранение сопоставления (заголовки - для просмотра и ручной правки)"""
+        entry = {
+            "mapping": mapping,
+            "header": header,
+            "created_at": time.time(),
+        }
+        entry_path = self._entry_path(fingerprint)
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(entry, ensure_ascii=False, indent=2), encoding="utf-8")
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            # Хранилище - только ускорение, без записи определение просто повторится
+            tmp_path.unlink(missing_ok=True)
+
+
+class ColumnDetector:
+    """Определение индексов ключевых колонок по заголовкам таблицы"""
+
+    # Паттерны колонок с весом: чем конкретнее паттерн, тем больше вес
+    COLUMN_PATTERNS = {
+        'code': [(r'код\s*товара', 3), (r'артикул', 3), (r'^код', 2), (r'^№', 1)],
+        'status': [(r'статус', 3), (r'качество', 3), (r'распродажа', 2),
+                   (r'срок', 1), (r'ограничен', 1)],
+        'name': [(r'номенклатура', 3), (r'наименование', 3), (r'название', 3),
+                 (r'описание', 2), (r'товар', 1)],
+        'special_price': [(r'спец\.?\s*цен', 3), (r'специальн\w*\s*цен', 3), (r'акци', 2)],
+        'retail_price': [(r'розничн', 3), (r'цена\s*розн', 3), (r'прайс\s*цена', 2), (r'^цена', 1)],
+    }
+
+    # Совпадение в самой строке заголовков весит больше, чем в строке над ней
+    # (надзаголовок объединённых ячеек: «Спец. цены» над «Цена»)
+    HEADER_WEIGHT = 2
+    SUPER_HEADER_WEIGHT = 1
+
+    # Сколько первых строк просматривать в поиске строки заголовков
+    SCAN_ROWS = 50
+
+    # Строка заголовков - не меньше стольких распознанных типов колонок
+    MIN_HEADER_TYPES = 2
+
+    # Паттерны компилируются один раз на класс
+    _COMPILED = {
+        col_type: [(re.compile(pattern), weight) for pattern, weight in patterns]
+        for col_type, patterns in COLUMN_PATTERNS.items()
+    }
+    _TYPE_RE = {
+        col_type: re.compile('|'.join(f'(?:{pattern})' for pattern, _ in patterns))
+        for col_type, patterns in COLUMN_PATTERNS.items()
+    }
+
+    def __init__(self, store: Optional[LayoutStore] = None):
+        """
+        Args:
+            store: Хранилище сопоставлений (None - LayoutStore в LAYOUTS_DIR)
+        """
+        self.store = store if store is not None else LayoutStore()
+        # Отпечаток последней найденной раскладки и откуда взято сопоставление
+        self.fingerprint = None
+        self.from_store = False
+
+    def _row_types(self, cells: List[str]) -> int:
+        """Сколько разных типов колонок узнаётся в строке"""
+        return sum(
+            1 for type_re in self._TYPE_RE.values()
+            if any(cell and type_re.search(cell) for cell in cells)
+        )
+
+    def find_header_row(self, rows: List[List[str]]) -> Optional[int]:
+        """Индекс строки заголовков (больше всего типов колонок) или None"""
+        best_idx = None
+        best_types = self.MIN_HEADER_TYPES - 1
+        for row_idx, cells in enumerate(rows):
+            types = self._row_types(cells)
+            if types > best_types:
+                best_idx, best_types = row_idx, types
+        return best_idx
+
+    def locate_header_row(self, rows: Iterable) -> Optional[int]:
+        """Индекс строки заголовков среди первых SCAN_ROWS строк листа или None"""
+        return self.find_header_row([normalize_row(row) for row in islice(rows, self.SCAN_ROWS)])
+
+    def _cell_score(self, col_type: str, text: str) -> int:
+        """Вес самого конкретного паттерна типа, совпавшего с текстом"""
+        return max((weight for pattern, weight in self._COMPILED[col_type] if pattern.search(text)),
+                   default=0)
+
+    def super_header_hits(self, super_header: List[str]) -> List[str]:
+        """
+        Совпадения паттернов в строке над заголовками по колонкам
+        («тип:вес» через запятую, пусто - нет совпадений): то, что
+        score_columns берёт из этой строки, без остального текста
+        """
+        hits = []
+        for cell in super_header:
+            matched = []
+            for col_type in self.COLUMN_PATTERNS:
+                score = self._cell_score(col_type, cell) if cell else 0
+                if score:
+                    matched.append(f"{col_type}:{score}")
+            hits.append(','.join(matched))
+        while hits and not hits[-1]:
+            hits.pop()
+        return hits
+
+    def score_columns(self, header: List[str], super_header: List[str]) -> Dict[str, int]:
+        """
+        Сопоставление {тип_колонки: индекс}: пары (тип, колонка) разбираются
+        по убыванию оценки, каждая колонка и каждый тип - не больше одного раза.
+        """
+        candidates: List[Tuple[int, int, int, str]] = []
+        type_order = {col_type: order for order, col_type in enumerate(self.COLUMN_PATTERNS)}
+        for col_idx in range(max(len(header), len(super_header))):
+            main = header[col_idx] if col_idx < len(header) else ''
+            above = super_header[col_idx] if col_idx < len(super_header) else ''
+            for col_type in self.COLUMN_PATTERNS:
+                score = max(
+                    self._cell_score(col_type, main) * self.HEADER_WEIGHT if main else 0,
+                    self._cell_score(col_type, above) * self.SUPER_HEADER_WEIGHT if above else 0,
+                )
+                if score:
+                    candidates.append((-score, type_order[col_type], col_idx, col_type))
+
+        mapping = {}
+        used_columns = set()
+        for _, _, col_idx, col_type in sorted(candidates):
+            if col_type in mapping or col_idx in used_columns:
+                continue
+            mapping[col_type] = col_idx
+            used_columns.add(col_idx)
+        return mapping
+
+    def detect(self, rows: Iterable) -> Tuple[Dict[str, int], Optional[int]]:
+        """
+        Определение колонок по первым строкам листа.
+        Возвращает ({column_type: column_index}, индекс строки заголовков);
+        строка заголовков не найдена - ({}, None).
+        """
+        head = [normalize_row(row) for row in islice(rows, self.SCAN_ROWS)]
+        self.fingerprint = None
+        self.from_store = False
+
+        header_idx = self.find_header_row(head)
+        if header_idx is None:
+            return {}, None
+        header = head[header_idx]
+        super_header = head[header_idx - 1] if header_idx > 0 else []
+
+        self.fingerprint = layout_fingerprint(header, self.super_header_hits(super_header))
+        mapping = self.store.get(self.fingerprint)
+        if mapping is not None:
+            self.from_store = True
+            return mapping, header_idx
+
+        mapping = self.score_columns(header, super_header)
+        self.store.put(self.fingerprint, mapping, header)
+        return mapping, header_idx
@@ -0,0 +1,102 @@
+"""
+Компактное представление прайс-листа в памяти
+Колонка статусов и повторяющиеся наименования хранятся как категории,
+цены - во float32 (если все значения представимы без потерь), строки кодов
+товаров интернируются. Значения ячеек не меняются - результат обработки тот же.
+"""
+import sys
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype, is_object_dtype
+
+
+# Наименования - категориями, если уникальных значений не больше этой доли строк
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+PRICE_COLUMNS = ('special_price', 'retail_price')
+
+# Типы object-колонки (infer_dtype), в которой одни числа
+NUMERIC_INFERRED_TYPES = ('integer', 'floating', 'mixed-integer-float')
+
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """Память DataFrame в байтах (вместе со строками object-колонок)"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _as_category(values: pd.Series, max_unique_ratio: float = 1.0) -> pd.Series:
+    """Текстовая колонка -> категориальная, если значения повторяются"""
+    if not is_object_dtype(values) or values.nunique() > max_unique_ratio * len(values):
+        return values
+    return values.astype('category')
+
+
+def _narrow_float(values: pd.Series) -> pd.Series:
+    """
+    Цены -> float32, если все значения возвращаются без потерь.
+    object-колонка (потоковый режим) сужается, только если в ней одни числа:
+    текст ("2 000", "по запросу") остаётся как прочитан.
+    """
+    if is_object_dtype(values):
+        if infer_dtype(values, skipna=True) not in NUMERIC_INFERRED_TYPES:
+            return values
+        wide = pd.to_numeric(values).astype(np.float64)
+    elif values.dtype == np.float64:
+        wide = values
+    else:
+        return values
+    narrow = pd.to_numeric(wide, downcast='float')
+    if narrow.dtype == np.float64:
+        return values
+    exact = narrow.to_numpy(dtype=np.float64) == wide.to_numpy()
+    if not (exact | wide.isna().to_numpy()).all():
+        return values
+    return narrow
+
+
+def _intern_strings(values: pd.Series) -> pd.Series:
+    """
+    Одинаковые строки object-колонки - один объект.
+    Интернируется каждое уникальное значение, а не каждая строка.
+    """
+    if not is_object_dtype(values):
+        return values
+    source = values.to_numpy()
+    codes, uniques = pd.factorize(source)
+    # Подменяются только строки: пропуски и числа остаются теми же объектами
+    is_str = np.array([type(value) is str for value in uniques] + [False])
+    interned = np.array([sys.intern(value) if type(value) is str else value for value in uniques]
+                        + [None], dtype=object)
+    replace = is_str[codes]
+    result = source.copy()
+    result[replace] = interned[codes[replace]]
+    return pd.Series(result, index=values.index, name=values.name, dtype=object)
+
+
+def compact_frame(df: pd.DataFrame, column_mapping: Dict[str, int]) -> pd.DataFrame:
+    """
+    Компактные типы ключевых колонок прайс-листа.
+    Исходный DataFrame не меняется, остальные колонки берутся как есть.
+
+    Args:
+        df: DataFrame с данными
+        column_mapping: Словарь {тип_колонки: индекс}
+    """
+    converters = {
+        'status': _as_category,
+        'name': lambda values: _as_category(values, CATEGORY_MAX_UNIQUE_RATIO),
+        'code': _intern_strings,
+        **{col_type: _narrow_float for col_type in PRICE_COLUMNS},
+    }
+    compact = df.copy(deep=False)
+    for col_type, convert in converters.items():
+        col = column_mapping.get(col_type)
+        if col is None or col >= len(df.columns):
+            continue
+        values = df.iloc[:, col]
+        converted = convert(values)
+        if converted is not values:
+            compact.isetitem(col, converted)
+    return compact
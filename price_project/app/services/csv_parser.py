@@ -0,0 +1,187 @@
+"""
+Модуль загрузки CSV/TSV-файлов
+Выгрузки 1С и других систем: кодировка (UTF-8 или cp1251) и разделитель
+определяются по началу файла (UTF-8 проверяется по всему файлу), строки
+читаются потоком и разбираются так же, как строки листа Excel.
+"""
+import codecs
+import csv
+import io
+import logging
+import re
+from collections import Counter
+from typing import BinaryIO, Iterator, List, Union
+
+from app.services.parser import ExcelParser
+
+
+logger = logging.getLogger(__name__)
+
+
+# Число как в ячейке Excel: "6781", "-12.5", "6 781,00" (пробел или NBSP между разрядами)
+_NUMBER_RE = re.compile(r'^-?(?:\d{1,3}(?:[ \u00a0]\d{3})+|\d+)(?:[.,]\d+)?$')
+
+# Длиннее - не число, а код (float хранит точно только 15 знаков)
+_MAX_NUMBER_DIGITS = 15
+
+
+def detect_encoding(sample: bytes) -> str:
+    """Кодировка по началу файла: BOM, затем UTF-8, иначе cp1251"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        # Последний символ выборки может быть обрезан - final=False
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1251'
+
+
+def detect_delimiter(lines: List[str], delimiters: str = ';,\t|', default: str = ';') -> str:
+    """
+    Разделитель, с которым больше всего строк делится на одинаковое
+    число полей (строки шапки документа без разделителей не мешают)
+    """
+    best_score = (0, 0)
+    best = default
+    for delimiter in delimiters:
+        widths = Counter(len(row) for row in csv.reader(lines, delimiter=delimiter) if len(row) > 1)
+        if not widths:
+            continue
+        width, count = widths.most_common(1)[0]
+        if (count, width) > best_score:
+            best_score = (count, width)
+            best = delimiter
+    return best
+
+
+def _convert_csv_value(value: str):
+    """
+    Числа - в float (как значения ячеек Excel), остальное - строкой.
+    Значение с пробелами по краям - текст (так выгружаются коды товаров).
+    """
+    if not _NUMBER_RE.match(value):
+        return value
+    digits = re.sub(r'\D', '', value)
+    # Ведущий ноль или длинный номер - это код, а не число
+    if len(digits) > _MAX_NUMBER_DIGITS or (len(value) > 1 and value[0] == '0' and value[1].isdigit()):
+        return value
+    return float(value.replace(' ', '').replace('\u00a0', '').replace(',', '.'))
+
+
+class CsvParser(ExcelParser):
+    """
+    Парсер CSV/TSV-файлов.
+    Поиск заголовка таблицы, чтение частями и построение DataFrame -
+    как у ExcelParser, отличается только источник строк.
+    """
+
+    # Сколько байт начала файла используется для определения кодировки и разделителя
+    SAMPLE_SIZE = 64 * 1024
+
+    # Размер части при проверке, что весь файл - UTF-8 (1MB)
+    CHECK_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, file_path: Union[str, BinaryIO], streaming: bool = False):
+        """
+        Args:
+            file_path: Путь к файлу или файловый объект
+            streaming: Потоковый режим (строки читаются лениво
+                и не сохраняются в памяти)
+        """
+        self.file_path = file_path
+        self.streaming = streaming
+        self._reset_rows()
+        if isinstance(file_path, str):
+            self._stream = open(file_path, 'rb')
+            self._owns_stream = True
+        else:
+            self._stream = file_path
+            self._owns_stream = False
+        self._start = self._stream.tell()
+
+        sample = self._stream.read(self.SAMPLE_SIZE)
+        self._stream.seek(self._start)
+        self.encoding = detect_encoding(sample)
+        # Ошибки декодирования: 'replace' - если в UTF-8 файле нашлись недопустимые байты
+        self.errors = 'strict'
+        # Нулевые байты бывают только в UTF-16, иначе это не текст (повреждённый Excel и т.п.)
+        if b'\x00' in sample and self.encoding != 'utf-16':
+            self.close()
+            raise ValueError("Файл не является книгой Excel или текстовым CSV/TSV")
+        if self.encoding in ('utf-8', 'utf-8-sig') and len(sample) == self.SAMPLE_SIZE:
+            self._check_utf8(sample)
+
+        lines = sample.decode(self.encoding, errors='ignore').splitlines()
+        if len(sample) == self.SAMPLE_SIZE:
+            # Последняя строка выборки может быть неполной
+            lines = lines[:-1]
+        self.delimiter = detect_delimiter(lines)
+
+    def _check_utf8(self, sample: bytes):
+        """
+        Проверка, что UTF-8 весь файл, а не только начало.
+        Выгрузки 1С бывают в cp1251 с первыми 64KB из одних ASCII-символов:
+        такой файл читается как cp1251. Если в начале уже был текст UTF-8,
+        недопустимые байты дальше заменяются (U+FFFD).
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        offset = 0
+        try:
+            while True:
+                chunk = self._stream.read(self.CHECK_CHUNK_SIZE)
+                if not chunk:
+                    decoder.decode(b'', final=True)
+                    return
+                decoder.decode(chunk)
+                offset += len(chunk)
+        except UnicodeDecodeError as e:
+            if self.encoding == 'utf-8' and sample.isascii():
+                self.encoding = 'cp1251'
+                logger.warning("CSV: байт не UTF-8 на позиции %d, файл читается как cp1251",
+                               offset + e.start)
+            else:
+                self.errors = 'replace'
+                logger.warning("CSV: недопустимые байты UTF-8 начиная с позиции %d заменены",
+                               offset + e.start)
+        finally:
+            self._stream.seek(self._start)
+
+    def iter_rows(self) -> Iterator[tuple]:
+        """
+        Ленивый обход строк файла (кортежи значений).
+        В потоковом режиме строки не сохраняются.
+        """
+        if self._rows is not None:
+            return iter(self._rows)
+        return self._read_rows()
+
+    def _read_rows(self) -> Iterator[tuple]:
+        self._stream.seek(self._start)
+        text = io.TextIOWrapper(self._stream, encoding=self.encoding, errors=self.errors, newline='')
+        try:
+            for row in csv.reader(text, delimiter=self.delimiter):
+                yield tuple(_convert_csv_value(value) for value in row)
+        finally:
+            # Файловый объект остаётся открытым для вызывающего кода
+            text.detach()
+
+    def sheet_names(self) -> List[str]:
+        """У CSV/TSV листов нет - лист один"""
+        return []
+
+    def get_all_rows(self) -> List[tuple]:
+        """
+        Получить все строки файла как кортежи.
+        Файл читается один раз, дальше используется сохранённый список.
+        """
+        if self._rows is None:
+            self._rows = list(self._read_rows())
+        return self._rows
+
+    def close(self):
+        """Закрытие файла (файловый объект вызывающего кода не закрывается)"""
+        if self._owns_stream:
+            self._stream.close()
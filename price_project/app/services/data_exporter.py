@@ -0,0 +1,172 @@
+"""
+Экспорт для систем-потребителей (ERP, интернет-магазин)
+CSV, JSON Lines и Parquet пишутся построчно, без оформления: те же колонки
+и строки, что в Excel-файле, с машинными именами полей.
+"""
+import abc
+import csv
+import io
+import json
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional, TextIO, Union
+
+import pandas as pd
+
+from app.core.config import STREAM_CHUNK_ROWS
+from app.core.utils import parse_price_or_none
+from app.services.exporter import BaseExporter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet - необязательная зависимость
+    pa = None
+    pq = None
+
+
+class DataExporter(BaseExporter):
+    """Построчная запись результата без оформления"""
+
+    # Кодировка текстовых форматов
+    ENCODING = 'utf-8'
+
+    def _record_chunks(self) -> Iterator[List[list]]:
+        """
+        Строки для записи частями по STREAM_CHUNK_ROWS строк DataFrame
+        (строки-заголовки таблиц пропускаются). Значения берутся из среза
+        DataFrame - копия всего результата в списках не строится.
+        Целые цены - int: колонка цен в памяти бывает float64 или object
+        (потоковый режим), а в файле значение не должно зависеть от режима.
+        """
+        fields = self._output_fields()
+        columns = [self.column_mapping[field] for field in fields]
+        price_idx = [idx for idx, field in enumerate(fields) if 'price' in field]
+        for start in range(0, len(self.df), STREAM_CHUNK_ROWS):
+            chunk = self.df.iloc[start:start + STREAM_CHUNK_ROWS, columns]
+            rows = []
+            for values in chunk.itertuples(index=False, name=None):
+                row_values = [self._clean_value(value) for value in values]
+                if self._is_table_header(row_values):
+                    continue
+                for idx in price_idx:
+                    value = row_values[idx]
+                    if isinstance(value, float) and value.is_integer():
+                        row_values[idx] = int(value)
+                rows.append(row_values)
+            if rows:
+                yield rows
+
+    def _records(self) -> Iterator[list]:
+        """Строки для записи по одной"""
+        for rows in self._record_chunks():
+            yield from rows
+
+    @contextmanager
+    def _open_text(self, output_path: Union[str, BinaryIO]) -> Iterator[TextIO]:
+        """Текстовый поток поверх пути или файлового объекта (объект не закрывается)"""
+        if isinstance(output_path, str):
+            with open(output_path, 'w', encoding=self.ENCODING, newline='') as f:
+                yield f
+            return
+        stream = io.TextIOWrapper(output_path, encoding=self.ENCODING, newline='')
+        try:
+            yield stream
+            stream.flush()
+        finally:
+            stream.detach()
+
+    @abc.abstractmethod
+    def _write(self, output_path: Union[str, BinaryIO]):
+        """Запись строк в файл формата"""
+
+    def export(self, output_path: Optional[Union[str, BinaryIO]] = None) -> Union[str, BinaryIO]:
+        # Имя файла
+        if output_path is None:
+            output_path = self._default_output_path()
+        # Строки формируются по мере записи, поэтому сохранение - вся запись файла
+        start = time.perf_counter()
+        self._write(output_path)
+        self.save_seconds = time.perf_counter() - start
+        return output_path
+
+
+class CsvExporter(DataExporter):
+    """CSV (RFC 4180): первая строка - имена полей"""
+
+    EXTENSION = 'csv'
+
+    def _write(self, output_path: Union[str, BinaryIO]):
+        fields = self._output_fields()
+        with self._open_text(output_path) as f:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            writer.writerows(self._records())
+
+
+class JsonLinesExporter(DataExporter):
+    """JSON Lines: объект {поле: значение} на строку"""
+
+    EXTENSION = 'jsonl'
+
+    def _write(self, output_path: Union[str, BinaryIO]):
+        fields = self._output_fields()
+        with self._open_text(output_path) as f:
+            for row_values in self._records():
+                f.write(json.dumps(dict(zip(fields, row_values)), ensure_ascii=False, default=str))
+                f.write('\n')
+
+
+class ParquetExporter(DataExporter):
+    """
+    Parquet (pyarrow): группа строк на каждые STREAM_CHUNK_ROWS строк DataFrame.
+    Схема не зависит от типов колонок DataFrame (в потоковом режиме они object):
+    цены - float64 (разбираются как parse_price, нечисловые - пусто), остальные поля - строки.
+    """
+
+    EXTENSION = 'parquet'
+
+    def __init__(self, df: pd.DataFrame, column_mapping: dict):
+        if pa is None:
+            raise ImportError("Для формата parquet установите пакет pyarrow")
+        super().__init__(df, column_mapping)
+
+    @staticmethod
+    def _schema(fields: List[str]) -> 'pa.Schema':
+        return pa.schema([
+            (field, pa.float64() if 'price' in field else pa.string())
+            for field in fields
+        ])
+
+    @staticmethod
+    def _text(value) -> Optional[str]:
+        """Строковое значение поля; целые числа - без дробной части (код 100001.0 -> "100001")"""
+        if value is None:
+            return None
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    def _batch(self, rows: List[list], schema: 'pa.Schema') -> 'pa.RecordBatch':
+        columns = []
+        for c_idx, field in enumerate(schema):
+            values = [row[c_idx] for row in rows]
+            if field.type == pa.float64():
+                columns.append(pa.array([parse_price_or_none(v) for v in values], type=field.type))
+            else:
+                columns.append(pa.array([self._text(v) for v in values], type=field.type))
+        return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+    def _write(self, output_path: Union[str, BinaryIO]):
+        schema = self._schema(self._output_fields())
+        with pq.ParquetWriter(output_path, schema) as writer:
+            # Часть строк - группа строк файла
+            for rows in self._record_chunks():
+                writer.write_batch(self._batch(rows, schema))
+
+
+# Формат результата -> экспортёр
+DATA_EXPORTERS = {
+    exporter.EXTENSION: exporter
+    for exporter in (CsvExporter, JsonLinesExporter, ParquetExporter)
+}
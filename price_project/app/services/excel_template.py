@@ -0,0 +1,316 @@
+"""
+Шаблоны оформления Excel
+Шаблон - книга .xlsx с оформленным прайс-листом: шапка документа над
+заголовком таблицы, заголовок таблицы, строки-образцы (товар, раздел,
+распродажа) и параметры страницы. Книга читается один раз, из неё
+остаются только стили и статическая часть; для каждой задачи заполняется
+область данных. При изменении файла шаблон перечитывается.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from copy import copy
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from openpyxl import load_workbook
+
+from app.core.config import (
+    DEFAULT_TEMPLATE, EXCEL_TEMPLATE, TEMPLATE_CHECK_SECONDS, TEMPLATES_EXCEL_DIR
+)
+from app.services.column_detector import ColumnDetector, normalize_row
+from app.services.exporter import BaseExporter
+
+
+logger = logging.getLogger(__name__)
+
+# Стиль ячейки шаблона
+TemplateStyle = namedtuple('TemplateStyle', 'font fill border alignment number_format')
+
+# Ячейка статической части шаблона (шапка документа, заголовок таблицы)
+TemplateCell = namedtuple('TemplateCell', 'value style')
+
+# Виды строк данных: товар, заголовок раздела, распродажа
+ROW_KINDS = ('item', 'category', 'sale')
+
+# Имя шаблона: имя файла в TEMPLATES_EXCEL_DIR без .xlsx
+_TEMPLATE_NAME_RE = re.compile(r'^[\w.-]+$')
+
+# Имя шаблона DEFAULT_TEMPLATE
+DEFAULT_TEMPLATE_NAME = 'default'
+
+# Ячейка шапки с датой документа - заменяется датой формирования
+_DATE_CELL_RE = re.compile(r'^\s*дата\s*:', re.IGNORECASE)
+
+
+def _cell_style(cell) -> TemplateStyle:
+    return TemplateStyle(
+        font=copy(cell.font),
+        fill=copy(cell.fill),
+        border=copy(cell.border),
+        alignment=copy(cell.alignment),
+        number_format=cell.number_format,
+    )
+
+
+class ExcelTemplate:
+    """
+    Оформление из книги-шаблона.
+    Заголовок таблицы ищется как в прайс-листах (ColumnDetector), стили
+    колонок данных берутся из первых строк-образцов каждого вида.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Файл шаблона .xlsx (оформление - на активном листе)
+
+        Raises:
+            ValueError: в шаблоне нет строки заголовков таблицы
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self.digest = hashlib.sha256(f.read()).hexdigest()
+
+        wb = load_workbook(self.path)
+        try:
+            self._extract(wb.active)
+        finally:
+            wb.close()
+
+    def _extract(self, ws):
+        detector = ColumnDetector()
+        scan_rows = min(ws.max_row, detector.SCAN_ROWS)
+        head = [normalize_row(row) for row in ws.iter_rows(max_row=scan_rows, values_only=True)]
+        header_idx = detector.find_header_row(head)
+        if header_idx is None:
+            raise ValueError(f"{self.path.name}: в шаблоне не найдена строка заголовков таблицы")
+        # Номер строки заголовка таблицы (1-based): над ней - шапка документа
+        self.header_row = header_idx + 1
+        columns = detector.score_columns(head[header_idx], [])
+        # Колонка шаблона, чьё оформление получают колонки, которых в шаблоне нет
+        self._fallback_type = min(columns, key=columns.get)
+        max_col = ws.max_column
+
+        # Шапка документа: значения и стили ячеек, высоты строк, объединения
+        self.head = []
+        for row in ws.iter_rows(max_row=self.header_row - 1, max_col=max_col):
+            cells = [
+                TemplateCell(cell.value, _cell_style(cell)) if cell.value is not None or cell.has_style
+                else None
+                for cell in row
+            ]
+            while cells and cells[-1] is None:
+                cells.pop()
+            self.head.append(cells)
+        self.row_heights = {
+            row: ws.row_dimensions[row].height
+            for row in range(1, self.header_row + 1)
+            if ws.row_dimensions[row].height is not None
+        }
+        self.merged = [
+            merged.coord for merged in ws.merged_cells.ranges
+            if merged.max_row < self.header_row
+        ]
+
+        # Заголовок таблицы и ширины - по типам колонок
+        header_cells = ws[self.header_row]
+        self.header = {
+            col_type: TemplateCell(header_cells[col].value, _cell_style(header_cells[col]))
+            for col_type, col in columns.items()
+        }
+        self.widths = {}
+        for col_type, col in columns.items():
+            width = ws.column_dimensions[header_cells[col].column_letter].width
+            if width:
+                self.widths[col_type] = width
+
+        self.styles = self._data_styles(ws, columns)
+
+        # Параметры страницы и печати
+        self.page_setup = copy(ws.page_setup)
+        self.page_margins = copy(ws.page_margins)
+        self.print_options = copy(ws.print_options)
+        self.header_footer = copy(ws.HeaderFooter)
+        self.fit_to_page = ws.sheet_properties.pageSetUpPr.fitToPage if ws.sheet_properties.pageSetUpPr else None
+        self.print_title_rows = ws.print_title_rows
+        self.freeze_panes = ws.freeze_panes
+        self.auto_filter = bool(ws.auto_filter.ref)
+
+    def _data_styles(self, ws, columns: Dict[str, int]) -> Dict[Tuple[str, str], TemplateStyle]:
+        """
+        Стили ячеек данных {(вид строки, тип колонки): стиль} по первой
+        строке-образцу каждого вида. Вида нет в шаблоне - стили строки товара.
+        """
+        samples = {}
+        for row in ws.iter_rows(min_row=self.header_row + 1):
+            values = {col_type: row[col].value for col_type, col in columns.items() if col < len(row)}
+            if all(value is None for value in values.values()):
+                continue
+            status = values.get('status')
+            if isinstance(status, str) and status.strip() == "РАСПРОДАЖА":
+                kind = 'sale'
+            elif BaseExporter._is_category_header(
+                [values.get('code'), status, values.get('name')]
+            ):
+                kind = 'category'
+            else:
+                kind = 'item'
+            samples.setdefault(kind, row)
+            if len(samples) == len(ROW_KINDS):
+                break
+
+        if 'item' not in samples:
+            raise ValueError(f"{self.path.name}: в шаблоне нет строки-образца товара")
+        styles = {}
+        for kind in ROW_KINDS:
+            row = samples.get(kind, samples['item'])
+            for col_type, col in columns.items():
+                if col < len(row):
+                    styles[kind, col_type] = _cell_style(row[col])
+        return styles
+
+    def header_cell(self, col_type: str) -> TemplateCell:
+        """Ячейка заголовка колонки; колонки нет в шаблоне - стиль первой колонки шаблона"""
+        cell = self.header.get(col_type)
+        if cell is None:
+            cell = TemplateCell(BaseExporter.COLUMN_NAMES.get(col_type, col_type),
+                                self.header[self._fallback_type].style)
+        return cell
+
+    def data_style(self, kind: str, col_type: str) -> TemplateStyle:
+        """Стиль ячейки данных; колонки нет в шаблоне - стиль первой колонки шаблона"""
+        style = self.styles.get((kind, col_type))
+        if style is None:
+            style = self.styles[kind, self._fallback_type]
+        return style
+
+    def head_rows(self, date_str: str) -> List[List[Optional[TemplateCell]]]:
+        """Строки шапки документа; ячейка «дата: ...» получает дату формирования"""
+        return [
+            [
+                cell._replace(value=date_str)
+                if cell is not None and isinstance(cell.value, str) and _DATE_CELL_RE.match(cell.value)
+                else cell
+                for cell in row
+            ]
+            for row in self.head
+        ]
+
+    def apply_page_layout(self, ws):
+        """Параметры страницы, колонтитулы и область печати шаблона"""
+        ws.page_setup = copy(self.page_setup)
+        ws.page_margins = copy(self.page_margins)
+        ws.print_options = copy(self.print_options)
+        ws.HeaderFooter = copy(self.header_footer)
+        if self.fit_to_page is not None:
+            ws.sheet_properties.pageSetUpPr.fitToPage = self.fit_to_page
+        if self.print_title_rows:
+            ws.print_title_rows = self.print_title_rows
+        if self.freeze_panes:
+            ws.freeze_panes = self.freeze_panes
+
+
+class TemplateStore:
+    """
+    Шаблоны по имени. Книга читается один раз на процесс и перечитывается,
+    если файл изменился (время изменения или размер). Файл загруженного
+    шаблона проверяется не чаще раза в check_seconds.
+    """
+
+    def __init__(self, templates_dir: Path = TEMPLATES_EXCEL_DIR,
+                 default_template: Path = DEFAULT_TEMPLATE,
+                 check_seconds: float = TEMPLATE_CHECK_SECONDS):
+        self.templates_dir = Path(templates_dir)
+        self.default_template = Path(default_template)
+        self.check_seconds = check_seconds
+        # Имя -> (время изменения и размер файла, шаблон, когда файл проверялся)
+        self._templates: Dict[str, Tuple[Tuple[int, int], ExcelTemplate, float]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> Path:
+        """
+        Файл шаблона по имени: "default" - DEFAULT_TEMPLATE,
+        иначе TEMPLATES_EXCEL_DIR/{name}.xlsx
+
+        Raises:
+            ValueError: недопустимое имя или нет файла шаблона
+        """
+        if name == DEFAULT_TEMPLATE_NAME:
+            path = self.default_template
+        elif _TEMPLATE_NAME_RE.match(name) and not name.startswith('.'):
+            path = self.templates_dir / f"{name}.xlsx"
+        else:
+            raise ValueError(f"Недопустимое имя шаблона оформления: {name}")
+        if not path.is_file():
+            raise ValueError(f"Шаблон оформления не найден: {name}")
+        return path
+
+    def get(self, name: str) -> ExcelTemplate:
+        """
+        Шаблон по имени (из памяти, если файл не менялся).
+
+        Raises:
+            ValueError: нет шаблона или он не подходит для прайс-листа
+        """
+        cached = self._templates.get(name)
+        if cached is not None and time.monotonic() - cached[2] < self.check_seconds:
+            return cached[1]
+        path = self.path(name)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._templates.get(name)
+            if cached is not None and cached[0] == stamp:
+                template = cached[1]
+            else:
+                template = ExcelTemplate(path)
+                logger.info("Шаблон оформления %s загружен из %s", name, path)
+            self._templates[name] = (stamp, template, time.monotonic())
+            return template
+
+
+# Общее хранилище шаблонов процесса
+template_store = TemplateStore()
+
+
+def check_template(template: str, output_format: str = 'xlsx') -> Optional[ExcelTemplate]:
+    """
+    Проверка шаблона оформления (пусто - без шаблона).
+    Шаблон по умолчанию (EXCEL_TEMPLATE) к форматам данных не применяется.
+
+    Returns:
+        Шаблон для экспорта xlsx или None
+
+    Raises:
+        ValueError: шаблон не для xlsx, не найден или не подходит
+    """
+    if not template:
+        return None
+    if output_format != 'xlsx':
+        if template == EXCEL_TEMPLATE:
+            return None
+        raise ValueError("Шаблон оформления доступен только для формата xlsx")
+    return template_store.get(template)
+
+
+def preload_templates():
+    """
+    Чтение шаблонов при запуске процесса (и каждого процесса пула обработки):
+    EXCEL_TEMPLATE - обязательно (ошибка в нём - сразу), корпоративный
+    DEFAULT_TEMPLATE - если доступен.
+
+    Raises:
+        ValueError: шаблон EXCEL_TEMPLATE не найден или не подходит
+    """
+    if EXCEL_TEMPLATE:
+        template_store.get(EXCEL_TEMPLATE)
+    if EXCEL_TEMPLATE != DEFAULT_TEMPLATE_NAME:
+        try:
+            template_store.get(DEFAULT_TEMPLATE_NAME)
+        except (OSError, ValueError) as e:
+            logger.warning("Шаблон оформления %s не загружен: %s", DEFAULT_TEMPLATE_NAME, e)
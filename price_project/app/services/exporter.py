@@ -3,51 +3,79 @@
 Оформление Excel-файла в корпоративном стиле
 """
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import (
     Font, PatternFill, Border, Side, Alignment
 )
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.header_footer import HeaderFooter
 import pandas as pd
+import abc
+from copy import copy
 from datetime import datetime
-from typing import Optional
+import time
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+from uuid import uuid4
 import numpy as np
+import re
 
+from app.core.config import EXPORTER_BACKEND
 
-class ExcelExporter:
-    """Экспорт данных в Excel с корпоративным стилем"""
 
-    # Стили оформления
-    HEADER_FONT = Font(name='Arial', size=12, bold=True, color='FFFFFF')
-    HEADER_FILL = PatternFill(start_color='444444', end_color='444444', fill_type='solid')
-    DATA_FONT = Font(name='Arial', size=10)
-    PRICE_FONT = Font(name='Arial', size=10)
-    PRICE_FORMAT = '# ##0'
-    SALE_FILL = PatternFill(start_color='FFCCCC', end_color='FFCCCC', fill_type='solid')
-    SALE_STATUS_FONT = Font(name='Arial', size=10, bold=True, color='FF0000')
+EXPORTER_BACKENDS = ('openpyxl', 'xlsxwriter')
 
-    # Стили для заголовков разделов (категорий товаров)
-    CATEGORY_FONT = Font(name='Arial', size=11, bold=True)
-    CATEGORY_FILL = PatternFill(start_color='D6EAF8', end_color='D6EAF8', fill_type='solid')  # Бледно-голубой
+# Форматы результата (расширение файла) и их MIME-типы
+OUTPUT_FORMATS = {
+    'xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    # charset для text/* добавляет Starlette
+    'csv': "text/csv",
+    'jsonl': "application/x-ndjson",
+    'parquet': "application/vnd.apache.parquet",
+}
 
-    # Стили для шапки документа
-    DOC_HEADER_FONT = Font(name='Arial', size=14, bold=True)
-    DOC_HEADER_FONT_SMALL = Font(name='Arial', size=10)
 
-    THIN_BORDER = Border(
-        left=Side(style='thin', color='000000'),
-        right=Side(style='thin', color='000000'),
-        top=Side(style='thin', color='000000'),
-        bottom=Side(style='thin', color='000000'),
-    )
-    
+class BaseExporter(abc.ABC):
+    """
+    Общая часть экспортёров: выходные колонки, признаки строк, шапка документа.
+    Наследник реализует export(output_path) и заполняет save_seconds.
+    """
+
+    # Тексты шапки документа
+    DOC_TITLE = 'Прайс-лист ООО "АЛЬТ-Икс"'
+    DOC_RESPONSIBLE = 'Ответственный: Сидорова О.О.'
+
+    # Строк в шапке документа (заголовок таблицы - следующая строка)
+    DOC_HEADER_ROWS = 6
+
+    # Название листа результата
+    SHEET_TITLE = "Прайс-лист"
+
+    # Расширение файла результата
+    EXTENSION = 'xlsx'
+
+    # Ширина колонки: длина самого длинного значения + 2, не больше 50
+    MAX_COLUMN_WIDTH = 50
+
+    # Порядок колонок для вывода и их заголовки
+    COLUMN_ORDER = ['code', 'status', 'name', 'special_price', 'retail_price']
+    COLUMN_NAMES = {
+        'code': 'Код товара',
+        'status': 'Статус',
+        'name': 'Номенклатура',
+        'special_price': 'Спец. цена',
+        'retail_price': 'Розничная цена'
+    }
+
     def __init__(self, df: pd.DataFrame, column_mapping: dict):
+        """
+        Args:
+            df: DataFrame с данными
+            column_mapping: Словарь {тип_колонки: индекс}
+        """
         self.df = df.reset_index(drop=True)
         self.column_mapping = column_mapping
-        self.wb = Workbook()
-        self.ws = self.wb.active
-        self.ws.title = "Прайс-лист"
-        
+        self.save_seconds = None
+
     def _clean_value(self, value):
         """Очистка значения для записи в Excel"""
         if value is None or pd.isna(value):
@@ -60,35 +88,6 @@ class ExcelExporter:
             return str(value)
         return value
         
-    def _apply_header_style(self, row: int, num_cols: int):
-        for col in range(1, num_cols + 1):
-            cell = self.ws.cell(row=row, column=col)
-            cell.font = self.HEADER_FONT
-            cell.fill = self.HEADER_FILL
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = self.THIN_BORDER
-            
-    def _apply_data_styles(self, start_row: int, num_cols: int, price_cols: list):
-        for row_idx in range(start_row, self.ws.max_row + 1):
-            for col_idx in range(1, num_cols + 1):
-                cell = self.ws.cell(row=row_idx, column=col_idx)
-                cell.border = self.THIN_BORDER
-                cell.font = self.DATA_FONT
-                
-                # Формат для цен
-                if col_idx in price_cols:
-                    cell.number_format = self.PRICE_FORMAT
-                    cell.alignment = Alignment(horizontal='right', vertical='center')
-    
-    def _highlight_sale_rows(self, start_row: int, status_col_idx: int, num_cols: int):
-        for row_idx in range(start_row, self.ws.max_row + 1):
-            status_cell = self.ws.cell(row=row_idx, column=status_col_idx)
-            if status_cell.value == "РАСПРОДАЖА":
-                for col in range(1, num_cols + 1):
-                    cell = self.ws.cell(row=row_idx, column=col)
-                    cell.fill = self.SALE_FILL
-                status_cell.font = self.SALE_STATUS_FONT
-    
     def _is_table_header(self, row_data: list) -> bool:
         """Проверка, является ли строка заголовком таблицы (не нужна в выводе)"""
         text = ' '.join(str(v) for v in row_data if v).lower()
@@ -96,7 +95,8 @@ class ExcelExporter:
         matches = sum(1 for word in header_words if word in text)
         return matches >= 2
 
-    def _is_category_header(self, row_data: list) -> bool:
+    @staticmethod
+    def _is_category_header(row_data: list) -> bool:
         """
         Проверка, является ли строка заголовком раздела.
         Заголовок раздела - строка где:
@@ -130,58 +130,130 @@ class ExcelExporter:
         
         return False
 
-    def _apply_category_style(self, row: int, num_cols: int):
-        """Применение стиля заголовка раздела"""
-        for col in range(1, num_cols + 1):
-            cell = self.ws.cell(row=row, column=col)
-            cell.font = self.CATEGORY_FONT
-            cell.fill = self.CATEGORY_FILL
-            cell.alignment = Alignment(horizontal='left', vertical='center')
-            cell.border = self.THIN_BORDER
-
-    def _add_document_header(self):
-        """Добавление шапки документа (6 строк по ТЗ №2)"""
-        from datetime import datetime
-        
-        # Форматируем текущую дату на русском языке
+    def _document_date(self) -> str:
+        """Текущая дата для шапки документа на русском языке"""
         months = {
             1: 'января', 2: 'февраля', 3: 'марта', 4: 'апреля',
             5: 'мая', 6: 'июня', 7: 'июля', 8: 'августа',
             9: 'сентября', 10: 'октября', 11: 'ноября', 12: 'декабря'
         }
         now = datetime.now()
-        date_str = f"дата: {now.day} {months[now.month]} {now.year} г."
-        
-        # Вставляем 6 строк в начало (по ТЗ: строки 1-6)
-        self.ws.insert_rows(1, amount=6)
-        
-        # Объединяем ячейки для заголовка
-        last_col = self.ws.max_column
-        last_col_letter = get_column_letter(last_col)
-        
-        # Строка 1: Прайс-лист ООО "АЛЬТ-Икс"
-        self.ws.merge_cells(f'A1:{last_col_letter}1')
-        cell = self.ws.cell(row=1, column=1)
-        cell.value = 'Прайс-лист ООО "АЛЬТ-Икс"'
-        cell.font = self.DOC_HEADER_FONT
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Строка 2: пустая
-        self.ws.row_dimensions[2].height = 15
-        
-        # Строка 3: дата
-        self.ws.cell(row=3, column=1, value=date_str)
-        self.ws.cell(row=3, column=1).font = self.DOC_HEADER_FONT_SMALL
-        
-        # Строка 4: пустая
-        self.ws.row_dimensions[4].height = 15
-        
-        # Строка 5: ответственный
-        self.ws.cell(row=5, column=1, value='Ответственный: Сидорова О.О.')
-        self.ws.cell(row=5, column=1).font = self.DOC_HEADER_FONT_SMALL
-        
-        # Строка 6: будет заголовок таблицы (сдвигается)
+        return f"дата: {now.day} {months[now.month]} {now.year} г."
+
+    def _build_output(self) -> Tuple[List[str], List[int], List[list]]:
+        """
+        Формирование выходных колонок.
+        Возвращает (заголовки, номера колонок с ценами (1-based), значения по колонкам).
+        """
+        output_data = []
+        headers = []
+        price_cols = []  # Индексы колонок с ценами (1-based)
+        fields = self._output_fields()
+
+        for idx, col_type in enumerate(self.COLUMN_ORDER, 1):
+            if col_type in fields:
+                col_idx = self.column_mapping[col_type]
+                headers.append(self.COLUMN_NAMES.get(col_type, col_type))
+                col_data = []
+                for val in self.df.iloc[:, col_idx]:
+                    col_data.append(self._clean_value(val))
+                output_data.append(col_data)
+                if 'price' in col_type:
+                    price_cols.append(idx)
 
+        return headers, price_cols, output_data
+
+    def _output_fields(self) -> List[str]:
+        """Типы выводимых колонок (есть в сопоставлении и в данных)"""
+        return [
+            col_type for col_type in self.COLUMN_ORDER
+            if col_type in self.column_mapping
+            and self.column_mapping[col_type] < len(self.df.columns)
+        ]
+
+    def _iter_output_rows(self, output_data: List[list]) -> Iterator[list]:
+        """Строки для вывода (строки-заголовки таблиц пропускаются)"""
+        num_cols = len(output_data)
+        num_rows = len(output_data[0]) if output_data else 0
+
+        for r_idx in range(num_rows):
+            row_values = [output_data[c_idx][r_idx] if r_idx < len(output_data[c_idx]) else None for c_idx in range(num_cols)]
+
+            # Пропускаем строки, которые выглядят как заголовки таблицы
+            if self._is_table_header(row_values):
+                continue
+
+            yield row_values
+
+    def _default_output_path(self) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"Прайс_Стандарт_{timestamp}.{self.EXTENSION}"
+
+    @abc.abstractmethod
+    def export(self, output_path: Optional[Union[str, BinaryIO]] = None) -> Union[str, BinaryIO]:
+        """Запись результата в файл (путь или файловый объект)"""
+
+
+class ExcelExporter(BaseExporter):
+    """Экспорт данных в Excel с корпоративным стилем (openpyxl)"""
+
+    # Стили оформления
+    HEADER_FONT = Font(name='Arial', size=12, bold=True, color='FFFFFF')
+    HEADER_FILL = PatternFill(start_color='444444', end_color='444444', fill_type='solid')
+    DATA_FONT = Font(name='Arial', size=10)
+    PRICE_FONT = Font(name='Arial', size=10)
+    PRICE_FORMAT = '# ##0'
+    SALE_FILL = PatternFill(start_color='FFCCCC', end_color='FFCCCC', fill_type='solid')
+    SALE_STATUS_FONT = Font(name='Arial', size=10, bold=True, color='FF0000')
+
+    # Стили для заголовков разделов (категорий товаров)
+    CATEGORY_FONT = Font(name='Arial', size=11, bold=True)
+    CATEGORY_FILL = PatternFill(start_color='D6EAF8', end_color='D6EAF8', fill_type='solid')  # Бледно-голубой
+
+    # Стили для шапки документа
+    DOC_HEADER_FONT = Font(name='Arial', size=14, bold=True)
+    DOC_HEADER_FONT_SMALL = Font(name='Arial', size=10)
+
+    # Выравнивания
+    CENTER_ALIGNMENT = Alignment(horizontal='center', vertical='center')
+    PRICE_ALIGNMENT = Alignment(horizontal='right', vertical='center')
+    CATEGORY_ALIGNMENT = Alignment(horizontal='left', vertical='center')
+
+    THIN_BORDER = Border(
+        left=Side(style='thin', color='000000'),
+        right=Side(style='thin', color='000000'),
+        top=Side(style='thin', color='000000'),
+        bottom=Side(style='thin', color='000000'),
+    )
+    
+    def __init__(self, df: pd.DataFrame, column_mapping: dict, streaming: bool = False,
+                 sheet_title: str = BaseExporter.SHEET_TITLE, workbook: Optional[Workbook] = None,
+                 template=None):
+        """
+        Args:
+            df: DataFrame с данными
+            column_mapping: Словарь {тип_колонки: индекс}
+            streaming: Потоковая запись (write-only лист): строки пишутся
+                сразу в файл в один проход, без модели листа в памяти
+            sheet_title: Название листа
+            workbook: Книга, в которую добавить лист (None - новая книга)
+            template: Шаблон оформления (ExcelTemplate); None - встроенное оформление
+        """
+        super().__init__(df, column_mapping)
+        self.streaming = streaming
+        self.template = template
+        self._style_cache = {}
+        if workbook is not None:
+            self.wb = workbook
+            self.ws = self.wb.create_sheet(sheet_title)
+        elif streaming:
+            self.wb = Workbook(write_only=True)
+            self.ws = self.wb.create_sheet(sheet_title)
+        else:
+            self.wb = Workbook()
+            self.ws = self.wb.active
+            self.ws.title = sheet_title
+        
     def _setup_page_layout(self):
         """Настройка параметров страницы и колонтитулов (по ТЗ №2)"""
         # Параметры страницы
@@ -209,124 +281,367 @@ class ExcelExporter:
         self.ws.oddFooter.right.text = 'Страница &P из &N'
         self.ws.oddFooter.right.size = 9
 
-    def _auto_adjust_column_widths(self, num_cols: int):
-        for col_idx in range(1, num_cols + 1):
-            max_length = 0
-            column_letter = get_column_letter(col_idx)
-            
-            for row_idx in range(1, self.ws.max_row + 1):
-                cell_value = self.ws.cell(row=row_idx, column=col_idx).value
-                if cell_value:
-                    max_length = max(max_length, len(str(cell_value)))
-            
-            adjusted_width = min(max_length + 2, 50)
-            self.ws.column_dimensions[column_letter].width = adjusted_width
-    
-    def export(self, output_path: Optional[str] = None) -> str:
-        # Порядок колонок для вывода
-        column_order = ['code', 'status', 'name', 'special_price', 'retail_price']
-        column_names = {
-            'code': 'Код товара',
-            'status': 'Статус',
-            'name': 'Номенклатура',
-            'special_price': 'Спец. цена',
-            'retail_price': 'Розничная цена'
-        }
+    @staticmethod
+    def _track_lengths(max_lengths: List[int], row_values: list):
+        """Учёт длины значений строки в максимальных длинах по колонкам"""
+        for c_idx, value in enumerate(row_values[:len(max_lengths)]):
+            if value:
+                max_lengths[c_idx] = max(max_lengths[c_idx], len(str(value)))
 
-        # Формируем выходные данные
-        output_data = []
-        headers = []
-        price_cols = []  # Индексы колонок с ценами (1-based)
+    def _set_column_widths(self, max_lengths: List[int]):
+        """Ширина колонки: длина самого длинного значения + 2, не больше MAX_COLUMN_WIDTH"""
+        for c_idx, max_length in enumerate(max_lengths, 1):
+            self.ws.column_dimensions[get_column_letter(c_idx)].width = min(max_length + 2, self.MAX_COLUMN_WIDTH)
 
-        for idx, col_type in enumerate(column_order, 1):
-            if col_type in self.column_mapping:
-                col_idx = self.column_mapping[col_type]
-                if col_idx < len(self.df.columns):
-                    headers.append(column_names.get(col_type, col_type))
-                    col_data = []
-                    for val in self.df.iloc[:, col_idx]:
-                        col_data.append(self._clean_value(val))
-                    output_data.append(col_data)
-                    if 'price' in col_type:
-                        price_cols.append(idx)
+    def _styled_cell(self, value, font=None, fill=None, alignment=None,
+                     border=None, number_format=None) -> WriteOnlyCell:
+        """Ячейка для записи строкой (ws.append) с заданным стилем"""
+        cell = WriteOnlyCell(self.ws, value=value)
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if alignment is not None:
+            cell.alignment = alignment
+        if border is not None:
+            cell.border = border
+        if number_format is not None:
+            cell.number_format = number_format
+        return cell
 
-        num_cols = len(output_data)
-        num_rows = len(output_data[0]) if output_data else 0
+    def _data_cell(self, value, is_category: bool, is_sale: bool,
+                   is_price: bool, is_status: bool) -> WriteOnlyCell:
+        """
+        Ячейка данных.
+        Стиль для каждого сочетания признаков собирается один раз и копируется.
+        """
+        key = (is_category, is_sale, is_price, is_status)
+        style = self._style_cache.get(key)
+        if style is None:
+            if is_category:
+                font, fill, alignment = self.CATEGORY_FONT, self.CATEGORY_FILL, self.CATEGORY_ALIGNMENT
+            else:
+                font, fill = self.DATA_FONT, None
+                alignment = self.PRICE_ALIGNMENT if is_price else None
+            if is_sale:
+                fill = self.SALE_FILL
+                if is_status:
+                    font = self.SALE_STATUS_FONT
+            style = self._styled_cell(
+                None, font=font, fill=fill, alignment=alignment, border=self.THIN_BORDER,
+                number_format=self.PRICE_FORMAT if is_price else None
+            )._style
+            self._style_cache[key] = style
 
-        # Запись заголовков
-        for c_idx, header in enumerate(headers, 1):
-            self.ws.cell(row=1, column=c_idx, value=header)
+        cell = WriteOnlyCell(self.ws, value=value)
+        cell._style = copy(style)
+        return cell
 
-        # Запись данных (пропускаем строки-заголовки таблиц)
-        actual_row = 2  # Реальный номер строки в Excel (после шапки будет сдвиг)
-        category_rows = []  # Номера строк с категориями
-        sale_check_rows = []  # Строки для проверки на распродажу
-        
-        for r_idx in range(num_rows):
-            row_values = [output_data[c_idx][r_idx] if r_idx < len(output_data[c_idx]) else None for c_idx in range(num_cols)]
-            
-            # Пропускаем строки, которые выглядят как заголовки таблицы
-            if self._is_table_header(row_values):
-                continue
-            
-            # Записываем данные
-            for c_idx in range(num_cols):
-                value = output_data[c_idx][r_idx] if r_idx < len(output_data[c_idx]) else None
-                self.ws.cell(row=actual_row, column=c_idx + 1, value=value)
-            
-            # Проверяем, является ли строка заголовком раздела
-            if self._is_category_header(row_values):
-                category_rows.append(actual_row)
-            
-            # Сохраняем для проверки на распродажу
-            sale_check_rows.append((actual_row, row_values))
-            
-            actual_row += 1
-        
-        # Реальное количество строк данных
-        data_rows = actual_row - 2
+    def _template_cell(self, value, style) -> WriteOnlyCell:
+        """Ячейка со стилем из шаблона оформления"""
+        return self._styled_cell(
+            value, font=style.font, fill=style.fill, alignment=style.alignment,
+            border=style.border, number_format=style.number_format
+        )
+
+    def _template_data_cell(self, value, kind: str, col_type: str) -> WriteOnlyCell:
+        """Ячейка данных по шаблону: стиль строки-образца вида kind (из кэша)"""
+        key = (kind, col_type)
+        style = self._style_cache.get(key)
+        if style is None:
+            style = self._template_cell(None, self.template.data_style(kind, col_type))._style
+            self._style_cache[key] = style
+
+        cell = WriteOnlyCell(self.ws, value=value)
+        cell._style = copy(style)
+        return cell
+
+    def _document_rows(self, date_str: str, header_cells: list) -> Iterator[list]:
+        """Строки 1-7: шапка документа (6 строк по ТЗ №2) и заголовок таблицы"""
+        # Строка 1: Прайс-лист ООО "АЛЬТ-Икс" (ячейки объединяются по ширине таблицы)
+        yield [self._styled_cell(
+            self.DOC_TITLE, font=self.DOC_HEADER_FONT, alignment=self.CENTER_ALIGNMENT
+        )]
+        # Строка 2: пустая
+        yield []
+        # Строка 3: дата
+        yield [self._styled_cell(date_str, font=self.DOC_HEADER_FONT_SMALL)]
+        # Строка 4: пустая
+        yield []
+        # Строка 5: ответственный
+        yield [self._styled_cell(self.DOC_RESPONSIBLE, font=self.DOC_HEADER_FONT_SMALL)]
+        # Строка 6: пустая
+        yield []
+        # Строка 7: заголовок таблицы
+        yield header_cells
+
+    def _save(self, output_path: Union[str, BinaryIO]):
+        """Сохранение книги (время сохранения - в save_seconds)"""
+        start = time.perf_counter()
+        self.wb.save(output_path)
+        self.wb.close()
+        self.save_seconds = time.perf_counter() - start
+
+    def export(self, output_path: Optional[Union[str, BinaryIO]] = None) -> Union[str, BinaryIO]:
+        # Имя файла
+        if output_path is None:
+            output_path = self._default_output_path()
+
+        self.write_sheet()
+        self._save(output_path)
 
-        # Стили
-        self._apply_header_style(1, num_cols)
-        self._apply_data_styles(2, num_cols, price_cols)
+        return output_path
 
-        # Выделение заголовков разделов (категорий)
-        for row_num in category_rows:
-            self._apply_category_style(row_num, num_cols)
+    def write_sheet(self):
+        """
+        Запись данных с оформлением на лист (книга не сохраняется).
+        Каждая строка пишется один раз, сразу со стилями: ячейки получают
+        общие стили из кэша, ширина колонок набирается по ходу записи.
+        """
+        if self.template is not None:
+            self._write_template_sheet()
+            return
 
-        # Выделение распродажи
+        headers, price_cols, output_data = self._build_output()
+        num_cols = len(headers)
         status_col_idx = 2 if 'status' in self.column_mapping else 1
-        for row_num, row_values in sale_check_rows:
-            status_val = row_values[1] if len(row_values) > 1 else None
-            if status_val == "РАСПРОДАЖА":
-                for col in range(1, num_cols + 1):
-                    cell = self.ws.cell(row=row_num, column=col)
-                    cell.fill = self.SALE_FILL
-                status_cell = self.ws.cell(row=row_num, column=status_col_idx)
-                status_cell.font = self.SALE_STATUS_FONT
-
-        # Добавление шапки документа
-        self._add_document_header()
-
-        # Автоподбор ширины
-        self._auto_adjust_column_widths(num_cols)
-
-        # Автофильтр (с учетом сдвига на 6 строк шапки, заголовок на строке 7)
+        date_str = self._document_date()
+
+        max_lengths = [0] * num_cols
+        for row_values in ([self.DOC_TITLE], [date_str], [self.DOC_RESPONSIBLE], headers):
+            self._track_lengths(max_lengths, row_values)
+        if self.streaming:
+            # Write-only лист: ширины колонок пишутся в начало листа, до строк
+            for row_values in self._iter_output_rows(output_data):
+                self._track_lengths(max_lengths, row_values)
+            self._set_column_widths(max_lengths)
+
+        self.ws.row_dimensions[2].height = 15
+        self.ws.row_dimensions[4].height = 15
+        header_cells = [
+            self._styled_cell(
+                header, font=self.HEADER_FONT, fill=self.HEADER_FILL,
+                alignment=self.CENTER_ALIGNMENT, border=self.THIN_BORDER
+            )
+            for header in headers
+        ]
+        for row in self._document_rows(date_str, header_cells):
+            self.ws.append(row)
+
+        # Данные (строки-заголовки таблиц пропускаются)
+        data_rows = 0
+        for row_values in self._iter_output_rows(output_data):
+            is_category = self._is_category_header(row_values)
+            is_sale = len(row_values) > 1 and row_values[1] == "РАСПРОДАЖА"
+
+            self.ws.append([
+                self._data_cell(
+                    value, is_category, is_sale,
+                    is_price=c_idx in price_cols, is_status=c_idx == status_col_idx
+                )
+                for c_idx, value in enumerate(row_values, 1)
+            ])
+            if not self.streaming:
+                self._track_lengths(max_lengths, row_values)
+            data_rows += 1
+
+        if not self.streaming:
+            self._set_column_widths(max_lengths)
+
+        # Заголовок документа - на всю ширину таблицы
+        title_range = f'A1:{get_column_letter(max(num_cols, 1))}1'
+        if self.streaming:
+            self.ws.merged_cells.add(title_range)
+        else:
+            self.ws.merge_cells(title_range)
+
+        # Автофильтр (заголовок на строке 7)
+        header_row = self.DOC_HEADER_ROWS + 1
         if num_cols > 0 and data_rows > 0:
             last_col = get_column_letter(num_cols)
-            self.ws.auto_filter.ref = f"A7:{last_col}{data_rows + 7}"
+            self.ws.auto_filter.ref = f"A{header_row}:{last_col}{data_rows + header_row}"
 
-        # Имя файла
+    def _write_template_sheet(self):
+        """
+        Запись листа по шаблону оформления: шапка документа, заголовок таблицы,
+        ширины колонок и параметры страницы - из шаблона, строки данных
+        получают стили строки-образца своего вида (товар, раздел, распродажа).
+        """
+        template = self.template
+        _, _, output_data = self._build_output()
+        fields = self._output_fields()
+
+        # Write-only лист: ширины, высоты строк и параметры листа - до строк
+        for c_idx, col_type in enumerate(fields, 1):
+            width = template.widths.get(col_type)
+            if width:
+                self.ws.column_dimensions[get_column_letter(c_idx)].width = width
+        for row_idx, height in template.row_heights.items():
+            self.ws.row_dimensions[row_idx].height = height
+        template.apply_page_layout(self.ws)
+
+        for row in template.head_rows(self._document_date()):
+            self.ws.append([
+                self._template_cell(cell.value, cell.style) if cell is not None else None
+                for cell in row
+            ])
+        self.ws.append([
+            self._template_cell(*template.header_cell(col_type)) for col_type in fields
+        ])
+
+        data_rows = 0
+        for row_values in self._iter_output_rows(output_data):
+            if len(row_values) > 1 and row_values[1] == "РАСПРОДАЖА":
+                kind = 'sale'
+            elif self._is_category_header(row_values):
+                kind = 'category'
+            else:
+                kind = 'item'
+            self.ws.append([
+                self._template_data_cell(value, kind, col_type)
+                for value, col_type in zip(row_values, fields)
+            ])
+            data_rows += 1
+
+        for merged in template.merged:
+            if self.streaming:
+                self.ws.merged_cells.add(merged)
+            else:
+                self.ws.merge_cells(merged)
+
+        if template.auto_filter and fields and data_rows > 0:
+            header_row = template.header_row
+            last_col = get_column_letter(len(fields))
+            self.ws.auto_filter.ref = f"A{header_row}:{last_col}{data_rows + header_row}"
+
+
+def check_output_format(output_format: str):
+    """
+    Проверка формата результата.
+
+    Raises:
+        ValueError: неизвестный формат или не установлена его зависимость
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Неизвестный формат результата: {output_format} "
+            f"(допустимо: {', '.join(OUTPUT_FORMATS)})"
+        )
+    if output_format == 'parquet':
+        from app.services.data_exporter import pa
+        if pa is None:
+            raise ValueError("Для формата parquet установите пакет pyarrow")
+
+
+def create_exporter(df: pd.DataFrame, column_mapping: dict, output_format: str = 'xlsx',
+                    streaming: bool = False, backend: str = EXPORTER_BACKEND,
+                    template=None) -> BaseExporter:
+    """
+    Экспортёр для формата результата и движка записи Excel.
+    CSV/JSON Lines/Parquet и xlsxwriter всегда пишут построчно,
+    флаг streaming нужен только openpyxl. С шаблоном оформления
+    (ExcelTemplate) книгу всегда пишет openpyxl - стили шаблона в его модели.
+    """
+    if output_format != 'xlsx':
+        check_output_format(output_format)
+        from app.services.data_exporter import DATA_EXPORTERS
+        return DATA_EXPORTERS[output_format](df, column_mapping)
+    if template is not None:
+        return ExcelExporter(df, column_mapping, streaming=streaming, template=template)
+    exporter_class = _excel_exporter_class(backend)
+    if exporter_class is ExcelExporter:
+        return ExcelExporter(df, column_mapping, streaming=streaming)
+    return exporter_class(df, column_mapping)
+
+
+def _excel_exporter_class(backend: str) -> type:
+    """Класс экспортёра Excel для движка записи"""
+    if backend == 'openpyxl':
+        return ExcelExporter
+    if backend == 'xlsxwriter':
+        try:
+            from app.services.xlsxwriter_exporter import XlsxWriterExporter
+        except ImportError as e:
+            raise ImportError(
+                "Для EXPORTER_BACKEND=xlsxwriter установите пакет xlsxwriter"
+            ) from e
+        return XlsxWriterExporter
+    raise ValueError(
+        f"Неизвестный движок записи Excel: {backend} (допустимо: {', '.join(EXPORTER_BACKENDS)})"
+    )
+
+
+# Символы, недопустимые в названии листа Excel, и его максимальная длина
+_SHEET_TITLE_RE = re.compile(r'[\\/*?:\[\]]')
+_SHEET_TITLE_MAX_LENGTH = 31
+
+
+def _sheet_titles(names: List[str]) -> List[str]:
+    """Допустимые и неповторяющиеся названия листов Excel"""
+    titles = []
+    used = set()
+    for number, name in enumerate(names, 1):
+        base = _SHEET_TITLE_RE.sub('_', str(name)).strip("' ")[:_SHEET_TITLE_MAX_LENGTH] or f"Лист{number}"
+        title = base
+        suffix = 1
+        while title.lower() in used:
+            suffix += 1
+            tail = f" ({suffix})"
+            title = base[:_SHEET_TITLE_MAX_LENGTH - len(tail)] + tail
+        used.add(title.lower())
+        titles.append(title)
+    return titles
+
+
+class SheetsExporter:
+    """
+    Книга Excel с листом результата на каждый лист исходной книги.
+    Листы пишут экспортёры выбранного движка в одну общую книгу.
+    """
+
+    def __init__(self, sheets: List[Tuple[str, pd.DataFrame, dict]], streaming: bool = False,
+                 backend: str = EXPORTER_BACKEND, template=None):
+        """
+        Args:
+            sheets: [(название листа, DataFrame, {тип_колонки: индекс})]
+            streaming: Потоковая запись (для openpyxl)
+            backend: Движок записи Excel: openpyxl или xlsxwriter
+            template: Шаблон оформления (ExcelTemplate) для всех листов;
+                с шаблоном книгу пишет openpyxl
+        """
+        self.exporter_class = ExcelExporter if template is not None else _excel_exporter_class(backend)
+        self.template = template
+        self.titles = _sheet_titles([name for name, _, _ in sheets])
+        self.sheets = sheets
+        self.streaming = streaming
+        self.save_seconds = None
+
+    def export(self, output_path: Optional[Union[str, BinaryIO]] = None) -> Union[str, BinaryIO]:
         if output_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = f"Прайс_Стандарт_{timestamp}.xlsx"
+            output_path = generate_output_filename()
 
-        self.wb.save(output_path)
-        self.wb.close()
+        if self.exporter_class is not ExcelExporter:
+            wb = self.exporter_class.new_workbook(output_path)
+            for title, (_, df, column_mapping) in zip(self.titles, self.sheets):
+                self.exporter_class(df, column_mapping, sheet_title=title).write_sheet(wb)
+            start = time.perf_counter()
+            wb.close()
+            self.save_seconds = time.perf_counter() - start
+            return output_path
 
+        first = None
+        for title, (_, df, column_mapping) in zip(self.titles, self.sheets):
+            exporter = ExcelExporter(df, column_mapping, streaming=self.streaming, sheet_title=title,
+                                     workbook=first.wb if first is not None else None,
+                                     template=self.template)
+            exporter.write_sheet()
+            first = first or exporter
+        first._save(output_path)
+        self.save_seconds = first.save_seconds
         return output_path
 
 
-def generate_output_filename() -> str:
+def generate_output_filename(output_format: str = 'xlsx') -> str:
+    # Суффикс, чтобы параллельные задачи в одну секунду не перезаписали друг друга
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return f"Прайс_Стандарт_{timestamp}.xlsx"
+    return f"Прайс_Стандарт_{timestamp}_{uuid4().hex[:6]}.{output_format}"
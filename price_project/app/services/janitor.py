@@ -0,0 +1,112 @@
+"""
+Очистка каталога результатов
+Удаляет файлы, которые не использовались FILE_RETENTION_HOURS (не создавались,
+не скачивались и не выдавались из кэша), и, если каталог больше квоты,
+файлы, которые дольше всех не использовались.
+"""
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict
+
+from app.core.config import (
+    OUTPUT_DIR, FILE_RETENTION_HOURS, OUTPUT_MAX_BYTES, JANITOR_INTERVAL_SECONDS
+)
+from app.core.metrics import OUTPUT_BYTES_RECLAIMED
+
+
+logger = logging.getLogger(__name__)
+
+
+def mark_used(file_path: Path):
+    """
+    Отметка использования результата (скачивание, выдача из кэша):
+    время изменения файла = сейчас, срок хранения отсчитывается заново.
+    По времени изменения, а не доступа - оно не зависит от опций монтирования (noatime).
+    """
+    try:
+        os.utime(file_path)
+    except FileNotFoundError:
+        pass
+
+
+class OutputJanitor:
+    """Удаление устаревших результатов по возрасту и по квоте на размер"""
+
+    def __init__(self,
+                 output_dir: Path = OUTPUT_DIR,
+                 retention_hours: float = FILE_RETENTION_HOURS,
+                 max_bytes: int = OUTPUT_MAX_BYTES,
+                 interval_seconds: float = JANITOR_INTERVAL_SECONDS):
+        self.output_dir = Path(output_dir)
+        self.retention_hours = retention_hours
+        self.max_bytes = max_bytes
+        self.interval_seconds = interval_seconds
+        self.stats = {
+            "runs": 0,
+            "files_removed": 0,
+            "bytes_reclaimed": 0,
+            "last_run_at": None,
+            "output_bytes": None,
+        }
+
+    def sweep(self) -> Dict[str, int]:
+        """
+        Один проход очистки.
+        Возвращает число удалённых файлов и освобождённых байт за проход.
+        """
+        expire_before = time.time() - self.retention_hours * 3600
+        files = []
+        removed = 0
+        reclaimed = 0
+
+        for entry in os.scandir(self.output_dir):
+            if not entry.is_file():
+                continue
+            try:
+                st = entry.stat()
+                # Шаг 1: по возрасту (время последнего использования)
+                if st.st_mtime < expire_before:
+                    os.unlink(entry.path)
+                    removed += 1
+                    reclaimed += st.st_size
+                else:
+                    files.append((st.st_mtime, st.st_size, entry.path))
+            except FileNotFoundError:
+                continue
+
+        # Шаг 2: по квоте - сначала давно не использованные
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            else:
+                removed += 1
+                reclaimed += size
+            total -= size
+
+        self.stats["runs"] += 1
+        self.stats["files_removed"] += removed
+        self.stats["bytes_reclaimed"] += reclaimed
+        OUTPUT_BYTES_RECLAIMED.inc(reclaimed)
+        self.stats["last_run_at"] = time.time()
+        self.stats["output_bytes"] = total
+        return {"files_removed": removed, "bytes_reclaimed": reclaimed}
+
+    async def run_forever(self):
+        """Периодическая очистка (задача в lifespan приложения)"""
+        while True:
+            try:
+                result = await asyncio.to_thread(self.sweep)
+                if result["files_removed"]:
+                    logger.info("Очистка результатов: удалено %d файлов, %d байт",
+                                result["files_removed"], result["bytes_reclaimed"])
+            except Exception:
+                logger.exception("Ошибка очистки каталога результатов")
+            await asyncio.sleep(self.interval_seconds)
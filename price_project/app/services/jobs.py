@@ -0,0 +1,127 @@
+"""
+Фоновые задачи обработки прайс-листов
+Состояние задачи хранится в JSON-файле, поэтому его видят все экземпляры
+приложения и процессы-обработчики с общим каталогом
+"""
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from uuid import uuid4
+
+from app.core.config import EXCEL_TEMPLATE, JOBS_DIR, SHEET_MODE
+from app.models.schemas import JobStatus
+from app.services.cache import ResultCache
+from app.services.processor import PriceProcessor
+
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class JobStore:
+    """Хранилище состояний задач (файл на задачу)"""
+
+    def __init__(self, jobs_dir: Path = JOBS_DIR):
+        self.jobs_dir = Path(jobs_dir)
+
+    def _path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _write(self, job: JobStatus):
+        # Запись через временный файл, чтобы читатель не увидел половину JSON
+        path = self._path(job.job_id)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(job.model_dump_json(), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    def create(self) -> JobStatus:
+        """Новая задача в состоянии queued"""
+        job = JobStatus(job_id=uuid4().hex, created_at=time.time())
+        self._write(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[JobStatus]:
+        """Состояние задачи или None, если задачи нет"""
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            return JobStatus.model_validate_json(self._path(job_id).read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return None
+
+    def update(self, job_id: str, **fields) -> JobStatus:
+        """Обновление полей задачи"""
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        job = job.model_copy(update=fields)
+        self._write(job)
+        return job
+
+
+def job_timings(job: JobStatus) -> Dict[str, Optional[float]]:
+    """Время ожидания в очереди и обработки (секунды)"""
+    now = time.time()
+    queued = None
+    running = None
+    if job.started_at is not None:
+        queued = job.started_at - job.created_at
+        running = (job.finished_at or now) - job.started_at
+    elif job.finished_at is None:
+        queued = now - job.created_at
+    return {
+        "queued_seconds": round(queued, 3) if queued is not None else None,
+        "running_seconds": round(running, 3) if running is not None else None,
+    }
+
+
+def run_job(job_id: str,
+            file_path: str,
+            discount_settings: Dict[str, int] = None,
+            recalculate_existing: bool = False,
+            file_hash: Optional[str] = None,
+            output_format: str = 'xlsx',
+            sheet_mode: str = SHEET_MODE,
+            template: str = EXCEL_TEMPLATE) -> Tuple[bool, Optional[Dict[str, Dict]]]:
+    """
+    Выполнение задачи в обработчике (поток или процесс).
+    Загруженный файл удаляется после обработки.
+    Если передан file_hash, успешный результат попадает в кэш.
+    Формат результата, режим листов и шаблон - как в PriceProcessor.process.
+    
+    Returns:
+        (success, timings) - для учёта в метриках приложения
+    """
+    store = JobStore()
+    try:
+        store.update(job_id, state="running", started_at=time.time())
+        processor = PriceProcessor(
+            file_path,
+            on_stage=lambda stage: store.update(job_id, stage=stage)
+        )
+        success, message, output_filename = processor.process(
+            discount_settings, recalculate_existing, output_format=output_format,
+            sheet_mode=sheet_mode, template=template
+        )
+        if success and file_hash is not None:
+            ResultCache().put(file_hash, discount_settings, recalculate_existing,
+                              message, output_filename, output_format, sheet_mode, template)
+        store.update(
+            job_id,
+            state="done" if success else "failed",
+            stage=None,
+            message=message,
+            output_filename=output_filename,
+            finished_at=time.time(),
+            timings=processor.timings,
+        )
+        return success, processor.timings
+    except Exception as e:
+        store.update(job_id, state="failed", message=f"Ошибка обработки: {str(e)}",
+                     finished_at=time.time())
+        return False, None
+    finally:
+        path = Path(file_path)
+        if path.exists():
+            path.unlink()
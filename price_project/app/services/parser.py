@@ -1,24 +1,153 @@
 """
 Модуль загрузки и парсинга Excel-файлов
+Движок чтения - openpyxl или calamine (python-calamine, быстрее, читает
+также .xls и .ods), выбирается по формату и размеру файла.
+CSV/TSV разбирает CsvParser (csv_parser.py), выбор - create_parser().
 """
 import pandas as pd
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
 from openpyxl import load_workbook
-from typing import Tuple, List, Optional
-import re
+from openpyxl.cell.cell import ERROR_CODES
+from itertools import chain, islice
+from typing import BinaryIO, Iterator, Tuple, List, Optional, Union
+import numpy as np
+import io
+import os
+
+from app.core.config import STREAM_CHUNK_ROWS, READER_ENGINE, CALAMINE_MAX_FILE_SIZE
+from app.services.column_detector import ColumnDetector
+
+try:
+    import python_calamine
+except ImportError:  # Быстрое чтение - необязательная зависимость
+    python_calamine = None
+
+
+READER_ENGINES = ('auto', 'openpyxl', 'calamine')
+
+# Сигнатуры начала файла: xlsx и ods - zip-архив, xls - составной документ OLE
+ZIP_SIGNATURE = b'PK\x03\x04'
+OLE_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+# ods: первый файл архива - mimetype с типом документа
+ODS_MIMETYPE = b'application/vnd.oasis.opendocument.spreadsheet'
+
+
+def _convert_value(value):
+    """
+    Приведение значения ячейки к виду, который даёт pd.read_excel:
+    пусто -> "", ошибки формул -> NaN, целые float -> int.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        as_int = int(value)
+        if as_int == value:
+            return as_int
+        return float(value)
+    if isinstance(value, str) and value in ERROR_CODES:
+        return np.nan
+    return value
+
+
+def rows_to_dataframe(rows: List[tuple], skiprows: int = 0, dtype=None) -> pd.DataFrame:
+    """
+    Построение DataFrame из уже прочитанных строк листа.
+    Повторяет преобразования pd.read_excel(header=None, skiprows=...),
+    но без повторного разбора файла.
+    dtype=object отключает вывод типов колонок (значения ячеек остаются как есть).
+    """
+    data = []
+    last_row_with_data = -1
+    for row_number, row in enumerate(rows):
+        converted_row = [_convert_value(v) for v in row]
+        # Убираем пустые ячейки в конце строки
+        while converted_row and converted_row[-1] == "":
+            converted_row.pop()
+        if converted_row:
+            last_row_with_data = row_number
+        data.append(converted_row)
+
+    # Убираем пустые строки в конце листа
+    data = data[: last_row_with_data + 1]
+
+    if data:
+        # Выравниваем строки по максимальной ширине
+        max_width = max(len(data_row) for data_row in data)
+        data = [data_row + [""] * (max_width - len(data_row)) for data_row in data]
+
+    try:
+        parser = TextParser(
+            data, header=None, skiprows=skiprows, dtype=dtype, skip_blank_lines=False
+        )
+        return parser.read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+def _read_head(file_path: Union[str, BinaryIO], size: int = 128) -> bytes:
+    """Начало файла (позиция файлового объекта не меняется)"""
+    if isinstance(file_path, str):
+        with open(file_path, 'rb') as f:
+            return f.read(size)
+    position = file_path.tell()
+    head = file_path.read(size)
+    file_path.seek(position)
+    return head
+
+
+def _source_size(file_path: Union[str, BinaryIO]) -> int:
+    """Размер файла в байтах (позиция файлового объекта не меняется)"""
+    if isinstance(file_path, str):
+        return os.path.getsize(file_path)
+    position = file_path.tell()
+    size = file_path.seek(0, io.SEEK_END)
+    file_path.seek(position)
+    return size
+
+
+def detect_excel_format(file_path: Union[str, BinaryIO]) -> Optional[str]:
+    """Формат книги по сигнатуре: 'xlsx', 'xls', 'ods' или None (не Excel)"""
+    head = _read_head(file_path)
+    if head.startswith(OLE_SIGNATURE):
+        return 'xls'
+    if head.startswith(ZIP_SIGNATURE):
+        return 'ods' if ODS_MIMETYPE in head else 'xlsx'
+    return None
+
+
+def select_engine(excel_format: str, size: int, engine: str = READER_ENGINE,
+                  streaming: bool = False) -> str:
+    """
+    Движок чтения книги.
+    .xls и .ods читает только calamine; .xlsx в режиме auto - calamine,
+    если он установлен, чтение не потоковое и файл не больше
+    CALAMINE_MAX_FILE_SIZE. Потоковое чтение .xlsx - openpyxl read-only:
+    calamine держит в памяти весь лист.
+
+    Raises:
+        ValueError: неизвестный движок или нужный движок не установлен
+    """
+    if engine not in READER_ENGINES:
+        raise ValueError(
+            f"Неизвестный движок чтения: {engine} (допустимо: {', '.join(READER_ENGINES)})"
+        )
+    if excel_format in ('xls', 'ods'):
+        engine = 'calamine'
+    elif engine == 'auto':
+        if python_calamine is not None and not streaming and size <= CALAMINE_MAX_FILE_SIZE:
+            return 'calamine'
+        return 'openpyxl'
+    if engine == 'calamine' and python_calamine is None:
+        raise ValueError(f"Для чтения .{excel_format} через calamine установите пакет python-calamine")
+    return engine
 
 
 class ExcelParser:
     """Парсер Excel-файлов со сложной структурой"""
     
-    # Паттерны для распознавания колонок
-    COLUMN_PATTERNS = {
-        'code': [r'код\s*товара', r'код', r'артикул', r'№'],
-        'status': [r'статус', r'распродажа', r'качество', r'срок', r'ограничен'],
-        'name': [r'номенклатура', r'название', r'товар', r'описание'],
-        'special_price': [r'спец\.?\s*цена', r'акция', r'специальная\s*цена'],
-        'retail_price': [r'розничн.*цена', r'цена\s*розница', r'прайс\s*цена'],
-    }
-    
     # Паттерны для определения шапок и мусора
     HEADER_PATTERNS = [
         r'прайс[-\s]?лист',
@@ -30,75 +159,169 @@ class ExcelParser:
         r'^\d{1,2}\.\d{1,2}\.\d{4}',  # Даты
     ]
     
-    def __init__(self, file_path: str):
+    # Сколько первых строк просматривать в поиске заголовка таблицы
+    HEADER_SCAN_ROWS = ColumnDetector.SCAN_ROWS
+    
+    def __init__(self, file_path: Union[str, BinaryIO], streaming: bool = False,
+                 engine: Optional[str] = None, sheet: Optional[str] = None):
+        """
+        Args:
+            file_path: Путь к файлу или файловый объект
+            streaming: Потоковый режим (строки читаются лениво
+                и не сохраняются в памяти; openpyxl - read-only лист)
+            engine: Движок чтения: 'auto', 'openpyxl' или 'calamine'
+                (None - READER_ENGINE). Итоговый выбор - select_engine
+            sheet: Имя листа (None - активный лист). openpyxl открывает
+                книгу read-only: листы разбираются только при чтении,
+                список листов (sheet_names) берётся из уже открытой книги
+        """
         self.file_path = file_path
-        self.wb = load_workbook(file_path, data_only=True)
-        self.ws = self.wb.active
+        self.streaming = streaming
+        self.engine = select_engine(
+            detect_excel_format(file_path) or 'xlsx', _source_size(file_path), engine or READER_ENGINE,
+            streaming=streaming
+        )
+        if self.engine == 'calamine':
+            self.wb = self._open_calamine(file_path)
+            if sheet is None:
+                self.ws = self._first_visible_sheet()
+            else:
+                self.ws = self.wb.get_sheet_by_name(sheet)
+        else:
+            self.wb = load_workbook(file_path, read_only=True, data_only=True)
+            self.ws = self.wb.active if sheet is None else self.wb[sheet]
+            # Размеры листа в файле могут быть записаны неверно
+            self.ws.reset_dimensions()
+        self._reset_rows()
+
+    def _reset_rows(self):
+        """Состояние чтения строк: сохранённые строки и найденная строка заголовков"""
+        self._rows = None
+        self._header_row = None
+        self._header_detected = False
+
+    @staticmethod
+    def _open_calamine(file_path: Union[str, BinaryIO]):
+        if isinstance(file_path, str):
+            return python_calamine.CalamineWorkbook.from_path(file_path)
+        return python_calamine.CalamineWorkbook.from_filelike(file_path)
+
+    def sheet_names(self) -> List[str]:
+        """Видимые листы книги по порядку (из уже открытой книги)"""
+        if self.engine == 'calamine':
+            return [
+                sheet.name for sheet in self.wb.sheets_metadata
+                if sheet.visible == python_calamine.SheetVisibleEnum.Visible
+                and sheet.typ == python_calamine.SheetTypeEnum.WorkSheet
+            ]
+        return [ws.title for ws in self.wb.worksheets if ws.sheet_state == 'visible']
+
+    def _first_visible_sheet(self):
+        """Первый видимый лист (активный лист calamine не сообщает)"""
+        for index, sheet in enumerate(self.wb.sheets_metadata):
+            if sheet.visible == python_calamine.SheetVisibleEnum.Visible:
+                return self.wb.get_sheet_by_index(index)
+        return self.wb.get_sheet_by_index(0)
+
+    def _iter_sheet_rows(self) -> Iterator[tuple]:
+        """Строки листа от A1: openpyxl - кортежи, calamine - списки"""
+        if self.engine != 'calamine':
+            return self.ws.iter_rows(values_only=True)
+        # calamine отдаёт строки от первой заполненной колонки - дополняем до A
+        padding = [''] * self.ws.start[1] if self.ws.start else []
+        if not padding:
+            return self.ws.iter_rows()
+        return (padding + row for row in self.ws.iter_rows())
         
-    def detect_columns(self) -> dict:
+    def detect_columns(self, detector: Optional[ColumnDetector] = None) -> dict:
         """
-        Автоматическое определение индексов ключевых колонок.
+        Автоматическое определение индексов ключевых колонок
+        по первым строкам листа (см. ColumnDetector).
+        Найденная строка заголовков задаёт начало данных при чтении.
         Возвращает словарь {column_type: column_index}
         """
-        columns = {}
-        
-        # Читаем первые строки для поиска заголовков
-        headers = []
-        for row in self.ws.iter_rows(min_row=1, max_row=10, values_only=True):
-            headers.append(row)
-        
-        # Ищем строку с заголовками таблицы
-        header_row_idx = None
-        for idx, row in enumerate(headers):
-            row_text = ' '.join(str(c) for c in row if c)
-            if 'код' in row_text.lower() and ('номенклатура' in row_text.lower() or 'товар' in row_text.lower()):
-                header_row_idx = idx
-                break
-        
-        if header_row_idx is not None:
-            header_row = headers[header_row_idx]
-            for col_idx, cell in enumerate(header_row):
-                if cell is None:
-                    continue
-                cell_text = str(cell).lower().strip()
-                
-                for col_type, patterns in self.COLUMN_PATTERNS.items():
-                    for pattern in patterns:
-                        if re.search(pattern, cell_text):
-                            columns[col_type] = col_idx
-                            break
-        
-        return columns
+        if detector is None:
+            detector = ColumnDetector()
+        column_mapping, self._header_row = detector.detect(self.iter_rows())
+        self._header_detected = True
+        return column_mapping
+
+    def _data_start(self, head: List[tuple]) -> int:
+        """
+        Индекс первой строки данных - следующей за строкой заголовков.
+        Строка заголовков - найденная detect_columns, без него ищется
+        ColumnDetector в head. Без строки заголовков пропускается первая строка.
+        """
+        header_row = self._header_row
+        if not self._header_detected:
+            header_row = ColumnDetector().locate_header_row(head)
+        return header_row + 1 if header_row is not None else 1
     
     def read_raw_data(self) -> pd.DataFrame:
         """
         Чтение сырых данных из Excel.
+        DataFrame строится из уже прочитанных строк, файл повторно не открывается.
         """
-        # Находим строку с основными заголовками
-        start_row = 1
-        for row_idx, row in enumerate(self.ws.iter_rows(values_only=True), 1):
-            row_text = ' '.join(str(c) for c in row if c)
-            if 'код' in row_text.lower() and ('номенклатура' in row_text.lower() or 'товар' in row_text.lower()):
-                start_row = row_idx + 1  # +1 потому что следующая строка после заголовков
-                break
+        rows = self.get_all_rows()
         
-        # Читаем данные начиная с найденной строки
-        df = pd.read_excel(
-            self.file_path,
-            header=None,
-            skiprows=start_row,
-            engine='openpyxl'
-        )
+        # Данные - со строки после заголовков таблицы
+        return rows_to_dataframe(rows, skiprows=self._data_start(rows))
+    
+    def iter_raw_chunks(self, chunk_size: int = STREAM_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Потоковое чтение сырых данных частями по chunk_size строк.
+        Заголовок таблицы ищется в первых HEADER_SCAN_ROWS строках,
+        в памяти одновременно находится только одна часть.
+        Типы колонок не выводятся, чтобы результат не зависел от границ частей.
+        """
+        rows = self.iter_rows()
+        head = list(islice(rows, self.HEADER_SCAN_ROWS))
         
-        return df
+        data_rows = islice(chain(head, rows), self._data_start(head), None)
+        while True:
+            chunk = list(islice(data_rows, chunk_size))
+            if not chunk:
+                break
+            df = rows_to_dataframe(chunk, dtype=object)
+            if not df.empty:
+                yield df
+    
+    def iter_rows(self) -> Iterator[tuple]:
+        """
+        Ленивый обход строк листа (кортежи значений).
+        В потоковом режиме строки не сохраняются.
+        """
+        if self._rows is not None:
+            return iter(self._rows)
+        return self._iter_sheet_rows()
     
     def get_all_rows(self) -> List[tuple]:
-        """Получить все строки листа как кортежи"""
-        rows = []
-        for row in self.ws.iter_rows(values_only=True):
-            rows.append(row)
-        return rows
+        """
+        Получить все строки листа как кортежи.
+        Лист читается один раз, дальше используется сохранённый список.
+        """
+        if self._rows is None:
+            self._rows = list(self._iter_sheet_rows())
+        return self._rows
     
     def close(self):
         """Закрытие книги"""
         self.wb.close()
+
+
+def is_excel_source(file_path: Union[str, BinaryIO]) -> bool:
+    """Файл Excel (а не текстовый CSV/TSV) - по сигнатуре начала файла"""
+    return detect_excel_format(file_path) is not None
+
+
+def create_parser(file_path: Union[str, BinaryIO], streaming: bool = False,
+                  engine: Optional[str] = None, sheet: Optional[str] = None) -> ExcelParser:
+    """
+    Парсер по содержимому файла: ExcelParser или CsvParser.
+    engine - движок чтения Excel (None - READER_ENGINE с выбором по формату и размеру),
+    sheet - лист книги (None - активный; у CSV/TSV лист один).
+    """
+    if is_excel_source(file_path):
+        return ExcelParser(file_path, streaming=streaming, engine=engine, sheet=sheet)
+    from app.services.csv_parser import CsvParser
+    return CsvParser(file_path, streaming=streaming)
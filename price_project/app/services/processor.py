@@ -2,139 +2,561 @@
 Основной сервис обработки прайс-листов
 Объединяет все модули: парсинг, очистку, трансформацию, экспорт
 """
+import io
+import multiprocessing
+import os
+import time
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, Tuple, Optional
+from typing import BinaryIO, Callable, Dict, List, Tuple, Optional, Union
 
-from app.services.parser import ExcelParser
+from app.services.parser import ExcelParser, create_parser
+from app.services.column_detector import ColumnDetector
+from app.services.compactor import compact_frame, frame_memory
 from app.services.cleaner import DataCleaner
 from app.services.transformer import DataTransformer
-from app.services.exporter import ExcelExporter, generate_output_filename
-from app.core.config import DEFAULT_MARKERS, UPLOAD_DIR, OUTPUT_DIR
+from app.services.exporter import (
+    BaseExporter, SheetsExporter, create_exporter, generate_output_filename
+)
+from app.services.excel_template import check_template
+from app.core.config import (
+    DEFAULT_MARKERS, UPLOAD_DIR, OUTPUT_DIR, STREAMING_FILE_SIZE, STREAM_CHUNK_ROWS,
+    SHEET_MODE, SHEET_EXECUTOR_KIND, SHEET_WORKERS, COMPACT_FRAMES, EXCEL_TEMPLATE
+)
+
+
+# Индексы колонок, если строка заголовков не найдена (раскладка тестового файла).
+# Обычно колонки определяются по заголовкам - ColumnDetector
+DEFAULT_COLUMN_MAPPING = {
+    'code': 0,        # Код товара
+    'status': 1,      # Качество/Статус
+    'name': 2,        # Номенклатура
+    'special_price': 3,  # Спец. цена
+    'retail_price': 4,   # Розничная цена
+}
+
+# Без этих колонок цены не рассчитать
+REQUIRED_COLUMNS = ('status', 'name', 'special_price', 'retail_price')
+
+# Режимы обработки листов книги (см. PriceProcessor.process)
+SHEET_MODES = ('active', 'merge', 'split')
 
 
 class PriceProcessor:
     """Основной процессор прайс-листов"""
     
-    def __init__(self, file_path: str):
+    def __init__(self,
+                 file_path: Union[str, Path, bytes, BinaryIO],
+                 streaming: Optional[bool] = None,
+                 on_stage: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            file_path: Путь к файлу, содержимое файла (bytes) или файловый
+                объект - тогда файл обрабатывается без записи на диск
+            streaming: Потоковый режим обработки. None - включается
+                автоматически для файлов больше STREAMING_FILE_SIZE
+            on_stage: Вызывается с названием этапа при его начале
+                ('detect', 'parse', 'clean', 'transform', 'export')
+        """
         self.file_path = file_path
+        self.streaming = streaming
+        self.on_stage = on_stage
         self.df = None
         self.column_mapping = {}
+        # Отпечаток раскладки колонок (None - строка заголовков не найдена)
+        self.layout_fingerprint = None
+        # Этап -> {'seconds', 'rows', 'bytes'} (заполняется в process);
+        # 'total' - полное время обработки файла
+        self.timings: Dict[str, Dict] = {}
+        # Этап -> интервалы его выполнения (time.perf_counter)
+        self._spans: Dict[str, List[Tuple[float, float]]] = {}
         
-    def _detect_columns_advanced(self) -> Dict[str, int]:
+    def _detect_columns(self, parser: ExcelParser) -> Dict[str, int]:
+        """
+        Определение колонок по заголовкам таблицы.
+        Без строки заголовков - DEFAULT_COLUMN_MAPPING.
+        
+        Raises:
+            ValueError: заголовки найдены, но без обязательных колонок
+        """
+        detector = ColumnDetector()
+        column_mapping = parser.detect_columns(detector)
+        self.layout_fingerprint = detector.fingerprint
+        if not column_mapping:
+            return DEFAULT_COLUMN_MAPPING.copy()
+        
+        missing = [col_type for col_type in REQUIRED_COLUMNS if col_type not in column_mapping]
+        if missing:
+            names = ', '.join(BaseExporter.COLUMN_NAMES[col_type] for col_type in missing)
+            raise ValueError(f"Не найдены колонки: {names}")
+        return column_mapping
+    
+    def _set_stage(self, stage: str):
+        """Сообщить о начале этапа обработки"""
+        if self.on_stage is not None:
+            self.on_stage(stage)
+    
+    @contextmanager
+    def _timed(self, stage: str, notify: bool = True):
+        """
+        Замер этапа. Время суммируется: в потоковом режиме этап
+        выполняется частями.
+        """
+        if notify:
+            self._set_stage(stage)
+        stats = self.timings.setdefault(
+            stage, {'seconds': 0.0, 'rows': None, 'bytes': None, 'memory': None}
+        )
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            end = time.perf_counter()
+            stats['seconds'] += end - start
+            self._spans.setdefault(stage, []).append((start, end))
+    
+    @staticmethod
+    def _add_rows(stats: Dict, rows: int):
+        stats['rows'] = (stats['rows'] or 0) + rows
+    
+    @staticmethod
+    def _add_frame(stats: Dict, df: pd.DataFrame):
+        """Строки и память DataFrame - результата этапа"""
+        stats['rows'] = (stats['rows'] or 0) + len(df)
+        stats['memory'] = (stats['memory'] or 0) + frame_memory(df)
+    
+    @staticmethod
+    def _compact(df: pd.DataFrame, column_mapping: Dict[str, int]) -> pd.DataFrame:
+        """Компактные типы колонок (COMPACT_FRAMES)"""
+        if not COMPACT_FRAMES:
+            return df
+        return compact_frame(df, column_mapping)
+    
+    def _source_size(self) -> int:
+        """Размер входного файла в байтах"""
+        if isinstance(self.file_path, (bytes, bytearray)):
+            return len(self.file_path)
+        if hasattr(self.file_path, 'read'):
+            size = self.file_path.seek(0, io.SEEK_END)
+            self.file_path.seek(0)
+            return size
+        return os.path.getsize(self.file_path)
+    
+    def _open_source(self) -> Union[str, BinaryIO]:
+        """Источник для чтения: путь или файловый объект с начала"""
+        if isinstance(self.file_path, (bytes, bytearray)):
+            return io.BytesIO(self.file_path)
+        if hasattr(self.file_path, 'read'):
+            self.file_path.seek(0)
+            return self.file_path
+        return str(self.file_path)
+    
+    def _use_streaming(self) -> bool:
+        """Нужен ли потоковый режим (явно задан или файл большой)"""
+        if self.streaming is not None:
+            return self.streaming
+        return self._source_size() > STREAMING_FILE_SIZE
+    
+    def _transform(self,
+                   df: pd.DataFrame,
+                   column_mapping: Dict[str, int],
+                   discount_settings: Dict[str, int],
+                   recalculate_existing: bool) -> pd.DataFrame:
+        """Нормализация статусов и расчёт спец. цен"""
+        transformer = DataTransformer(df, discount_settings)
+        return transformer.transform(
+            status_col=column_mapping['status'],
+            name_col=column_mapping['name'],
+            special_price_col=column_mapping['special_price'],
+            retail_price_col=column_mapping['retail_price'],
+            recalculate_existing=recalculate_existing
+        )
+    
+    def _process_streaming(self,
+                           parser: ExcelParser,
+                           column_mapping: Dict[str, int],
+                           discount_settings: Dict[str, int],
+                           recalculate_existing: bool) -> pd.DataFrame:
         """
-        Расширенное определение колонок.
-        Анализирует структуру файла и находит ключевые колонки.
+        Потоковая обработка: лист читается read-only частями,
+        каждая часть сразу очищается и трансформируется.
         """
-        parser = ExcelParser(self.file_path)
+        min_width = max(column_mapping.values()) + 1
+        frames = []
         
-        # Получаем все строки для анализа
-        all_rows = parser.get_all_rows()
+        # Этапы идут вперемешку по частям, сообщаем о чтении один раз
+        self._set_stage('parse')
+        chunks = parser.iter_raw_chunks(STREAM_CHUNK_ROWS)
+        while True:
+            with self._timed('parse', notify=False) as stats:
+                df_chunk = next(chunks, None)
+                if df_chunk is not None:
+                    df_chunk = self._compact(df_chunk, column_mapping)
+                    self._add_frame(stats, df_chunk)
+            if df_chunk is None:
+                break
+            
+            # Заголовок таблицы может быть только в начале первой непустой части
+            with self._timed('clean', notify=False) as stats:
+                df_cleaned = DataCleaner(df_chunk, has_header_row=not frames).clean()
+                self._add_frame(stats, df_cleaned)
+            if df_cleaned.empty:
+                continue
+            
+            # В части может не оказаться заполненных крайних колонок
+            if len(df_cleaned.columns) < min_width:
+                df_cleaned = df_cleaned.reindex(columns=range(min_width))
+            
+            with self._timed('transform', notify=False) as stats:
+                frames.append(self._transform(
+                    df_cleaned, column_mapping, discount_settings, recalculate_existing
+                ))
+                self._add_frame(stats, frames[-1])
         
-        # Находим строку с заголовками
-        header_patterns = {
-            'code': ['код товара', 'код', 'артикул'],
-            'status': ['качество', 'статус', 'распродажа'],
-            'name': ['номенклатура', 'название товара', 'товар'],
-            'special_price': ['спец', 'акция', 'специальная'],
-            'retail_price': ['розничн', 'цена', 'прайс'],
-        }
+        if not frames:
+            return pd.DataFrame()
+        # У частей свои категории - после объединения типы приводятся заново
+        return self._compact(pd.concat(frames, ignore_index=True), column_mapping)
+    
+    def _open_parser(self, streaming: bool, sheet: Optional[str] = None) -> ExcelParser:
+        """Парсер листа (None - активный); открытие файла - часть чтения"""
+        with self._timed('parse', notify=False) as stats:
+            parser = create_parser(self._open_source(), streaming=streaming, sheet=sheet)
+            stats['bytes'] = self._source_size()
+        return parser
+    
+    def _process_sheet(self,
+                       sheet: Optional[str],
+                       streaming: bool,
+                       discount_settings: Dict[str, int],
+                       recalculate_existing: bool,
+                       price_sheet_only: bool = False,
+                       parser: Optional[ExcelParser] = None) -> Tuple[Optional[pd.DataFrame], str]:
+        """
+        Шаги 1-4 для листа: определение колонок, чтение, очистка, трансформация.
         
-        column_mapping = {}
+        Args:
+            sheet: Лист книги (None - активный)
+            price_sheet_only: Лист без строки заголовков с нужными колонками -
+                не прайс, он пропускается: (None, "")
+            parser: Уже открытый парсер листа (закрывается здесь);
+                None - файл открывается заново
         
-        # Ищем заголовки в первых строках
-        for row_idx, row in enumerate(all_rows[:15]):
-            for col_idx, cell in enumerate(row):
-                if cell is None:
-                    continue
-                    
-                cell_text = str(cell).lower()
+        Returns:
+            (df, "") или (None, сообщение об ошибке)
+        """
+        if parser is None:
+            parser = self._open_parser(streaming, sheet)
+        try:
+            with self._timed('detect', notify=False):
+                try:
+                    column_mapping = self._detect_columns(parser)
+                except ValueError:
+                    if price_sheet_only:
+                        return None, ""
+                    raise
+            if price_sheet_only and self.layout_fingerprint is None:
+                return None, ""
+            self.column_mapping = column_mapping
+            
+            if streaming:
+                # Шаги 1-4 по частям: чтение, очистка, трансформация
+                df_transformed = self._process_streaming(
+                    parser, column_mapping, discount_settings, recalculate_existing
+                )
                 
-                for col_type, patterns in header_patterns.items():
-                    if col_type not in column_mapping:
-                        for pattern in patterns:
-                            if pattern in cell_text:
-                                column_mapping[col_type] = col_idx
-                                break
+                if df_transformed.empty:
+                    return None, "Не удалось извлечь данные из файла"
+                return df_transformed, ""
+            
+            # Шаг 1: Чтение данных (файл разбирается один раз)
+            with self._timed('parse') as stats:
+                df_raw = self._compact(parser.read_raw_data(), column_mapping)
+                self._add_frame(stats, df_raw)
+        finally:
+            parser.close()
         
-        parser.close()
-        return column_mapping
+        if df_raw.empty:
+            return None, "Файл не содержит данных"
+        
+        # Шаг 2: Очистка данных
+        with self._timed('clean') as stats:
+            cleaner = DataCleaner(df_raw)
+            df_cleaned = cleaner.clean()
+            self._add_frame(stats, df_cleaned)
+        
+        if df_cleaned.empty:
+            return None, "Не удалось извлечь данные из файла"
+        
+        # Шаг 3-4: Трансформация данных
+        with self._timed('transform') as stats:
+            df_transformed = self._transform(
+                df_cleaned, column_mapping, discount_settings, recalculate_existing
+            )
+            self._add_frame(stats, df_transformed)
+        return df_transformed, ""
+    
+    def _sheet_source(self) -> Union[str, bytes]:
+        """Источник для обработчиков листов: путь или содержимое файла"""
+        if isinstance(self.file_path, (bytes, bytearray)):
+            return bytes(self.file_path)
+        if hasattr(self.file_path, 'read'):
+            self.file_path.seek(0)
+            return self.file_path.read()
+        return str(self.file_path)
+    
+    def _process_sheets(self,
+                        sheets: List[str],
+                        streaming: bool,
+                        discount_settings: Dict[str, int],
+                        recalculate_existing: bool) -> List[Tuple[str, pd.DataFrame, Dict[str, int]]]:
+        """
+        Параллельная обработка листов книги (пул SHEET_EXECUTOR_KIND).
+        Возвращает [(лист, df, column_mapping)] для листов с прайсом по порядку книги.
+        Время этапа - сколько он шёл хотя бы на одном листе, а не сумма по листам
+        (при параллельной обработке она больше прошедшего времени). perf_counter -
+        монотонные часы системы, интервалы процессов пула с ними сравнимы.
+        """
+        source = self._sheet_source()
+        workers = min(SHEET_WORKERS, len(sheets))
+        # Демон-процесс (например, обработчик multiprocessing.Pool) не может
+        # запускать свои процессы - тогда листы обрабатываются в потоках
+        if SHEET_EXECUTOR_KIND == 'process' and not multiprocessing.current_process().daemon:
+            pool = ProcessPoolExecutor(max_workers=workers)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="price-sheet")
+        
+        self._set_stage('parse')
+        with pool:
+            results = list(pool.map(
+                _process_sheet_worker,
+                repeat(source), sheets, repeat(streaming),
+                repeat(discount_settings), repeat(recalculate_existing)
+            ))
+        
+        frames = []
+        sheet_spans = {}
+        for sheet, (df, column_mapping, timings, spans) in zip(sheets, results):
+            for stage, stats in timings.items():
+                total = self.timings.setdefault(
+                    stage, {'seconds': 0.0, 'rows': None, 'bytes': None, 'memory': None}
+                )
+                if stats['rows'] is not None:
+                    self._add_rows(total, stats['rows'])
+                # Результаты листов хранятся одновременно - память суммируется
+                if stats['memory'] is not None:
+                    total['memory'] = (total['memory'] or 0) + stats['memory']
+                if stats['bytes'] is not None:
+                    total['bytes'] = stats['bytes']
+            for stage, stage_spans in spans.items():
+                sheet_spans.setdefault(stage, []).extend(stage_spans)
+            if df is not None:
+                frames.append((sheet, df, column_mapping))
+        for stage, stage_spans in sheet_spans.items():
+            self.timings[stage]['seconds'] += busy_seconds(stage_spans)
+            self._spans.setdefault(stage, []).extend(stage_spans)
+        return frames
     
     def process(self, 
                 discount_settings: Dict[str, int] = None,
-                recalculate_existing: bool = False) -> Tuple[bool, str, Optional[str]]:
+                recalculate_existing: bool = False,
+                output: Optional[BinaryIO] = None,
+                output_format: str = 'xlsx',
+                sheet_mode: str = SHEET_MODE,
+                template: str = EXCEL_TEMPLATE) -> Tuple[bool, str, Optional[str]]:
         """
         Полный цикл обработки файла.
         
         Args:
             discount_settings: Настройки скидок {маркер: процент}
             recalculate_existing: Пересчитывать ли существующие спец. цены
+            output: Файловый объект для результата. По умолчанию результат
+                сохраняется в OUTPUT_DIR
+            output_format: Формат результата: xlsx, csv, jsonl или parquet
+            sheet_mode: Листы книги: active (только активный), merge (все
+                листы с прайсом в один) или split (лист результата на лист книги)
+            template: Шаблон оформления xlsx (имя в TEMPLATES_EXCEL_DIR,
+                "default" - DEFAULT_TEMPLATE); пусто - встроенное оформление
         
         Returns:
-            (success, message, output_filename)
+            (success, message, output_filename) - при записи в output
+            output_filename - только предлагаемое имя файла
         """
         try:
+            check_sheet_mode(sheet_mode, output_format)
+            excel_template = check_template(template, output_format)
             if discount_settings is None:
                 discount_settings = DEFAULT_MARKERS.copy()
                 # Удаляем К4 из настроек скидок (он обрабатывается отдельно)
                 discount_settings.pop('К4', None)
             
-            # Шаг 1: Чтение данных
-            parser = ExcelParser(self.file_path)
-            df_raw = parser.read_raw_data()
-            parser.close()
+            self.timings = {}
+            self._spans = {}
+            started = time.perf_counter()
+            streaming = self._use_streaming()
             
-            if df_raw.empty:
-                return False, "Файл не содержит данных", None
+            # Листы книги обрабатываются параллельно, если их несколько.
+            # Список листов - из книги, открытой для чтения активного листа:
+            # книга с одним листом открывается один раз
+            self._set_stage('detect')
+            parser = self._open_parser(streaming)
+            frames = []
+            if sheet_mode != 'active':
+                sheets = parser.sheet_names()
+                if len(sheets) > 1:
+                    parser.close()
+                    parser = None
+                    frames = self._process_sheets(
+                        sheets, streaming, discount_settings, recalculate_existing
+                    )
             
-            # Шаг 2: Очистка данных
-            cleaner = DataCleaner(df_raw)
-            df_cleaned = cleaner.clean()
-            
-            if df_cleaned.empty:
-                return False, "Не удалось извлечь данные из файла", None
-            
-            # Шаг 3: Определение колонок
-            # Для упрощения используем фиксированные индексы на основе анализа тестового файла
-            # В продакшене нужно использовать более сложную логику определения
-            column_mapping = {
-                'code': 0,        # Код товара
-                'status': 1,      # Качество/Статус
-                'name': 2,        # Номенклатура
-                'special_price': 3,  # Спец. цена
-                'retail_price': 4,   # Розничная цена
-            }
-            
-            # Шаг 4: Трансформация данных
-            transformer = DataTransformer(df_cleaned, discount_settings)
-            df_transformed = transformer.transform(
-                status_col=column_mapping['status'],
-                name_col=column_mapping['name'],
-                special_price_col=column_mapping['special_price'],
-                retail_price_col=column_mapping['retail_price'],
-                recalculate_existing=recalculate_existing
-            )
+            # Один лист или ни на одном листе не нашлось заголовков - активный лист
+            if not frames:
+                df_transformed, error = self._process_sheet(
+                    None, streaming, discount_settings, recalculate_existing, parser=parser
+                )
+                if df_transformed is None:
+                    return False, error, None
+                frames = [(None, df_transformed, self.column_mapping)]
             
             # Шаг 5: Экспорт
-            exporter = ExcelExporter(df_transformed, column_mapping)
-            output_filename = generate_output_filename()
+            output_filename = generate_output_filename(output_format)
             output_path = OUTPUT_DIR / output_filename
+            rows_processed = sum(len(df) for _, df, _ in frames)
+            with self._timed('export') as stats:
+                if len(frames) > 1 and sheet_mode == 'split':
+                    exporter = SheetsExporter(frames, streaming=streaming, template=excel_template)
+                else:
+                    df_transformed, column_mapping = merge_sheet_frames(frames)
+                    exporter = create_exporter(df_transformed, column_mapping, output_format,
+                                               streaming=streaming, template=excel_template)
+                exporter.export(output if output is not None else str(output_path))
+                stats['rows'] = rows_processed
             
-            exporter.export(str(output_path))
+            # Сохранение книги - часть export(), учитываем отдельно
+            save_seconds = exporter.save_seconds or 0.0
+            self.timings['export']['seconds'] -= save_seconds
+            self.timings['save'] = {
+                'seconds': save_seconds,
+                'rows': rows_processed,
+                'bytes': output.tell() if output is not None else output_path.stat().st_size,
+                'memory': None,
+            }
             
             # Подсчёт статистики
-            rows_processed = len(df_transformed)
-            rows_with_sale = len(df_transformed[df_transformed.iloc[:, column_mapping['status']] == "РАСПРОДАЖА"])
+            rows_with_sale = sum(
+                int((df.iloc[:, column_mapping['status']] == "РАСПРОДАЖА").sum())
+                for _, df, column_mapping in frames
+            )
             
-            return True, f"Обработано {rows_processed} строк, из них {rows_with_sale} с распродажей", output_filename
+            self.timings['total'] = {
+                'seconds': time.perf_counter() - started,
+                'rows': rows_processed,
+                'bytes': None,
+                'memory': None,
+            }
+            
+            message = f"Обработано {rows_processed} строк, из них {rows_with_sale} с распродажей"
+            if len(frames) > 1:
+                message += f" (листов: {len(frames)})"
+            return True, message, output_filename
             
         except Exception as e:
             return False, f"Ошибка обработки: {str(e)}", None
 
 
+def _process_sheet_worker(source: Union[str, bytes],
+                          sheet: str,
+                          streaming: bool,
+                          discount_settings: Dict[str, int],
+                          recalculate_existing: bool
+                          ) -> Tuple[Optional[pd.DataFrame], Dict[str, int], Dict[str, Dict],
+                                     Dict[str, List[Tuple[float, float]]]]:
+    """
+    Обработка листа в обработчике пула (поток или процесс).
+    Returns:
+        (df или None - лист без прайса, column_mapping, timings, интервалы этапов)
+    """
+    processor = PriceProcessor(source, streaming=streaming)
+    df, _ = processor._process_sheet(
+        sheet, streaming, discount_settings, recalculate_existing, price_sheet_only=True
+    )
+    return df, processor.column_mapping, processor.timings, processor._spans
+
+
+def busy_seconds(spans: List[Tuple[float, float]]) -> float:
+    """Длительность объединения интервалов (перекрытия считаются один раз)"""
+    total = 0.0
+    current_start = current_end = None
+    for start, end in sorted(spans):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def merge_sheet_frames(frames: List[Tuple[Optional[str], pd.DataFrame, Dict[str, int]]]
+                       ) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Объединение результатов листов в одну таблицу.
+    Колонки листов приводятся к порядку BaseExporter.COLUMN_ORDER
+    (у листов может быть разная раскладка). Один лист возвращается как есть.
+    
+    Returns:
+        (df, column_mapping)
+    """
+    if len(frames) == 1:
+        _, df, column_mapping = frames[0]
+        return df, column_mapping
+    
+    types = [
+        col_type for col_type in BaseExporter.COLUMN_ORDER
+        if any(col_type in column_mapping for _, _, column_mapping in frames)
+    ]
+    parts = []
+    for _, df, column_mapping in frames:
+        columns = {}
+        for c_idx, col_type in enumerate(types):
+            col = column_mapping.get(col_type)
+            if col is not None and col < len(df.columns):
+                columns[c_idx] = df.iloc[:, col].to_numpy()
+            else:
+                columns[c_idx] = np.full(len(df), None, dtype=object)
+        parts.append(pd.DataFrame(columns))
+    merged = pd.concat(parts, ignore_index=True)
+    return merged, {col_type: c_idx for c_idx, col_type in enumerate(types)}
+
+
+def check_sheet_mode(sheet_mode: str, output_format: str = 'xlsx'):
+    """
+    Проверка режима листов.
+
+    Raises:
+        ValueError: неизвестный режим или split не для xlsx
+    """
+    if sheet_mode not in SHEET_MODES:
+        raise ValueError(
+            f"Неизвестный режим листов: {sheet_mode} (допустимо: {', '.join(SHEET_MODES)})"
+        )
+    if sheet_mode == 'split' and output_format != 'xlsx':
+        raise ValueError("Режим листов split доступен только для формата xlsx")
+
+
 def process_file(file_path: str, 
                  discount_settings: Dict[str, int] = None,
-                 recalculate_existing: bool = False) -> Tuple[bool, str, Optional[str]]:
+                 recalculate_existing: bool = False,
+                 output_format: str = 'xlsx',
+                 sheet_mode: str = SHEET_MODE,
+                 template: str = EXCEL_TEMPLATE) -> Tuple[bool, str, Optional[str]]:
     """
     Удобная функция для обработки файла.
     
@@ -142,9 +564,60 @@ def process_file(file_path: str,
         file_path: Путь к файлу
         discount_settings: Настройки скидок
         recalculate_existing: Пересчитывать ли существующие цены
+        output_format: Формат результата: xlsx, csv, jsonl или parquet
+        sheet_mode: Листы книги: active, merge или split
+        template: Шаблон оформления xlsx (пусто - встроенное оформление)
     
     Returns:
         (success, message, output_filename)
     """
     processor = PriceProcessor(file_path)
-    return processor.process(discount_settings, recalculate_existing)
+    return processor.process(discount_settings, recalculate_existing,
+                             output_format=output_format, sheet_mode=sheet_mode, template=template)
+
+
+def process_file_with_stats(file_path: str,
+                            discount_settings: Dict[str, int] = None,
+                            recalculate_existing: bool = False,
+                            output_format: str = 'xlsx',
+                            sheet_mode: str = SHEET_MODE,
+                            template: str = EXCEL_TEMPLATE
+                            ) -> Tuple[bool, str, Optional[str], Dict[str, Dict]]:
+    """
+    Обработка файла с замером этапов.
+    
+    Returns:
+        (success, message, output_filename, timings), где timings -
+        {этап: {'seconds', 'rows', 'bytes'}}
+    """
+    processor = PriceProcessor(file_path)
+    success, message, output_filename = processor.process(
+        discount_settings, recalculate_existing, output_format=output_format, sheet_mode=sheet_mode,
+        template=template
+    )
+    return success, message, output_filename, processor.timings
+
+
+def process_bytes_with_stats(source: Union[bytes, BinaryIO],
+                             discount_settings: Dict[str, int] = None,
+                             recalculate_existing: bool = False,
+                             output_format: str = 'xlsx',
+                             sheet_mode: str = SHEET_MODE,
+                             template: str = EXCEL_TEMPLATE
+                             ) -> Tuple[bool, str, Optional[bytes], Dict[str, Dict]]:
+    """
+    Обработка в памяти: без чтения и записи файлов на диске.
+    
+    Args:
+        source: Содержимое файла (bytes) или файловый объект
+    
+    Returns:
+        (success, message, output_bytes, timings)
+    """
+    processor = PriceProcessor(source)
+    output = io.BytesIO()
+    success, message, _ = processor.process(
+        discount_settings, recalculate_existing, output=output, output_format=output_format,
+        sheet_mode=sheet_mode, template=template
+    )
+    return success, message, output.getvalue() if success else None, processor.timings
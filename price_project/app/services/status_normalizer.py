@@ -0,0 +1,166 @@
+"""
+Нормализация статусов товаров
+Маппинг статусов компилируется в одно регулярное выражение и применяется
+только к уникальным значениям колонки. Маппинг можно задать JSON-файлом
+(STATUS_MAPPING_FILE): при изменении файла он перечитывается без перезапуска.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import STATUS_MAPPING, STATUS_MAPPING_FILE
+
+
+logger = logging.getLogger(__name__)
+
+
+class _CompiledMapping:
+    """Маппинг, скомпилированный в выражение: группа на ключ в порядке приоритета"""
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.mapping = dict(mapping)
+        self.values = list(self.mapping.values())
+        # Каждый ключ ищется по всему тексту (как последовательные `key in text`),
+        # выигрывает первый по порядку маппинга
+        self.pattern = re.compile(
+            '^' + ''.join(f'(?:(?=.*?({re.escape(key)})))?' for key in self.mapping),
+            re.DOTALL
+        )
+        raw = json.dumps(list(self.mapping.items()), ensure_ascii=False)
+        self.digest = hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def normalize(self, status: str) -> str:
+        if not status or not self.mapping:
+            return status
+        found = self.pattern.match(status.lower().strip()).groups()
+        for value, group in zip(self.values, found):
+            if group is not None:
+                return value
+        # Если не найдено совпадений - возвращаем как есть
+        return status
+
+
+def load_status_mapping(path: str) -> Dict[str, str]:
+    """
+    Маппинг статусов из JSON-файла: {"подстрока статуса": "результат"}.
+    Порядок ключей - приоритет. Ключи приводятся к нижнему регистру.
+
+    Raises:
+        ValueError: файл не является JSON-объектом со строковыми значениями
+    """
+    with open(path, encoding='utf-8') as f:
+        mapping = json.load(f)
+    if not isinstance(mapping, dict) or not all(
+        isinstance(key, str) and isinstance(value, str) for key, value in mapping.items()
+    ):
+        raise ValueError(f"{path}: ожидается JSON-объект {{статус: результат}} со строками")
+    return {key.lower().strip(): value for key, value in mapping.items()}
+
+
+class StatusNormalizer:
+    """
+    Нормализация статусов по маппингу.
+    Маппинг из файла перечитывается при изменении файла; скомпилированное
+    выражение заменяется целиком, поэтому параллельная обработка видит
+    либо старый, либо новый маппинг.
+    """
+
+    def __init__(self,
+                 mapping: Optional[Dict[str, str]] = None,
+                 mapping_file: Optional[str] = STATUS_MAPPING_FILE):
+        """
+        Args:
+            mapping: Маппинг по умолчанию (None - STATUS_MAPPING из конфигурации)
+            mapping_file: JSON-файл маппинга (None - только маппинг по умолчанию)
+        """
+        self.default = _CompiledMapping(STATUS_MAPPING if mapping is None else mapping)
+        self.mapping_file = mapping_file
+        self._compiled = self.default
+        self._file_stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _file_state(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.mapping_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _current(self) -> _CompiledMapping:
+        """Актуальный маппинг: файл перечитывается, если изменился"""
+        if self.mapping_file is None:
+            return self._compiled
+        stamp = self._file_state()
+        if stamp == self._file_stamp:
+            return self._compiled
+        with self._lock:
+            if stamp != self._file_stamp:
+                self._reload(stamp)
+        return self._compiled
+
+    def _reload(self, stamp: Optional[Tuple[int, int]]):
+        self._file_stamp = stamp
+        if stamp is None:
+            logger.warning("Файл маппинга статусов %s не найден, используется маппинг по умолчанию",
+                           self.mapping_file)
+            self._compiled = self.default
+            return
+        try:
+            compiled = _CompiledMapping(load_status_mapping(self.mapping_file))
+        except (OSError, ValueError) as e:
+            # Ошибка в файле - остаёмся на прежнем маппинге до следующего изменения
+            logger.error("Маппинг статусов не загружен: %s", e)
+            return
+        self._compiled = compiled
+        logger.info("Маппинг статусов загружен из %s: %d статусов",
+                    self.mapping_file, len(compiled.mapping))
+
+    @property
+    def digest(self) -> Optional[str]:
+        """Отпечаток маппинга из файла (None - действует маппинг по умолчанию)"""
+        compiled = self._current()
+        return None if compiled is self.default else compiled.digest
+
+    def normalize(self, status: str) -> str:
+        """
+        Нормализация одного статуса.
+        Подстрока из маппинга -> результат, иначе статус как есть.
+        """
+        if not status:
+            return ""
+        return self._current().normalize(str(status))
+
+    def normalize_series(self, values: pd.Series) -> pd.Series:
+        """
+        Нормализация колонки статусов.
+        Выражение применяется к уникальным значениям, результат
+        раскладывается по строкам; пусто и NaN -> "".
+        Категориальная колонка остаётся категориальной.
+        """
+        compiled = self._current()
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Категориальная колонка: нормализуются только категории, коды пересчитываются
+            normalized = [compiled.normalize(str(status)) for status in values.cat.categories]
+            # Последний элемент - для пустых значений (код -1)
+            normalized.append("")
+            categories = pd.Index(pd.unique(np.array(normalized, dtype=object)))
+            codes = categories.get_indexer(normalized)[values.cat.codes.to_numpy()]
+            return pd.Series(pd.Categorical.from_codes(codes, categories),
+                             index=values.index, name=values.name)
+        missing = values.isna()
+        text = values.astype(str)
+        lookup = {status: compiled.normalize(status) for status in pd.unique(text[~missing])}
+        result = text.map(lookup).astype(object)
+        result[missing] = ""
+        return result
+
+
+# Общий нормализатор процесса (маппинг компилируется один раз)
+status_normalizer = StatusNormalizer()
@@ -2,65 +2,43 @@
 Модуль трансформации данных
 Нормализация статусов и расчёт специальных цен
 """
+import numpy as np
 import pandas as pd
 import re
-from typing import Dict, Optional, Tuple
-from app.core.utils import round_half_up, clean_text, parse_price
-from app.core.config import STATUS_MAPPING
+from typing import Dict
+from app.core.utils import round_half_up_array, parse_price_series
+from app.services.status_normalizer import status_normalizer
 
 
 class DataTransformer:
     """Трансформация данных: нормализация статусов и расчёт цен"""
     
-    # Паттерны маркеров
+    # Паттерны маркеров (порядок - приоритет, если в тексте их несколько)
     MARKER_PATTERNS = {
         'К2': r'[Кк][2]',
         'К3': r'[Кк][3]',
         'К4': r'[Кк][4]',
     }
     
+    # Все маркеры одним выражением: группа на маркер в порядке приоритета,
+    # каждая ищется по всему тексту (как последовательные re.search)
+    _MARKER_RE = re.compile(
+        '^' + ''.join(f'(?:(?=.*?({pattern})))?' for pattern in MARKER_PATTERNS.values()),
+        re.DOTALL
+    )
+    
     def __init__(self, df: pd.DataFrame, discount_settings: Dict[str, int]):
         """
         Инициализация трансформера.
         
         Args:
-            df: DataFrame с данными
+            df: DataFrame с данными (не меняется: копируются только
+                колонки, в которые пишет трансформация)
             discount_settings: Словарь {маркер: процент_скидки}
         """
-        self.df = df.copy()
+        self.df = df.copy(deep=False)
         self.discount_settings = discount_settings
         
-    def _find_marker(self, text: str) -> Optional[str]:
-        """
-        Поиск маркера в тексте.
-        Возвращает название маркера или None.
-        """
-        if not text:
-            return None
-        
-        text = str(text)
-        for marker, pattern in self.MARKER_PATTERNS.items():
-            if re.search(pattern, text):
-                return marker
-        return None
-    
-    def _normalize_status(self, status: str) -> str:
-        """
-        Нормализация статуса товара.
-        """
-        if not status:
-            return ""
-        
-        status_lower = str(status).lower().strip()
-        
-        # Проверяем маппинг
-        for key, value in STATUS_MAPPING.items():
-            if key in status_lower:
-                return value
-        
-        # Если не найдено совпадений - возвращаем как есть
-        return status
-    
     def normalize_statuses(self, status_col: int) -> 'DataTransformer':
         """
         Нормализация всех статусов в колонке.
@@ -68,16 +46,14 @@ class DataTransformer:
         "Новый", "new", "новинка" -> "" (пусто)
         "Ограничено годен", "брак", "уценка" -> "РАСПРОДАЖА"
         "Распродажа", "sale", "акция" -> "РАСПРОДАЖА"
+        
+        Маппинг применяется к уникальным значениям колонки.
         """
         if status_col >= len(self.df.columns):
             return self
         
-        def transform_status(val):
-            if pd.isna(val) or val is None:
-                return ""
-            return self._normalize_status(str(val))
-        
-        self.df.iloc[:, status_col] = self.df.iloc[:, status_col].apply(transform_status)
+        # Колонка заменяется целиком: у категориальной меняются категории
+        self.df.isetitem(status_col, status_normalizer.normalize_series(self.df.iloc[:, status_col]))
         return self
     
     def calculate_special_prices(
@@ -98,48 +74,60 @@ class DataTransformer:
         if any(col >= len(self.df.columns) for col in [name_col, status_col, special_price_col, retail_price_col]):
             return self
         
-        for idx in range(len(self.df)):
-            row = self.df.iloc[idx]
-            
-            # Получаем значения
-            name = clean_text(row.iloc[name_col] if name_col < len(row) else None)
-            status = clean_text(row.iloc[status_col] if status_col < len(row) else None)
-            special_price = parse_price(row.iloc[special_price_col] if special_price_col < len(row) else None)
-            retail_price = parse_price(row.iloc[retail_price_col] if retail_price_col < len(row) else None)
-            
-            # Ищем маркер в названии и статусе
-            combined_text = f"{name} {status}"
-            marker = self._find_marker(combined_text)
-            
-            if not marker:
-                continue
-            
-            # Проверяем, есть ли уже спец. цена
-            has_special_price = special_price > 0
-            
-            # Логика для К4 (исключение)
-            if marker == 'К4':
-                if has_special_price:
-                    # Не пересчитываем, оставляем как есть
-                    # Только устанавливаем статус РАСПРОДАЖА
-                    self.df.iloc[idx, status_col] = "РАСПРОДАЖА"
-                else:
-                    # Если цены нет, все равно ставим РАСПРОДАЖА
-                    # (товар с К4 но без цены - тоже распродажа)
-                    self.df.iloc[idx, status_col] = "РАСПРОДАЖА"
-                continue
-            
-            # Логика для остальных маркеров (К2, К3, Л3)
-            if marker in self.discount_settings:
-                discount = self.discount_settings[marker]
-                
-                # Если цены нет или настроен пересчёт
-                if not has_special_price or recalculate_existing:
-                    if retail_price > 0:
-                        # Формула: Спец.цена = ОКРУГЛ(Розничная × (1 - P/100); 0)
-                        new_price = round_half_up(retail_price * (1 - discount / 100))
-                        self.df.iloc[idx, special_price_col] = new_price
-                        self.df.iloc[idx, status_col] = "РАСПРОДАЖА"
+        name = self.df.iloc[:, name_col]
+        status = self.df.iloc[:, status_col]
+        special_price = parse_price_series(self.df.iloc[:, special_price_col])
+        retail_price = parse_price_series(self.df.iloc[:, retail_price_col])
+        
+        # Ищем маркер в названии и статусе
+        combined_text = name.astype(str) + ' ' + status.astype(str)
+        found = combined_text.str.extract(self._MARKER_RE).notna().to_numpy()
+        markers = np.array(list(self.MARKER_PATTERNS))
+        marker = np.where(found.any(axis=1), markers[found.argmax(axis=1)], None)
+        
+        # Проверяем, есть ли уже спец. цена
+        has_special_price = special_price > 0
+        
+        # К4 (исключение): цену не пересчитываем, только статус РАСПРОДАЖА
+        # (товар с К4 но без цены - тоже распродажа)
+        is_k4 = marker == 'К4'
+        
+        # Остальные маркеры (К2, К3, Л3): считаем, если цены нет или настроен пересчёт
+        discount = np.full(len(self.df), np.nan)
+        for marker_name, percent in self.discount_settings.items():
+            if marker_name != 'К4':
+                discount[marker == marker_name] = percent
+        to_recalculate = (
+            ~np.isnan(discount)
+            & (~has_special_price | recalculate_existing)
+            & (retail_price > 0)
+        )
+        
+        # Формула: Спец.цена = ОКРУГЛ(Розничная × (1 - P/100); 0)
+        new_prices = round_half_up_array(
+            retail_price[to_recalculate] * (1 - discount[to_recalculate] / 100)
+        )
+        price_dtype = self.df.dtypes.iloc[special_price_col]
+        if price_dtype == object:
+            new_prices = new_prices.astype(object)
+        elif price_dtype == np.float32 and (new_prices.astype(np.float32) != new_prices).any():
+            # Цена не представима во float32 - колонка расширяется до float64
+            price_dtype = np.float64
+        if isinstance(status.dtype, pd.CategoricalDtype) and "РАСПРОДАЖА" not in status.cat.categories:
+            self.df.isetitem(status_col, status.cat.add_categories("РАСПРОДАЖА"))
+        
+        # Запись по маске в копию колонки, которая затем заменяется целиком:
+        # данные исходного DataFrame не меняются
+        recalc_rows = np.flatnonzero(to_recalculate)
+        if len(recalc_rows):
+            prices = self.df.iloc[:, special_price_col].astype(price_dtype, copy=True)
+            prices.iloc[recalc_rows] = new_prices
+            self.df.isetitem(special_price_col, prices)
+        sale_rows = np.flatnonzero(is_k4 | to_recalculate)
+        if len(sale_rows):
+            statuses = self.df.iloc[:, status_col].copy()
+            statuses.iloc[sale_rows] = "РАСПРОДАЖА"
+            self.df.isetitem(status_col, statuses)
         
         return self
     
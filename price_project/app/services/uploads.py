@@ -0,0 +1,145 @@
+"""
+Приём загружаемых файлов
+Файл читается частями без блокировки event loop, сразу считается SHA-256,
+загрузка прерывается, как только превышен MAX_FILE_SIZE. Тело запроса
+ограничивается ещё до разбора формы (UploadLimitMiddleware).
+"""
+import hashlib
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from typing import Iterable, Tuple
+from uuid import uuid4
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app.core.config import MAX_FILE_SIZE, UPLOAD_CHUNK_SIZE, UPLOAD_DIR, SPOOL_MAX_SIZE
+
+
+class UploadTooLargeError(Exception):
+    """Файл больше MAX_FILE_SIZE"""
+
+
+class UploadLimitMiddleware:
+    """
+    Ограничение размера тела запроса загрузки (ASGI-middleware).
+    Запрос с большим Content-Length отклоняется до чтения тела, запрос без
+    него (chunked) - как только прочитано больше max_bytes. Multipart-форма
+    разбирается целиком до вызова обработчика, поэтому проверки размера
+    в save_upload/spool_upload для такого запроса недостаточно.
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_bytes: int, detail: str):
+        """
+        Args:
+            app: Следующее ASGI-приложение
+            paths: Пути, принимающие файлы (POST)
+            max_bytes: Максимальный размер тела запроса
+            detail: Текст ошибки 413
+        """
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_bytes = max_bytes
+        self.detail = detail
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": self.detail})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # HTTPException проходит через разбор формы и обработчики ошибок как есть
+                    raise HTTPException(status_code=413, detail=self.detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def unique_upload_path(filename: str, name: str = None) -> Path:
+    """
+    Уникальный путь для загружаемого файла (исходное имя не используется,
+    чтобы одновременные загрузки одноимённых файлов не перезаписывали друг друга)
+    """
+    return UPLOAD_DIR / f"{name or uuid4().hex}{Path(filename).suffix.lower()}"
+
+
+async def save_upload(file: UploadFile,
+                      file_path: Path,
+                      max_size: int = MAX_FILE_SIZE) -> Tuple[str, int]:
+    """
+    Сохранение загрузки частями по UPLOAD_CHUNK_SIZE.
+
+    Returns:
+        (sha256, размер в байтах)
+
+    Raises:
+        UploadTooLargeError: файл больше max_size (частичный файл удаляется)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(
+                        f"Файл больше {max_size // (1024 * 1024)} МБ"
+                    )
+                digest.update(chunk)
+                await buffer.write(chunk)
+    except BaseException:
+        Path(file_path).unlink(missing_ok=True)
+        raise
+    return digest.hexdigest(), size
+
+
+async def spool_upload(file: UploadFile,
+                       max_size: int = MAX_FILE_SIZE,
+                       spool_size: int = SPOOL_MAX_SIZE) -> Tuple[SpooledTemporaryFile, str, int]:
+    """
+    Приём загрузки в буфер: до spool_size байт - в памяти, больше -
+    во временном файле в UPLOAD_DIR (удаляется при закрытии буфера).
+
+    Returns:
+        (буфер, установленный на начало; sha256; размер в байтах)
+
+    Raises:
+        UploadTooLargeError: файл больше max_size
+    """
+    buffer = SpooledTemporaryFile(max_size=spool_size, dir=UPLOAD_DIR)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLargeError(
+                    f"Файл больше {max_size // (1024 * 1024)} МБ"
+                )
+            digest.update(chunk)
+            # Запись на диск (после перехода буфера в файл) - вне event loop
+            if size > spool_size:
+                await run_in_threadpool(buffer.write, chunk)
+            else:
+                buffer.write(chunk)
+    except BaseException:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    return buffer, digest.hexdigest(), size
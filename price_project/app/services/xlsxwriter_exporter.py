@@ -0,0 +1,161 @@
+"""
+Экспорт в Excel через xlsxwriter
+Режим constant_memory: каждая строка сбрасывается во временный файл сразу
+после записи, память не зависит от размера прайса. Оформление - то же,
+что у ExcelExporter.
+"""
+import time
+from typing import BinaryIO, Optional, Union
+
+import pandas as pd
+import xlsxwriter
+
+from app.services.exporter import BaseExporter
+
+
+class XlsxWriterExporter(BaseExporter):
+    """Экспорт данных в Excel с корпоративным стилем (xlsxwriter, постоянная память)"""
+
+    # Стили оформления (как в ExcelExporter)
+    BORDER = {'border': 1, 'border_color': '#000000'}
+    HEADER_FORMAT = {
+        'font_name': 'Arial', 'font_size': 12, 'bold': True, 'font_color': '#FFFFFF',
+        'bg_color': '#444444', 'pattern': 1, 'align': 'center', 'valign': 'vcenter', **BORDER,
+    }
+    DATA_FORMAT = {'font_name': 'Arial', 'font_size': 10, **BORDER}
+    PRICE_FORMAT = {'num_format': '# ##0', 'align': 'right', 'valign': 'vcenter'}
+    SALE_FORMAT = {'bg_color': '#FFCCCC', 'pattern': 1}
+    SALE_STATUS_FORMAT = {'font_size': 10, 'bold': True, 'font_color': '#FF0000'}
+    CATEGORY_FORMAT = {
+        'font_size': 11, 'bold': True, 'bg_color': '#D6EAF8', 'pattern': 1,
+        'align': 'left', 'valign': 'vcenter',
+    }
+    DOC_HEADER_FORMAT = {
+        'font_name': 'Arial', 'font_size': 14, 'bold': True, 'align': 'center', 'valign': 'vcenter',
+    }
+    DOC_HEADER_FORMAT_SMALL = {'font_name': 'Arial', 'font_size': 10}
+
+    CELL_PADDING = 5 / 7
+
+    WORKBOOK_OPTIONS = {
+        'constant_memory': True,
+        # Текст пишется как есть: без превращения адресов в гиперссылки
+        'strings_to_urls': False,
+        'default_date_format': 'yyyy-mm-dd h:mm:ss',
+    }
+
+    def __init__(self, df: pd.DataFrame, column_mapping: dict,
+                 sheet_title: str = BaseExporter.SHEET_TITLE):
+        """
+        Args:
+            df: DataFrame с данными
+            column_mapping: Словарь {тип_колонки: индекс}
+            sheet_title: Название листа
+        """
+        super().__init__(df, column_mapping)
+        self.sheet_title = sheet_title
+        self._format_cache = {}
+
+    @classmethod
+    def new_workbook(cls, output_path: Union[str, BinaryIO]) -> xlsxwriter.Workbook:
+        """Книга для записи листов (сохраняется при close())"""
+        return xlsxwriter.Workbook(output_path, cls.WORKBOOK_OPTIONS)
+
+    def _data_format(self, wb: xlsxwriter.Workbook, is_category: bool, is_sale: bool,
+                     is_price: bool, is_status: bool):
+        """Формат ячейки данных (один объект на каждое сочетание признаков)"""
+        key = (is_category, is_sale, is_price, is_status)
+        fmt = self._format_cache.get(key)
+        if fmt is None:
+            props = dict(self.DATA_FORMAT)
+            if is_price:
+                props.update(self.PRICE_FORMAT)
+            if is_category:
+                props.update(self.CATEGORY_FORMAT)
+            if is_sale:
+                props.update(self.SALE_FORMAT)
+                if is_status:
+                    props.update(self.SALE_STATUS_FORMAT)
+            fmt = wb.add_format(props)
+            self._format_cache[key] = fmt
+        return fmt
+
+    def export(self, output_path: Optional[Union[str, BinaryIO]] = None) -> Union[str, BinaryIO]:
+        # Имя файла
+        if output_path is None:
+            output_path = self._default_output_path()
+
+        wb = self.new_workbook(output_path)
+        self.write_sheet(wb)
+
+        # Сохранение книги (сборка zip из временных файлов строк)
+        start = time.perf_counter()
+        wb.close()
+        self.save_seconds = time.perf_counter() - start
+
+        return output_path
+
+    def write_sheet(self, wb: xlsxwriter.Workbook):
+        """Запись данных с оформлением на новый лист книги"""
+        headers, price_cols, output_data = self._build_output()
+        num_cols = len(headers)
+        status_col_idx = 2 if 'status' in self.column_mapping else 1
+        date_str = self._document_date()
+
+        ws = wb.add_worksheet(self.sheet_title)
+        self._format_cache = {}
+
+        # В режиме constant_memory строки пишутся строго по порядку (0-based)
+        max_lengths = [0] * num_cols
+
+        def track(c_idx: int, value):
+            if value and c_idx < num_cols:
+                max_lengths[c_idx] = max(max_lengths[c_idx], len(str(value)))
+
+        # Шапка документа (строки 1-6)
+        title_format = wb.add_format(self.DOC_HEADER_FORMAT)
+        if num_cols > 1:
+            ws.merge_range(0, 0, 0, num_cols - 1, self.DOC_TITLE, title_format)
+        else:
+            ws.write_string(0, 0, self.DOC_TITLE, title_format)
+        ws.set_row(1, 15)
+        small_format = wb.add_format(self.DOC_HEADER_FORMAT_SMALL)
+        ws.write_string(2, 0, date_str, small_format)
+        ws.set_row(3, 15)
+        ws.write_string(4, 0, self.DOC_RESPONSIBLE, small_format)
+        for value in (self.DOC_TITLE, date_str, self.DOC_RESPONSIBLE):
+            track(0, value)
+
+        # Заголовок таблицы (строка 7)
+        header_row = self.DOC_HEADER_ROWS
+        header_format = wb.add_format(self.HEADER_FORMAT)
+        for c_idx, header in enumerate(headers):
+            ws.write_string(header_row, c_idx, header, header_format)
+            track(c_idx, header)
+
+        # Данные
+        row = header_row
+        for row_values in self._iter_output_rows(output_data):
+            row += 1
+            is_category = self._is_category_header(row_values)
+            is_sale = len(row_values) > 1 and row_values[1] == "РАСПРОДАЖА"
+            for c_idx, value in enumerate(row_values):
+                fmt = self._data_format(
+                    wb, is_category, is_sale,
+                    is_price=c_idx + 1 in price_cols, is_status=c_idx + 1 == status_col_idx
+                )
+                if value is None:
+                    ws.write_blank(row, c_idx, None, fmt)
+                else:
+                    ws.write(row, c_idx, value, fmt)
+                track(c_idx, value)
+        data_rows = row - header_row
+
+        # Ширины колонок и автофильтр хранятся отдельно от строк - задаются в конце.
+        # xlsxwriter добавляет к ширине поля ячейки (5 пикселей при 7 на символ),
+        # вычитаем их, чтобы в файл попала та же ширина, что пишет openpyxl
+        for c_idx, max_length in enumerate(max_lengths):
+            width = min(max_length + 2, self.MAX_COLUMN_WIDTH)
+            ws.set_column(c_idx, c_idx, width - self.CELL_PADDING)
+        if num_cols > 0 and data_rows > 0:
+            ws.autofilter(header_row, 0, row, num_cols - 1)
@@ -0,0 +1,182 @@
+"""
+Генератор синтетических прайс-листов для бенчмарков
+Структура повторяет реальную выгрузку поставщика (data/Data.xlsx):
+шапка документа, двухстрочный заголовок таблицы, строки категорий,
+повторы заголовка, маркеры К2/К3/К4 и разные написания статусов.
+
+Использование:
+  python benchmarks/generate_price_list.py
+  python benchmarks/generate_price_list.py --rows 1000 10000 --seed 1
+"""
+import argparse
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, Optional
+
+from openpyxl import Workbook
+
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+# Максимум строк на листе Excel
+EXCEL_MAX_ROWS = 1_048_576
+
+BRANDS = ["DULUX", "LUXIUM", "TIKKURILA", "BOSTIK", "CERESIT", "MARSHALL", "PUFAS", "KUDO"]
+GROUPS = ["1-АКЗО НОБЕЛЬ ДЕКОР", "ВД КРАСКИ", "ЭМАЛИ", "ГРУНТЫ", "КЛЕИ", "ГЕРМЕТИКИ", "ЛАКИ"]
+PRODUCTS = ["Краска в/д", "Эмаль ПФ-115", "Грунт глубокого проникновения", "Клей плиточный",
+            "Герметик силиконовый", "Лак яхтный", "Колер", "Шпатлевка финишная"]
+SERIES = ["Professional BINDO 3", "Professional BINDO 7", "DIAMOND EXTRA MATT", "ULTRA RESIST",
+          "3D White", "EXPERT", "TINTALY B1", "FACADE"]
+FINISHES = ["матовая", "полуматовая", "глубокоматовая", "глянцевая", "г/матовая"]
+BASES = ["BW", "BC", "BA"]
+VOLUMES = ["0,9 л", "1 л", "2,25 л", "2,5 л", "4,5 л", "9 л", "10 л", "15 л"]
+
+# Статусы с весами: основная масса - "Новый", остальное - варианты распродажи
+STATUSES = [
+    ("Новый", 70), ("новый ", 4), ("НОВИНКА", 2), ("New", 1), (None, 3),
+    ("Ограниченно годен", 10), ("ограничено годен", 2), ("Уценка", 2), ("Брак", 1),
+    ("Распродажа", 2), ("Sale", 1), ("Акция", 1), ("Срок годности истекает", 1),
+]
+MARKERS = [(None, 88), ("К2", 7), ("К3", 3), ("К4", 2)]
+
+# Повтор заголовка таблицы (как при разрыве страниц в выгрузке)
+REPEAT_HEADER_EVERY = 5000
+
+HEADER_TOP = ("Номенклатура", None, None, "ФРС Спец.цены Акция", "ФРС Розничная цена")
+HEADER_BOTTOM = ("Код товара", "Качество", "Номенклатура", "Цена", "Цена")
+
+
+def _weighted(rng: random.Random, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def _product_row(rng: random.Random, brand: str, code: int) -> tuple:
+    """Строка товара"""
+    marker = _weighted(rng, MARKERS)
+    name = (f"{brand} {rng.choice(PRODUCTS)} {rng.choice(SERIES)} "
+            f"{rng.choice(FINISHES)} {rng.choice(BASES)} {rng.choice(VOLUMES)}")
+    if marker is not None:
+        name += rng.choice([f", {marker}", f" {marker}", f",{marker}"])
+
+    # Код: как в выгрузке - строка с хвостовыми пробелами, иногда число
+    code_cell = code if rng.random() < 0.1 else f"{code}    "
+
+    # Розничная цена: целое, дробное или строка с пробелами и запятой
+    retail = rng.randint(100, 30000)
+    kind = rng.random()
+    if kind < 0.1:
+        retail_cell = retail + rng.choice([0.5, 0.25, 0.99])
+    elif kind < 0.15:
+        retail_cell = f"{retail:,}".replace(",", " ") + ",00"
+    elif kind < 0.17:
+        retail_cell = None
+    else:
+        retail_cell = retail
+
+    # Спец. цена: у К4 часто заполнена, у остальных - изредка
+    special_cell = None
+    if (marker == "К4" and rng.random() < 0.5) or rng.random() < 0.02:
+        special_cell = round(retail * rng.uniform(0.4, 0.9))
+
+    return (code_cell, _weighted(rng, STATUSES), name, special_cell, retail_cell)
+
+
+def iter_price_list_rows(rows: int, seed: int = 0, report_date: Optional[date] = None) -> Iterator[tuple]:
+    """
+    Строки листа прайс-листа (всего rows строк, включая шапку и категории).
+    Одинаковые rows и seed дают одинаковый файл.
+    """
+    rng = random.Random(seed)
+    report_date = report_date or date(2026, 2, 19) + timedelta(days=seed)
+
+    head = [
+        (None,),
+        ("Параметры:", f"Дата отчета: {report_date:%d.%m.%Y}"),
+        (None,),
+        (f"Прайс-лист на {report_date:%d.%m.%Y}",),
+        (None,),
+        HEADER_TOP,
+        HEADER_BOTTOM,
+    ]
+    footer = [
+        (None,),
+        ("Ответственный: Менеджер по продажам",),
+    ]
+
+    emitted = 0
+    for row in head:
+        yield row
+        emitted += 1
+
+    body_end = rows - len(footer)
+    code = 7000000
+    since_header = 0
+    while emitted < body_end:
+        # Новый раздел: группа и бренд
+        brand = rng.choice(BRANDS)
+        for row in [(rng.choice(GROUPS),), (brand,)]:
+            if emitted < body_end:
+                yield row
+                emitted += 1
+
+        for _ in range(rng.randint(20, 300)):
+            if emitted >= body_end:
+                break
+            if since_header >= REPEAT_HEADER_EVERY:
+                yield HEADER_BOTTOM
+                emitted += 1
+                since_header = 0
+                continue
+            code += rng.randint(1, 3)
+            yield _product_row(rng, brand, code)
+            emitted += 1
+            since_header += 1
+
+    for row in footer:
+        yield row
+
+
+def generate_price_list(path: Path, rows: int, seed: int = 0) -> Path:
+    """Запись прайс-листа на rows строк в path (потоковая запись openpyxl)"""
+    if rows > EXCEL_MAX_ROWS:
+        raise ValueError(f"Лист Excel вмещает не больше {EXCEL_MAX_ROWS} строк")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Лист1")
+    for row in iter_price_list_rows(rows, seed):
+        ws.append(row)
+    wb.save(path)
+    return path
+
+
+def dataset_path(rows: int, seed: int = 0, data_dir: Path = DATA_DIR) -> Path:
+    """Путь к файлу набора данных заданного размера"""
+    return Path(data_dir) / f"price_{rows}_s{seed}.xlsx"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетических прайс-листов")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Размеры (строк на листе), по умолчанию 1k 10k 100k 1M")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора (по умолчанию 0)")
+    parser.add_argument("--out", type=str, default=str(DATA_DIR), help="Каталог для файлов")
+    parser.add_argument("--force", action="store_true", help="Перезаписать существующие файлы")
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        path = dataset_path(rows, args.seed, Path(args.out))
+        if path.exists() and not args.force:
+            print(f"[SKIP] {path} уже есть")
+            continue
+        generate_price_list(path, rows, args.seed)
+        print(f"[OK] {path} ({path.stat().st_size / 1024 / 1024:.1f} МБ)")
+
+
+if __name__ == "__main__":
+    main()
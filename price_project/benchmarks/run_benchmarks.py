@@ -0,0 +1,300 @@
+"""
+Бенчмарк обработки прайс-листов
+Каждый прогон идёт в отдельном процессе: замеряется время каждого этапа
+(ExcelParser, DataCleaner, DataTransformer, экспортёр), память DataFrame
+после каждого этапа и пиковый RSS.
+
+Использование:
+  python benchmarks/run_benchmarks.py
+  python benchmarks/run_benchmarks.py --rows 1000 10000 100000 1000000 --repeat 3
+  python benchmarks/run_benchmarks.py --files data/Data.xlsx --json before.json
+  python benchmarks/run_benchmarks.py --streaming
+  python benchmarks/run_benchmarks.py --backend xlsxwriter
+  python benchmarks/run_benchmarks.py --engine openpyxl
+  python benchmarks/run_benchmarks.py --no-compact
+"""
+import sys
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Добавляем корень проекта в путь
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from generate_price_list import dataset_path, generate_price_list
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_ROWS = [1_000, 10_000, 100_000]
+DISCOUNT_SETTINGS = {"К2": 30, "К3": 40}
+STAGES = ["parse", "clean", "transform", "export"]
+# Этапы, после которых замеряется память DataFrame
+MEMORY_STAGES = ["parse", "clean", "transform"]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Пиковый RSS текущего процесса (МБ), None - если не поддерживается"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux - килобайты, macOS - байты
+    if sys.platform == "darwin":
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+def _run_standard(file_path: str, output_path: str, backend: str) -> Dict:
+    """Обычный режим: этапы вызываются по отдельности"""
+    from app.services.parser import ExcelParser
+    from app.services.cleaner import DataCleaner
+    from app.services.transformer import DataTransformer
+    from app.services.exporter import create_exporter
+    from app.services.compactor import compact_frame, frame_memory
+    from app.services.processor import DEFAULT_COLUMN_MAPPING as mapping
+    from app.core.config import COMPACT_FRAMES
+
+    stages = {}
+    rows = {}
+    memory = {}
+
+    start = time.perf_counter()
+    parser = ExcelParser(file_path)
+    try:
+        df = parser.read_raw_data()
+    finally:
+        parser.close()
+    if COMPACT_FRAMES:
+        df = compact_frame(df, mapping)
+    stages["parse"] = time.perf_counter() - start
+    rows["parse"] = len(df)
+    memory["parse"] = frame_memory(df)
+
+    start = time.perf_counter()
+    df = DataCleaner(df).clean()
+    stages["clean"] = time.perf_counter() - start
+    rows["clean"] = len(df)
+    memory["clean"] = frame_memory(df)
+
+    start = time.perf_counter()
+    df = DataTransformer(df, DISCOUNT_SETTINGS).transform(
+        status_col=mapping["status"],
+        name_col=mapping["name"],
+        special_price_col=mapping["special_price"],
+        retail_price_col=mapping["retail_price"],
+    )
+    stages["transform"] = time.perf_counter() - start
+    rows["transform"] = len(df)
+    memory["transform"] = frame_memory(df)
+
+    start = time.perf_counter()
+    create_exporter(df, mapping, backend=backend).export(output_path)
+    stages["export"] = time.perf_counter() - start
+    rows["export"] = len(df)
+
+    return {"stages": stages, "rows": rows, "memory": memory}
+
+
+def _run_streaming(file_path: str, output_path: str) -> Dict:
+    """Потоковый режим: полный цикл PriceProcessor, этапы - из его замеров"""
+    from app.services import processor as processor_module
+    from app.services.processor import PriceProcessor
+
+    processor = PriceProcessor(file_path, streaming=True)
+    success, message, output_filename = processor.process(DISCOUNT_SETTINGS)
+    if not success:
+        raise RuntimeError(message)
+    shutil.move(str(processor_module.OUTPUT_DIR / output_filename), output_path)
+
+    # Сохранение книги считаем частью экспорта, как в обычном режиме
+    timings = processor.timings
+    stages = {stage: timings[stage]["seconds"] for stage in STAGES}
+    stages["export"] += timings["save"]["seconds"]
+    rows = {stage: timings[stage]["rows"] for stage in STAGES}
+    memory = {stage: timings[stage]["memory"] for stage in MEMORY_STAGES}
+    return {"stages": stages, "rows": rows, "memory": memory}
+
+
+def run_once(file_path: str, streaming: bool, backend: str, engine: str, compact: bool) -> Dict:
+    """Один прогон (выполняется в отдельном процессе)"""
+    # Модули приложения импортируются в процессе прогона - движки берутся из config
+    os.environ["EXPORTER_BACKEND"] = backend
+    os.environ["READER_ENGINE"] = engine
+    os.environ["COMPACT_FRAMES"] = "1" if compact else "0"
+    baseline_rss = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "result.xlsx")
+        if streaming:
+            result = _run_streaming(file_path, output_path)
+        else:
+            result = _run_standard(file_path, output_path, backend)
+        result["output_bytes"] = os.path.getsize(output_path)
+    result["total"] = sum(result["stages"].values())
+    result["baseline_rss_mb"] = baseline_rss
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_isolated(file_path: str, streaming: bool, backend: str, engine: str, compact: bool) -> Dict:
+    """Прогон в новом процессе, чтобы пиковый RSS относился только к нему"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(run_once, file_path, streaming, backend, engine, compact).result()
+
+
+def environment_info() -> Dict:
+    """Версии и окружение для сравнения результатов"""
+    import numpy
+    import openpyxl
+    import pandas
+
+    try:
+        import xlsxwriter
+        xlsxwriter_version = xlsxwriter.__version__
+    except ImportError:
+        xlsxwriter_version = None
+
+    try:
+        from importlib.metadata import version
+        calamine_version = version("python-calamine")
+    except ImportError:
+        calamine_version = None
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "openpyxl": openpyxl.__version__,
+        "xlsxwriter": xlsxwriter_version,
+        "python-calamine": calamine_version,
+    }
+
+
+def summarize(file_path: Path, runs: List[Dict]) -> Dict:
+    """Медианы времени этапов по повторам и максимальный пиковый RSS"""
+    stage_names = [s for s in STAGES if s in runs[0]["stages"]]
+    rss = [r["peak_rss_mb"] for r in runs if r["peak_rss_mb"] is not None]
+    return {
+        "file": str(file_path),
+        "input_bytes": file_path.stat().st_size,
+        "rows": runs[0]["rows"],
+        "output_bytes": runs[0]["output_bytes"],
+        "stages": {s: statistics.median(r["stages"][s] for r in runs) for s in stage_names},
+        "memory": runs[0]["memory"],
+        "total": statistics.median(r["total"] for r in runs),
+        "peak_rss_mb": max(rss) if rss else None,
+        "runs": runs,
+    }
+
+
+def print_summary(results: List[Dict], streaming: bool, backend: str, engine: str, compact: bool):
+    stage_names = [s for s in STAGES if s in results[0]["stages"]] if results else STAGES
+    header = f"{'Файл':<28}{'Строк':>10}" + "".join(f"{s:>11}" for s in stage_names)
+    header += f"{'Всего, с':>11}{'Строк/с':>11}{'RSS, МБ':>10}"
+
+    print("=" * len(header))
+    print(f"Бенчмарк ({'потоковый' if streaming else 'обычный'} режим, чтение - {engine}, "
+          f"запись - {backend}, типы - {'компактные' if compact else 'object'}), "
+          f"время этапов - медиана, с")
+    print("-" * len(header))
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        rows = r["rows"].get("parse")
+        line = f"{Path(r['file']).name[:27]:<28}{rows if rows is not None else '-':>10}"
+        line += "".join(f"{r['stages'][s]:>11.3f}" for s in stage_names)
+        throughput = f"{rows / r['total']:.0f}" if rows else "-"
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "-"
+        line += f"{r['total']:>11.3f}{throughput:>11}{rss:>10}"
+        print(line)
+    print("=" * len(header))
+
+    # Память DataFrame после этапов (в потоковом режиме - сумма по частям)
+    print("Память DataFrame после этапа, МБ")
+    print(f"{'Файл':<28}" + "".join(f"{s:>11}" for s in MEMORY_STAGES))
+    for r in results:
+        line = f"{Path(r['file']).name[:27]:<28}"
+        for stage in MEMORY_STAGES:
+            memory = r["memory"].get(stage)
+            line += f"{memory / 1024 / 1024:>11.1f}" if memory is not None else f"{'-':>11}"
+        print(line)
+    print("=" * len(header))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк обработки прайс-листов")
+    parser.add_argument("--rows", type=int, nargs="+", default=None,
+                        help="Размеры синтетических файлов (по умолчанию 1k 10k 100k)")
+    parser.add_argument("--files", type=str, nargs="+", default=None,
+                        help="Готовые файлы вместо синтетических")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора (по умолчанию 0)")
+    parser.add_argument("--repeat", type=int, default=1, help="Повторов на файл (по умолчанию 1)")
+    parser.add_argument("--streaming", action="store_true", help="Потоковый режим обработки")
+    parser.add_argument("--backend", choices=["openpyxl", "xlsxwriter"], default="openpyxl",
+                        help="Движок записи Excel (по умолчанию openpyxl)")
+    parser.add_argument("--engine", choices=["auto", "openpyxl", "calamine"], default="auto",
+                        help="Движок чтения Excel (по умолчанию auto)")
+    parser.add_argument("--no-compact", dest="compact", action="store_false",
+                        help="Без компактных типов колонок (для сравнения памяти)")
+    parser.add_argument("--json", type=str, default=None, help="Сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    files = [Path(f) for f in args.files or []]
+    if not files or args.rows:
+        for rows in args.rows or DEFAULT_ROWS:
+            path = dataset_path(rows, args.seed)
+            if not path.exists():
+                print(f"Генерация {path.name}...")
+                generate_price_list(path, rows, args.seed)
+            files.append(path)
+
+    results = []
+    for file_path in files:
+        runs = [run_isolated(str(file_path), args.streaming, args.backend, args.engine, args.compact)
+                for _ in range(args.repeat)]
+        results.append(summarize(file_path, runs))
+
+    print_summary(results, args.streaming, args.backend, args.engine, args.compact)
+
+    if args.json:
+        report = {
+            "environment": environment_info(),
+            "streaming": args.streaming,
+            "backend": args.backend,
+            "engine": args.engine,
+            "compact": args.compact,
+            "repeat": args.repeat,
+            "results": results,
+        }
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Результаты сохранены: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,239 @@
 """
 Консольный скрипт для обработки прайс-листов
-Использование: python cli.py <путь_к_файлу> [--k2 30] [--k3 40] [--l3 50]
+Использование: python cli.py <файл|каталог|маска> ... [--k2 30] [--k3 40] [--jobs 4] [--format csv]
 """
 import sys
+import os
 import argparse
+import glob
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, List, Optional
 
 # Добавляем корень проекта в путь
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app.services.processor import process_file
+from app.core.config import OUTPUT_DIR, INPUT_SUFFIXES, SHEET_MODE, EXCEL_TEMPLATE
+from app.services.exporter import OUTPUT_FORMATS, check_output_format
+from app.services.excel_template import check_template
+from app.services.processor import SHEET_MODES, check_sheet_mode, process_file_with_stats
+
+
+GLOB_CHARS = ('*', '?', '[')
+
+
+def _is_price_file(path: Path) -> bool:
+    # ~$... - файлы блокировки Excel
+    return path.suffix.lower() in INPUT_SUFFIXES and not path.name.startswith('~$')
+
+
+def read_manifest(manifest_path: str) -> List[str]:
+    """Пути из файла-списка: по одному на строке, # - комментарий"""
+    entries = []
+    base_dir = Path(manifest_path).parent
+    with open(manifest_path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            path = Path(line)
+            entries.append(str(path if path.is_absolute() else base_dir / path))
+    return entries
+
+
+def collect_files(inputs: List[str], recursive: bool = False) -> List[Path]:
+    """
+    Список прайс-листов (Excel, CSV/TSV) из файлов, каталогов и масок (без повторов).
+    Несуществующие пути возвращаются как есть - ошибка будет при обработке.
+    """
+    files = []
+    for item in inputs:
+        if any(ch in item for ch in GLOB_CHARS):
+            matches = sorted(Path(p) for p in glob.glob(item, recursive=True))
+            files.extend(p for p in matches if p.is_file() and _is_price_file(p))
+        elif Path(item).is_dir():
+            pattern = '**/*' if recursive else '*'
+            files.extend(sorted(p for p in Path(item).glob(pattern) if p.is_file() and _is_price_file(p)))
+        else:
+            files.append(Path(item))
+
+    unique = []
+    seen = set()
+    for path in files:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def process_one(file_path: str,
+                discount_settings: Dict[str, int],
+                recalculate_existing: bool,
+                output_path: Optional[str] = None,
+                output_format: str = 'xlsx',
+                sheet_mode: str = SHEET_MODE,
+                template: str = EXCEL_TEMPLATE,
+                overwrite: bool = True) -> Dict:
+    """
+    Обработка одного файла (выполняется в процессе пула).
+    Без overwrite существующий output_path не перезаписывается - это ошибка.
+    """
+    start = time.perf_counter()
+    result = {
+        'file': file_path,
+        'success': False,
+        'message': '',
+        'output': None,
+        'rows': 0,
+        'bytes': 0,
+        'seconds': 0.0,
+    }
+    try:
+        if output_path is not None and not overwrite and Path(output_path).exists():
+            raise FileExistsError(f"файл результата уже существует: {output_path}")
+        result['bytes'] = os.path.getsize(file_path)
+        success, message, output_filename, timings = process_file_with_stats(
+            file_path, discount_settings, recalculate_existing, output_format, sheet_mode, template
+        )
+        result['success'] = success
+        result['message'] = message
+        if success:
+            result['rows'] = timings['parse']['rows'] or 0
+            output = OUTPUT_DIR / output_filename
+            if output_path is not None:
+                if not overwrite and Path(output_path).exists():
+                    output.unlink()
+                    raise FileExistsError(f"файл результата уже существует: {output_path}")
+                Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(output), output_path)
+                output = Path(output_path)
+            result['output'] = str(output)
+    except Exception as e:
+        result['message'] = f"Ошибка обработки: {str(e)}"
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def batch_output_paths(files: List[Path], output_dir: Optional[str],
+                       output_format: str = 'xlsx') -> Dict[Path, Optional[str]]:
+    """
+    Пути результатов в каталоге --output (None - по умолчанию в output/).
+    Подкаталоги относительно общего каталога файлов сохраняются; одинаковые
+    имена в одном каталоге (price.xlsx и price.csv) получают номер.
+    """
+    if output_dir is None:
+        return {path: None for path in files}
+    base = Path(os.path.commonpath([str(path.absolute().parent) for path in files]))
+    paths = {}
+    taken = set()
+    for path in files:
+        target_dir = Path(output_dir) / path.absolute().parent.relative_to(base)
+        target = target_dir / f"{path.stem}_обработан.{output_format}"
+        number = 1
+        while str(target).lower() in taken:
+            number += 1
+            target = target_dir / f"{path.stem}_{number}_обработан.{output_format}"
+        taken.add(str(target).lower())
+        paths[path] = str(target)
+    return paths
+
+
+def _format_throughput(rows: int, size: int, seconds: float) -> str:
+    if seconds <= 0:
+        return "-"
+    rows_per_second = f"{rows / seconds:,.0f}".replace(",", " ")
+    return f"{rows_per_second} строк/с, {size / 1024 / 1024 / seconds:.2f} МБ/с"
+
+
+def run_single(file_path: Path, args, discount_settings: Dict[str, int]) -> int:
+    """Обработка одного файла (прежний режим)"""
+    if not file_path.exists():
+        print(f"Ошибка: файл '{file_path}' не найден")
+        return 1
+
+    print("=" * 60)
+    print("Прайс-Стандарт - Обработка прайс-листа")
+    print("=" * 60)
+    print(f"Файл: {file_path.absolute()}")
+    print(f"Настройки скидок: К2={args.k2}%, К3={args.k3}%")
+    print(f"Пересчёт существующих цен: {'да' if args.recalculate else 'нет'}")
+    print(f"Формат результата: {args.format}, листы: {args.sheets}")
+    if args.template:
+        print(f"Шаблон оформления: {args.template}")
+    print("-" * 60)
+
+    result = process_one(str(file_path.absolute()), discount_settings, args.recalculate,
+                         args.output, args.format, args.sheets, args.template)
+
+    if result['success']:
+        print(f"[OK] {result['message']}")
+        print(f"[FILE] Файл сохранен: {result['output']}")
+        print("=" * 60)
+        return 0
+    else:
+        print(f"[ERROR] {result['message']}")
+        print("=" * 60)
+        return 1
+
+
+def run_batch(files: List[Path], args, discount_settings: Dict[str, int]) -> int:
+    """Пакетная обработка в пуле процессов"""
+    jobs = max(1, min(args.jobs, len(files)))
+    if args.output is not None:
+        Path(args.output).mkdir(parents=True, exist_ok=True)
+
+    print("=" * 60)
+    print("Прайс-Стандарт - Пакетная обработка")
+    print("=" * 60)
+    print(f"Файлов: {len(files)}, процессов: {jobs}")
+    print(f"Настройки скидок: К2={args.k2}%, К3={args.k3}%")
+    print(f"Пересчёт существующих цен: {'да' if args.recalculate else 'нет'}")
+    print(f"Формат результата: {args.format}, листы: {args.sheets}")
+    if args.template:
+        print(f"Шаблон оформления: {args.template}")
+    print("-" * 60)
+
+    start = time.perf_counter()
+    results = []
+    output_paths = batch_output_paths(files, args.output, args.format)
+    # Процессы пула живут всю пачку: pandas и openpyxl загружаются один раз на процесс
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(process_one, str(path.absolute()), discount_settings, args.recalculate,
+                        output_paths[path], args.format, args.sheets, args.template,
+                        overwrite=False)
+            for path in files
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            status = "OK" if result['success'] else "ERROR"
+            print(f"[{done}/{len(files)}] [{status}] {Path(result['file']).name}: "
+                  f"{result['message']} ({result['seconds']:.2f} с, "
+                  f"{_format_throughput(result['rows'], result['bytes'], result['seconds'])})")
+    wall = time.perf_counter() - start
+
+    ok = [r for r in results if r['success']]
+    failed = [r for r in results if not r['success']]
+    rows = sum(r['rows'] for r in ok)
+    size = sum(r['bytes'] for r in ok)
+    busy = sum(r['seconds'] for r in results)
+
+    print("-" * 60)
+    print(f"Успешно: {len(ok)}, с ошибками: {len(failed)}")
+    print(f"Время: {wall:.2f} с (сумма по файлам {busy:.2f} с, ускорение x{busy / wall:.1f})")
+    print(f"Пропускная способность: {len(results) / wall:.2f} файлов/с, "
+          f"{_format_throughput(rows, size, wall)}")
+    if args.output is not None:
+        print(f"[FILE] Результаты сохранены в: {Path(args.output).absolute()}")
+    for r in failed:
+        print(f"[ERROR] {r['file']}: {r['message']}")
+    print("=" * 60)
+
+    return 1 if failed else 0
 
 
 def main():
@@ -19,64 +243,82 @@ def main():
         epilog="""
 Примеры использования:
   python cli.py price.xlsx
-  python cli.py price.xlsx --k2 25 --k3 35 --l3 45
-  python cli.py price.xlsx --recalculate
+  python cli.py price.xlsx --k2 25 --k3 35
+  python cli.py price.xlsx --recalculate --output result.xlsx
+  python cli.py suppliers/ --jobs 8 --output processed/
+  python cli.py "suppliers/**/*.xlsx" other/price.xls --jobs 4
+  python cli.py --manifest nightly.txt --jobs 8
+  python cli.py suppliers/ --format jsonl --output export/
+  python cli.py brands.xlsx --sheets split
+  python cli.py price.xlsx --template default
         """
     )
-    
-    parser.add_argument("file", help="Путь к Excel-файлу")
+
+    parser.add_argument("inputs", nargs="*",
+                        help="Excel- и CSV/TSV-файлы, каталоги или маски (например, \"prices/*.xlsx\")")
+    parser.add_argument("--manifest", type=str, default=None,
+                        help="Файл со списком путей (по одному на строке)")
     parser.add_argument("--k2", type=int, default=30, help="Скидка для маркера К2 (по умолчанию 30)")
     parser.add_argument("--k3", type=int, default=40, help="Скидка для маркера К3 (по умолчанию 40)")
     parser.add_argument(
         "--recalculate",
         action="store_true",
-        help="Пересчитывать существующие спец. цены для К2/К3/Л3"
+        help="Пересчитывать существующие спец. цены для К2/К3"
     )
     parser.add_argument(
         "--output",
         type=str,
         default=None,
-        help="Путь для сохранения результата (по умолчанию в output/)"
+        help="Путь для сохранения результата; в пакетном режиме - каталог (по умолчанию в output/)"
     )
-    
+    parser.add_argument("--format", choices=list(OUTPUT_FORMATS), default="xlsx",
+                        help="Формат результата: xlsx (по умолчанию), csv, jsonl или parquet")
+    parser.add_argument("--sheets", choices=list(SHEET_MODES), default=SHEET_MODE,
+                        help="Листы книги: merge - все листы с прайсом в один (по умолчанию), "
+                             "split - лист результата на каждый лист, active - только активный")
+    parser.add_argument("--template", type=str, default=EXCEL_TEMPLATE,
+                        help="Шаблон оформления xlsx: имя файла в templates_excel без .xlsx, "
+                             "default - корпоративный шаблон (по умолчанию), пустая строка - встроенное оформление")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Число процессов в пакетном режиме (по умолчанию - число ядер)")
+    parser.add_argument("--recursive", action="store_true",
+                        help="Искать файлы в подкаталогах")
+
     args = parser.parse_args()
-    
-    # Проверка существования файла
-    file_path = Path(args.file)
-    if not file_path.exists():
-        print(f"Ошибка: файл '{args.file}' не найден")
-        sys.exit(1)
-    
-    print("=" * 60)
-    print("Прайс-Стандарт - Обработка прайс-листа")
-    print("=" * 60)
-    print(f"Файл: {file_path.absolute()}")
-    print(f"Настройки скидок: К2={args.k2}%, К3={args.k3}%, Л3={args.l3}%")
-    print(f"Пересчёт существующих цен: {'да' if args.recalculate else 'нет'}")
-    print("-" * 60)
-    
-    # Обработка
+
+    inputs = list(args.inputs)
+    if args.manifest is not None:
+        if not Path(args.manifest).exists():
+            print(f"Ошибка: файл '{args.manifest}' не найден")
+            sys.exit(1)
+        inputs.extend(read_manifest(args.manifest))
+    if not inputs:
+        parser.error("укажите файл, каталог, маску или --manifest")
+    try:
+        check_output_format(args.format)
+        check_sheet_mode(args.sheets, args.format)
+        check_template(args.template, args.format)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Настройки скидок
     discount_settings = {
         "К2": args.k2,
         "К3": args.k3,
     }
-    
-    success, message, output_filename = process_file(
-        str(file_path.absolute()),
-        discount_settings,
-        args.recalculate
-    )
-    
-    if success:
-        print(f"[OK] {message}")
-        print(f"[FILE] Файл сохранен: {output_filename}")
-        print("=" * 60)
-        sys.exit(0)
-    else:
-        print(f"[ERROR] {message}")
-        print("=" * 60)
+
+    files = collect_files(inputs, args.recursive)
+    if not files:
+        print(f"Ошибка: не найдено ни одного прайс-листа ({', '.join(INPUT_SUFFIXES)})")
         sys.exit(1)
 
+    # Один явно указанный файл - прежний режим без пула
+    batch = len(files) > 1 or args.manifest is not None or Path(inputs[0]).is_dir() \
+        or any(ch in inputs[0] for ch in GLOB_CHARS)
+    if batch:
+        sys.exit(run_batch(files, args, discount_settings))
+    sys.exit(run_single(files[0], args, discount_settings))
+
 
 if __name__ == "__main__":
     main()
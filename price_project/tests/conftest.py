@@ -0,0 +1,101 @@
+"""
+Общие фикстуры тестов
+Сопоставления колонок пишутся во временный каталог, а не в app/layouts;
+сервис (фикстура client) - с каталогами результатов, задач и кэша во временном каталоге.
+"""
+from pathlib import Path
+from typing import List
+
+import httpx
+import pytest
+from openpyxl import Workbook
+
+import app.main as main
+import app.services.processor as processor_module
+import app.services.uploads as uploads_module
+from app.core.executor import ProcessingExecutor
+from app.services.cache import ResultCache
+from app.services.column_detector import LayoutStore
+from app.services.excel_template import preload_templates
+from app.services.janitor import OutputJanitor
+from app.services.jobs import JobStore
+
+
+@pytest.fixture(autouse=True)
+def layouts_dir(tmp_path, monkeypatch) -> Path:
+    """Хранилище раскладок теста (LayoutStore по умолчанию)"""
+    path = tmp_path / "layouts"
+    path.mkdir()
+    monkeypatch.setattr(LayoutStore.__init__, "__defaults__", (path,))
+    return path
+
+
+def _set_defaults(monkeypatch, function, **values):
+    """Значения по умолчанию аргументов функции (объекты, созданные без аргументов)"""
+    code = function.__code__
+    names = code.co_varnames[code.co_argcount - len(function.__defaults__):code.co_argcount]
+    defaults = dict(zip(names, function.__defaults__), **values)
+    monkeypatch.setattr(function, "__defaults__", tuple(defaults[name] for name in names))
+
+
+@pytest.fixture
+def service_dirs(tmp_path, monkeypatch) -> dict:
+    """
+    Каталоги сервиса во временном каталоге; глобальные объекты app.main
+    (пул, задачи, кэш, очистка) пересоздаются, пул - потоков
+    """
+    dirs = {name: tmp_path / name for name in ("output", "jobs", "cache", "uploads")}
+    for path in dirs.values():
+        path.mkdir()
+    monkeypatch.setattr(main, "OUTPUT_DIR", dirs["output"])
+    monkeypatch.setattr(processor_module, "OUTPUT_DIR", dirs["output"])
+    monkeypatch.setattr(processor_module, "UPLOAD_DIR", dirs["uploads"])
+    monkeypatch.setattr(uploads_module, "UPLOAD_DIR", dirs["uploads"])
+    _set_defaults(monkeypatch, JobStore.__init__, jobs_dir=dirs["jobs"])
+    _set_defaults(monkeypatch, ResultCache.__init__, cache_dir=dirs["cache"], output_dir=dirs["output"])
+    _set_defaults(monkeypatch, OutputJanitor.__init__, output_dir=dirs["output"])
+
+    monkeypatch.setattr(main, "executor", ProcessingExecutor(kind="thread", initializer=preload_templates))
+    monkeypatch.setattr(main, "job_store", JobStore())
+    monkeypatch.setattr(main, "result_cache", ResultCache())
+    monkeypatch.setattr(main, "janitor", OutputJanitor())
+    return dirs
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    """Асинхронные тесты - на asyncio, как сервис"""
+    return "asyncio"
+
+
+@pytest.fixture
+async def client(service_dirs):
+    """Клиент сервиса (ASGI, с запуском и остановкой приложения); тесты - с @pytest.mark.anyio"""
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+
+
+@pytest.fixture
+def make_workbook(tmp_path):
+    """Книга .xlsx из строк: make_workbook(rows) -> путь к файлу"""
+    def make(rows: List[tuple], name: str = "price.xlsx") -> str:
+        wb = Workbook()
+        ws = wb.active
+        for row in rows:
+            ws.append(list(row))
+        path = tmp_path / name
+        wb.save(path)
+        return str(path)
+    return make
+
+
+# Прайс поставщика: преамбула над заголовком, заголовки не в порядке ТЗ
+PREAMBLE_PRICE_ROWS = [
+    ("Склад Москва",),
+    ("Цены действительны неделю",),
+    ("Артикул", "Наименование", "Статус", "Цена розничная", "Спец. цена"),
+    ("1234567", "Краска белая К2", "", 1000, None),
+    ("1234568", "Краска синяя", "уценка", 2000, 1500),
+]
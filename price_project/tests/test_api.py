@@ -0,0 +1,86 @@
+import asyncio
+import csv
+import io
+from pathlib import Path
+
+import pytest
+
+import app.main as main
+from tests.conftest import PREAMBLE_PRICE_ROWS
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def _wait_job(client, job_id: str) -> dict:
+    """Состояние задачи после её завершения"""
+    for _ in range(200):
+        response = await client.get(f"/jobs/{job_id}")
+        assert response.status_code == 200
+        job = response.json()
+        if job["state"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"задача {job_id} не завершилась")
+
+
+@pytest.fixture
+def price_file(make_workbook) -> bytes:
+    return Path(make_workbook(PREAMBLE_PRICE_ROWS)).read_bytes()
+
+
+async def test_job_lifecycle(client, price_file):
+    response = await client.post("/jobs", files={"file": ("price.xlsx", price_file)},
+                                 data={"format": "csv", "sheets": "active", "template": ""})
+
+    assert response.status_code == 202
+    created = response.json()
+    job = await _wait_job(client, created["job_id"])
+    assert job["state"] == "done", job["message"]
+    assert job["output_filename"].endswith(".csv")
+
+    result = await client.get(created["result_url"])
+    assert result.status_code == 200
+    assert result.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(result.content.decode("utf-8"))))
+    assert rows[0] == ["code", "status", "name", "special_price", "retail_price"]
+    assert len(rows) == 3
+
+    # Тот же файл с теми же полями - готовый результат из кэша, задача сразу завершена
+    response = await client.post("/jobs", files={"file": ("price.xlsx", price_file)},
+                                 data={"format": "csv", "sheets": "active", "template": ""})
+    assert response.json()["state"] == "done"
+    assert (await _wait_job(client, response.json()["job_id"]))["output_filename"] == job["output_filename"]
+
+
+async def test_job_uses_default_template(client, price_file):
+    response = await client.post("/jobs", files={"file": ("price.xlsx", price_file)})
+
+    job = await _wait_job(client, response.json()["job_id"])
+    assert job["state"] == "done", job["message"]
+    assert job["output_filename"].endswith(".xlsx")
+
+
+@pytest.mark.parametrize("fields", [
+    {"format": "pdf"},
+    {"format": "csv", "sheets": "split"},
+    {"template": "missing"},
+    {"format": "csv", "template": "default-missing"},
+])
+async def test_job_rejects_bad_fields(client, price_file, fields):
+    response = await client.post("/jobs", files={"file": ("price.xlsx", price_file)}, data=fields)
+
+    assert response.status_code == 400
+    # Задача не создана, файл не сохранён
+    assert list(main.job_store.jobs_dir.iterdir()) == []
+
+
+async def test_job_not_found_and_not_ready(client):
+    assert (await client.get("/jobs/" + "0" * 32)).status_code == 404
+    assert (await client.get("/jobs/" + "0" * 32 + "/result")).status_code == 404
+    assert (await client.get("/jobs/not-a-job")).status_code == 404
+
+    job = main.job_store.create()
+    response = await client.get(f"/jobs/{job.job_id}/result")
+    assert response.status_code == 409
+    assert response.headers["retry-after"]
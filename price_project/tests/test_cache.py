@@ -0,0 +1,113 @@
+import os
+import shutil
+
+import pytest
+from openpyxl import load_workbook
+
+import app.services.cache as cache_module
+from app.core.config import DEFAULT_TEMPLATE
+from app.services.cache import ResultCache
+from app.services.excel_template import TemplateStore
+from app.services.status_normalizer import StatusNormalizer
+
+
+FILE_HASH = "ab" * 32
+
+SETTINGS = {"К2": 30, "К3": 40}
+
+
+@pytest.fixture
+def cache(tmp_path) -> ResultCache:
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "output").mkdir()
+    return ResultCache(cache_dir=tmp_path / "cache", output_dir=tmp_path / "output", max_bytes=250)
+
+
+def _put(cache: ResultCache, file_hash: str, name: str, size: int, last_used: int):
+    """Запись кэша (csv) для файла результата заданного размера и времени использования"""
+    (cache.output_dir / name).write_bytes(b"x" * size)
+    cache.put(file_hash, SETTINGS, False, f"Обработано {name}", name, "csv", "merge", "")
+    entry_path = cache._entry_path(cache.make_key(file_hash, SETTINGS, False, "csv", "merge", ""))
+    os.utime(entry_path, (last_used, last_used))
+
+
+def test_key_depends_on_every_setting():
+    base = ResultCache.make_key(FILE_HASH, SETTINGS, False, "xlsx", "merge", "")
+
+    variants = [
+        ResultCache.make_key("cd" * 32, SETTINGS, False, "xlsx", "merge", ""),
+        ResultCache.make_key(FILE_HASH, {"К2": 25, "К3": 40}, False, "xlsx", "merge", ""),
+        ResultCache.make_key(FILE_HASH, SETTINGS, True, "xlsx", "merge", ""),
+        ResultCache.make_key(FILE_HASH, SETTINGS, False, "csv", "merge", ""),
+        ResultCache.make_key(FILE_HASH, SETTINGS, False, "xlsx", "split", ""),
+        ResultCache.make_key(FILE_HASH, SETTINGS, False, "xlsx", "merge", "default"),
+    ]
+
+    assert len({base, *variants}) == len(variants) + 1
+    # Регистр SHA-256 и порядок настроек не важны
+    assert ResultCache.make_key(FILE_HASH.upper(), {"К3": 40, "К2": 30}, False, "xlsx", "merge", "") == base
+    # Шаблон к форматам данных не применяется
+    assert ResultCache.make_key(FILE_HASH, SETTINGS, False, "csv", "merge", "default") == variants[3]
+
+
+def test_key_depends_on_template_content(tmp_path, monkeypatch):
+    path = tmp_path / "corp.xlsx"
+    shutil.copy(DEFAULT_TEMPLATE, path)
+    store = TemplateStore(templates_dir=tmp_path, check_seconds=0)
+    monkeypatch.setattr(cache_module, "template_store", store)
+    key = ResultCache.make_key(FILE_HASH, SETTINGS, False, "xlsx", "merge", "corp")
+
+    assert ResultCache.make_key(FILE_HASH, SETTINGS, False, "xlsx", "merge", "corp") == key
+
+    # То же имя шаблона, другое оформление
+    wb = load_workbook(path)
+    wb.active["A1"] = "Прайс-лист ООО Ромашка"
+    wb.save(path)
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+
+    assert ResultCache.make_key(FILE_HASH, SETTINGS, False, "xlsx", "merge", "corp") != key
+
+
+def test_key_depends_on_status_mapping(tmp_path, monkeypatch):
+    mapping = tmp_path / "statuses.json"
+    mapping.write_text('{"хит": "ХИТ"}', encoding="utf-8")
+    monkeypatch.setattr(cache_module, "status_normalizer", StatusNormalizer(mapping_file=None))
+    builtin = ResultCache.make_key(FILE_HASH, SETTINGS, False, "xlsx", "merge", "")
+
+    monkeypatch.setattr(cache_module, "status_normalizer", StatusNormalizer(mapping_file=str(mapping)))
+    from_file = ResultCache.make_key(FILE_HASH, SETTINGS, False, "xlsx", "merge", "")
+
+    mapping.write_text('{"хит": "ТОП"}', encoding="utf-8")
+    os.utime(mapping, ns=(1, 1))
+    changed = ResultCache.make_key(FILE_HASH, SETTINGS, False, "xlsx", "merge", "")
+
+    assert len({builtin, from_file, changed}) == 3
+
+
+def test_hit_and_miss(cache):
+    assert cache.get(FILE_HASH, SETTINGS, False, "csv", "merge", "") is None
+
+    _put(cache, FILE_HASH, "result.csv", 10, 1_000_000_000)
+
+    assert cache.get(FILE_HASH, SETTINGS, False, "csv", "merge", "") == ("Обработано result.csv", "result.csv")
+    assert cache.get(FILE_HASH, SETTINGS, True, "csv", "merge", "") is None
+    assert cache.get(FILE_HASH, SETTINGS, False, "jsonl", "merge", "") is None
+
+    # Файл результата удалён очисткой - запись тоже
+    (cache.output_dir / "result.csv").unlink()
+    assert cache.get(FILE_HASH, SETTINGS, False, "csv", "merge", "") is None
+    assert list(cache.cache_dir.iterdir()) == []
+
+
+def test_least_recently_used_evicted(cache):
+    _put(cache, "aa" * 32, "a.csv", 100, 1_000_000_000)
+    _put(cache, "bb" * 32, "b.csv", 100, 1_100_000_000)
+    # Обращение к старой записи делает её самой свежей
+    assert cache.get("aa" * 32, SETTINGS, False, "csv", "merge", "") is not None
+
+    # Третий результат превышает max_bytes - вытесняется давно не использованный
+    _put(cache, "cc" * 32, "c.csv", 100, 1_200_000_000)
+
+    assert sorted(path.name for path in cache.output_dir.iterdir()) == ["a.csv", "c.csv"]
+    assert cache.get("bb" * 32, SETTINGS, False, "csv", "merge", "") is None
+    assert len(list(cache.cache_dir.glob("*.json"))) == 2
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from app.services.cleaner import DataCleaner
+
+
+HEADER = ["Код товара", "Статус", "Номенклатура", "Спец. цена", "Розничная цена"]
+
+PRICE_ROWS = [
+    ["Прайс-лист ООО Ромашка", None, None, None, None],
+    HEADER,
+    [None, None, None, None, None],
+    ["КРАСКИ", None, None, None, None],
+    ["1234567", "", "Краска белая", None, "1 000,50"],
+    HEADER,
+    ["BOSTIK", None, None, None, None],
+    [None, "уценка", "Клей", None, "250"],
+    ["Ответственный: Иванов", None, None, None, None],
+]
+
+
+def _frame(rows) -> pd.DataFrame:
+    return pd.DataFrame(rows, dtype=object)
+
+
+def test_clean_removes_service_rows():
+    df = _frame(PRICE_ROWS)
+    original = df.copy()
+
+    result = DataCleaner(df).clean()
+
+    assert result.values.tolist() == [
+        HEADER,
+        ["1234567", "", "Краска белая", None, "1 000,50"],
+        [None, "уценка", "Клей", None, "250"],
+    ]
+    assert result.index.tolist() == [0, 1, 2]
+    # Шаги только снимают строки с маски: исходный DataFrame не меняется
+    pd.testing.assert_frame_equal(df, original)
+
+
+def test_first_header_kept_only_with_header_row():
+    rows = [HEADER, ["1234567", "", "Краска", 10, 20], HEADER]
+
+    with_header = DataCleaner(_frame(rows)).clean()
+    chunk = DataCleaner(_frame(rows), has_header_row=False).clean()
+
+    assert with_header.values.tolist() == rows[:2]
+    # Часть потоковой обработки: заголовок в ней - дубликат
+    assert chunk.values.tolist() == [rows[1]]
+
+
+def test_numeric_price_column_is_price():
+    # Строка без кода, но с числом в числовой колонке - товар, а не раздел
+    df = pd.DataFrame({
+        0: pd.Series(["ЛАКИ", "ГРУНТ"], dtype=object),
+        1: pd.Series([np.nan, 150.0]),
+    })
+
+    result = DataCleaner(df, has_header_row=False).clean()
+
+    assert result[0].tolist() == ["ГРУНТ"]
+
+
+def test_steps_apply_mask_once():
+    df = _frame(PRICE_ROWS)
+    cleaner = DataCleaner(df).remove_empty_rows().remove_header_footer()
+
+    # До result() DataFrame не копируется и не фильтруется
+    assert cleaner.df is df
+    assert cleaner._keep.tolist() == [False, True, False, True, True, True, True, True, False]
+    assert len(cleaner.result()) == 6
+
+
+def test_nothing_removed_returns_all_rows():
+    df = _frame([["1234567", "", "Краска", 10, 20]])
+    df.index = [5]
+
+    result = DataCleaner(df, has_header_row=False).clean()
+
+    assert result.index.tolist() == [0]
+    assert result.values.tolist() == df.values.tolist()
@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+import cli
+from tests.conftest import PREAMBLE_PRICE_ROWS
+
+
+def _run(monkeypatch, *argv) -> int:
+    """Код выхода cli.main() с аргументами командной строки"""
+    monkeypatch.setattr(sys, 'argv', ['cli.py', *argv])
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main()
+    return exit_info.value.code
+
+
+@pytest.fixture
+def suppliers(tmp_path, make_workbook) -> Path:
+    """Каталог прайсов: два одноимённых файла в разных подкаталогах и файл блокировки Excel"""
+    root = tmp_path / "suppliers"
+    for sub in ("moscow", "spb"):
+        (root / sub).mkdir(parents=True)
+        Path(make_workbook(PREAMBLE_PRICE_ROWS, f"{sub}.xlsx")).rename(root / sub / "price.xlsx")
+    (root / "moscow" / "~$price.xlsx").write_bytes(b"")
+    (root / "notes.txt").write_text("не прайс")
+    return root
+
+
+def test_collect_files(suppliers):
+    moscow = suppliers / "moscow" / "price.xlsx"
+    spb = suppliers / "spb" / "price.xlsx"
+
+    assert cli.collect_files([str(suppliers)]) == []
+    assert cli.collect_files([str(suppliers)], recursive=True) == [moscow, spb]
+    # Маска и тот же файл явно - без повтора; несуществующий путь - как есть
+    assert cli.collect_files([str(suppliers / "*" / "*.xlsx"), str(moscow), "missing.xlsx"]) == [
+        moscow, spb, Path("missing.xlsx")
+    ]
+
+
+def test_read_manifest(tmp_path):
+    manifest = tmp_path / "lists" / "nightly.txt"
+    manifest.parent.mkdir()
+    manifest.write_text("# ночная выгрузка\n\n  a.xlsx  \n/data/b.csv\n", encoding='utf-8')
+
+    # Относительные пути - от каталога файла-списка
+    assert cli.read_manifest(str(manifest)) == [str(manifest.parent / "a.xlsx"), "/data/b.csv"]
+
+
+def test_batch_output_paths_keep_subdirectories(tmp_path):
+    files = [tmp_path / "moscow" / "price.xlsx", tmp_path / "spb" / "price.xlsx",
+             tmp_path / "spb" / "price.csv"]
+
+    paths = cli.batch_output_paths(files, "out", "xlsx")
+
+    assert paths == {
+        files[0]: str(Path("out/moscow/price_обработан.xlsx")),
+        files[1]: str(Path("out/spb/price_обработан.xlsx")),
+        files[2]: str(Path("out/spb/price_2_обработан.xlsx")),
+    }
+    assert cli.batch_output_paths(files, None) == dict.fromkeys(files)
+
+
+def test_exit_codes(monkeypatch, tmp_path, suppliers):
+    output = tmp_path / "processed"
+
+    assert _run(monkeypatch, "--manifest", str(tmp_path / "missing.txt")) == 1
+    assert _run(monkeypatch, str(tmp_path / "missing.xlsx")) == 1
+    assert _run(monkeypatch, str(suppliers)) == 1  # без --recursive прайсов нет
+
+    assert _run(monkeypatch, str(suppliers), "--recursive", "--jobs", "1", "--output", str(output)) == 0
+    results = sorted(path.relative_to(output).as_posix() for path in output.rglob("*.xlsx"))
+    assert results == ["moscow/price_обработан.xlsx", "spb/price_обработан.xlsx"]
+
+    # Повторный запуск не перезаписывает готовые результаты
+    assert _run(monkeypatch, str(suppliers), "--recursive", "--jobs", "1", "--output", str(output)) == 1
@@ -0,0 +1,84 @@
+from app.services.column_detector import ColumnDetector, LayoutStore, layout_fingerprint
+from tests.conftest import PREAMBLE_PRICE_ROWS
+
+
+def test_detect_returns_mapping_and_header_row(tmp_path):
+    detector = ColumnDetector(store=LayoutStore(tmp_path))
+
+    mapping, header_row = detector.detect(PREAMBLE_PRICE_ROWS)
+
+    assert header_row == 2
+    assert mapping == {'code': 0, 'name': 1, 'status': 2, 'retail_price': 3, 'special_price': 4}
+    assert detector.fingerprint == layout_fingerprint(
+        ['артикул', 'наименование', 'статус', 'цена розничная', 'спец. цена']
+    )
+
+
+def test_detect_without_header_row(tmp_path):
+    detector = ColumnDetector(store=LayoutStore(tmp_path))
+
+    assert detector.detect([("Прайс-лист",), ("1234567", "Краска", 100)]) == ({}, None)
+    assert detector.fingerprint is None
+
+
+def test_super_header_disambiguates_price_columns(tmp_path):
+    rows = [
+        ("", "", "Спец. цены", "Розничные"),
+        ("Код товара", "Номенклатура", "Цена", "Цена"),
+    ]
+    mapping, header_row = ColumnDetector(store=LayoutStore(tmp_path)).detect(rows)
+
+    assert header_row == 1
+    assert mapping['special_price'] == 2
+    assert mapping['retail_price'] == 3
+
+
+def test_layout_reused_when_row_above_header_changes(tmp_path):
+    store = LayoutStore(tmp_path)
+    header = ("Код товара", "Статус", "Номенклатура", "Спец. цена", "Розничная цена")
+
+    first = ColumnDetector(store=store)
+    first.detect([("Склад Москва, 01.03.2026",), header])
+    second = ColumnDetector(store=store)
+    mapping, _ = second.detect([("Склад Казань, 08.03.2026",), header])
+
+    assert not first.from_store
+    assert second.from_store
+    assert second.fingerprint == first.fingerprint
+    assert mapping == {'code': 0, 'status': 1, 'name': 2, 'special_price': 3, 'retail_price': 4}
+
+
+def test_stored_mapping_edit_is_used(tmp_path):
+    store = LayoutStore(tmp_path)
+    rows = [("Код товара", "Статус", "Номенклатура", "Спец. цена", "Розничная цена")]
+    detector = ColumnDetector(store=store)
+    detector.detect(rows)
+    store.put(detector.fingerprint, {'code': 0, 'status': 1, 'name': 2,
+                                     'special_price': 4, 'retail_price': 3}, [])
+
+    mapping, _ = ColumnDetector(store=store).detect(rows)
+
+    assert mapping['special_price'] == 4
+
+
+def test_swapped_super_header_is_another_layout(tmp_path):
+    store = LayoutStore(tmp_path)
+    header = ("Код товара", "Номенклатура", "Цена", "Цена")
+
+    first = ColumnDetector(store=store)
+    first_mapping, _ = first.detect([("", "", "Спец. цены", "Розничные"), header])
+    second = ColumnDetector(store=store)
+    second_mapping, _ = second.detect([("", "", "Розничные", "Спец. цены"), header])
+
+    assert (first_mapping['special_price'], first_mapping['retail_price']) == (2, 3)
+    assert not second.from_store
+    assert second.fingerprint != first.fingerprint
+    assert (second_mapping['special_price'], second_mapping['retail_price']) == (3, 2)
+
+
+def test_super_header_hits_ignore_free_text():
+    detector = ColumnDetector()
+
+    assert detector.super_header_hits(['склад москва', '', 'спец. цены', 'розничные', '']) == \
+        ['', '', 'special_price:3', 'retail_price:3']
+    assert detector.super_header_hits(['склад казань, 08.03.2026']) == []
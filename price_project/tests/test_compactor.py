@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from app.services.compactor import compact_frame
+
+
+MAPPING = {'code': 0, 'status': 1, 'name': 2, 'special_price': 3, 'retail_price': 4}
+
+
+def _frame(special_prices: list, retail_prices: list) -> pd.DataFrame:
+    rows = len(special_prices)
+    return pd.DataFrame({
+        0: pd.Series([f"10000{i % 2}" for i in range(rows)], dtype=object),
+        1: pd.Series([""] * rows, dtype=object),
+        2: pd.Series(["Краска"] * rows, dtype=object),
+        3: pd.Series(special_prices, dtype=object),
+        4: pd.Series(retail_prices, dtype=object),
+    })
+
+
+def test_object_prices_narrowed_to_float32():
+    # Потоковый режим: числа цен в object-колонке
+    df = _frame([700, None, 1500.5], [1000, 999.5, 2000])
+
+    compact = compact_frame(df, MAPPING)
+
+    assert compact.dtypes[3] == np.float32
+    assert compact.dtypes[4] == np.float32
+    assert compact.iloc[:, 4].tolist() == [1000.0, 999.5, 2000.0]
+    assert pd.isna(compact.iloc[1, 3])
+
+
+def test_prices_with_text_or_inexact_values_kept():
+    df = _frame([700, "по запросу", None], [0.1, 1000, 999.5])
+
+    compact = compact_frame(df, MAPPING)
+
+    assert compact.dtypes[3] == object
+    assert compact.iloc[:, 3].tolist() == [700, "по запросу", None]
+    # 0.1 во float32 не представимо точно
+    assert compact.dtypes[4] == object
+
+
+def test_codes_interned_values_unchanged():
+    df = _frame([700] * 4, [1000] * 4)
+    df.iloc[3, 0] = None
+
+    compact = compact_frame(df, MAPPING)
+
+    codes = compact.iloc[:, 0].tolist()
+    assert codes == ["100000", "100001", "100000", None]
+    assert codes[0] is codes[2]
+    assert df.iloc[:, 3].dtype == object  # исходный DataFrame не меняется
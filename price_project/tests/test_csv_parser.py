@@ -0,0 +1,107 @@
+import codecs
+import io
+
+import pandas as pd
+import pytest
+
+from app.services.csv_parser import CsvParser
+from app.services.parser import create_parser
+
+
+HEADER = "Код товара;Статус;Номенклатура;Спец. цена;Розничная цена"
+
+ROWS = [
+    "Прайс-лист ООО Ромашка",
+    HEADER,
+    "1234567;;Краска белая К2;;1 000,50",
+    "1234568;уценка;Краска синяя;1500;2000",
+]
+
+
+def _csv(rows, encoding: str = 'utf-8', delimiter: str = ';', bom: bool = False) -> io.BytesIO:
+    text = "\r\n".join(row.replace(';', delimiter) for row in rows) + "\r\n"
+    data = text.encode(encoding)
+    return io.BytesIO((codecs.BOM_UTF8 if bom else b'') + data)
+
+
+def _values(df: pd.DataFrame) -> list:
+    return [[None if pd.isna(value) else value for value in row] for row in df.iloc[:, :5].values.tolist()]
+
+
+# Числа (и коды из цифр) - float, как значения ячеек Excel; пустые поля - пропуски
+EXPECTED = [
+    [1234567, None, "Краска белая К2", None, 1000.5],
+    [1234568, "уценка", "Краска синяя", 1500, 2000],
+]
+
+
+@pytest.mark.parametrize('encoding, delimiter, bom', [
+    ('utf-8', ';', False),
+    ('utf-8', ';', True),
+    ('cp1251', ';', False),
+    ('cp1251', '\t', False),
+    ('utf-8', ',', False),
+])
+def test_encoding_and_delimiter_detected(encoding, delimiter, bom):
+    rows = [row.replace('1 000,50', '"1 000,50"') for row in ROWS] if delimiter == ',' else ROWS
+    parser = CsvParser(_csv(rows, encoding, delimiter, bom))
+
+    mapping = parser.detect_columns()
+    df = parser.read_raw_data()
+
+    assert parser.delimiter == delimiter
+    assert parser.encoding == ('utf-8-sig' if bom else encoding)
+    assert mapping == {'code': 0, 'status': 1, 'name': 2, 'special_price': 3, 'retail_price': 4}
+    assert _values(df) == EXPECTED
+
+
+def test_read_without_detect_columns():
+    # Как в бенчмарке для Excel: чтение без detect_columns
+    assert _values(CsvParser(_csv(ROWS)).read_raw_data()) == EXPECTED
+
+    chunks = list(CsvParser(_csv(ROWS), streaming=True).iter_raw_chunks(chunk_size=1))
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+    assert _values(pd.concat(chunks, ignore_index=True)) == EXPECTED
+
+
+def test_chunked_reading_matches_full_read():
+    rows = [HEADER] + [f"{1000000 + i};;Товар {i};;{i}" for i in range(25)]
+    full = CsvParser(_csv(rows)).read_raw_data()
+
+    parser = CsvParser(_csv(rows), streaming=True)
+    parser.detect_columns()
+    chunks = list(parser.iter_raw_chunks(chunk_size=10))
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert _values(pd.concat(chunks, ignore_index=True)) == _values(full)
+
+
+def test_cp1251_after_ascii_prefix(monkeypatch):
+    # Начало выгрузки (выборка) - только ASCII, кириллица в cp1251 - дальше
+    monkeypatch.setattr(CsvParser, 'SAMPLE_SIZE', 64)
+    rows = ["Code;Status;Name;Special price;Retail price"] * 3 + [HEADER] + ROWS[2:]
+    parser = CsvParser(_csv(rows, 'cp1251'), streaming=True)
+
+    df = pd.concat(list(parser.iter_raw_chunks()), ignore_index=True)
+
+    assert parser.encoding == 'cp1251'
+    assert _values(df)[-2:] == EXPECTED
+
+
+def test_invalid_bytes_in_utf8_file_replaced(monkeypatch):
+    monkeypatch.setattr(CsvParser, 'SAMPLE_SIZE', 64)
+    data = _csv([HEADER] * 2 + ROWS[2:]).getvalue() + "1234569;;Лак;;300\r\n".encode('cp1251')
+    parser = CsvParser(io.BytesIO(data))
+
+    rows = parser.get_all_rows()
+
+    assert parser.encoding == 'utf-8'
+    assert rows[-1][0] == 1234569
+    assert "\ufffd" in rows[-1][2]
+
+
+def test_create_parser_picks_csv():
+    parser = create_parser(_csv(ROWS, 'cp1251'))
+
+    assert isinstance(parser, CsvParser)
+    assert parser.sheet_names() == []
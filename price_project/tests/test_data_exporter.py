@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+
+import pandas as pd
+import pytest
+
+import app.services.data_exporter as data_exporter
+from app.services.data_exporter import (
+    CsvExporter, DataExporter, JsonLinesExporter, ParquetExporter, pa, pq
+)
+from app.services.processor import PriceProcessor
+
+
+# Прайс с числовыми и текстовыми кодами и ценами: в обычном режиме цены
+# в памяти - float64, в потоковом - object
+MIXED_PRICE_ROWS = [
+    ("Прайс-лист",),
+    ("Код товара", "Статус", "Номенклатура", "Спец. цена", "Розничная цена"),
+    ("КРАСКИ",),
+    (100001, "", "Краска белая К2", None, 1000),
+    ("100002", "уценка", "Краска синяя", 1500, "2 000"),
+    (100003, "новый", "Грунт", None, 999.5),
+    (100004, "", "Лак", None, "по запросу"),
+]
+
+FORMATS = [
+    'csv',
+    'jsonl',
+    pytest.param('parquet', marks=pytest.mark.skipif(pa is None, reason="pyarrow не установлен")),
+]
+
+MAPPING = {'code': 0, 'status': 1, 'name': 2, 'special_price': 3, 'retail_price': 4}
+
+
+def _process(path: str, output_format: str, streaming: bool) -> bytes:
+    output = io.BytesIO()
+    success, message, _ = PriceProcessor(path, streaming=streaming).process(
+        output=output, output_format=output_format
+    )
+    assert success, message
+    return output.getvalue()
+
+
+@pytest.mark.parametrize('output_format', FORMATS)
+def test_streaming_and_full_results_equal(make_workbook, output_format):
+    path = make_workbook(MIXED_PRICE_ROWS)
+
+    full = _process(path, output_format, streaming=False)
+    streamed = _process(path, output_format, streaming=True)
+
+    if output_format == 'parquet':
+        full_table = pq.read_table(io.BytesIO(full))
+        streamed_table = pq.read_table(io.BytesIO(streamed))
+        assert full_table.schema == streamed_table.schema
+        assert full_table.to_pylist() == streamed_table.to_pylist()
+    else:
+        assert full == streamed
+
+
+def test_csv_rows():
+    df = pd.DataFrame([
+        ["Код товара", "Статус", "Номенклатура", "Спец. цена", "Розничная цена"],
+        [100001, "", "Краска, белая", 700.0, 1000.0],
+        [100002, "РАСПРОДАЖА", "Лак", None, 999.5],
+    ])
+
+    output = CsvExporter(df, MAPPING).export(io.BytesIO())
+
+    rows = list(csv.reader(io.StringIO(output.getvalue().decode('utf-8'))))
+    assert rows == [
+        ['code', 'status', 'name', 'special_price', 'retail_price'],
+        ['100001', '', 'Краска, белая', '700', '1000'],
+        ['100002', 'РАСПРОДАЖА', 'Лак', '', '999.5'],
+    ]
+
+
+def test_jsonl_rows():
+    df = pd.DataFrame([[100001, None, "Краска", 700.0, "1 000"]])
+
+    output = JsonLinesExporter(df, MAPPING).export(io.BytesIO())
+
+    lines = output.getvalue().decode('utf-8').splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'code': 100001, 'status': None, 'name': "Краска", 'special_price': 700, 'retail_price': "1 000"},
+    ]
+
+
+@pytest.mark.skipif(pa is None, reason="pyarrow не установлен")
+def test_parquet_schema_independent_of_dtypes():
+    numeric = pd.DataFrame({0: [100001.0], 1: [""], 2: ["Краска"], 3: [700.0], 4: [1000.0]})
+    text = numeric.astype(object)
+    text.iloc[0, 4] = "1 000"
+
+    tables = [pq.read_table(ParquetExporter(df, MAPPING).export(io.BytesIO())) for df in (numeric, text)]
+
+    assert tables[0].schema == tables[1].schema
+    assert [field.type for field in tables[0].schema] == [pa.string()] * 3 + [pa.float64()] * 2
+    assert tables[0].to_pylist() == tables[1].to_pylist() == [
+        {'code': '100001', 'status': '', 'name': "Краска", 'special_price': 700.0, 'retail_price': 1000.0},
+    ]
+
+
+def test_data_exporter_is_abstract():
+    with pytest.raises(TypeError):
+        DataExporter(pd.DataFrame(), MAPPING)
+
+
+@pytest.mark.skipif(pa is None, reason="pyarrow не установлен")
+def test_parquet_row_group_per_chunk(monkeypatch):
+    monkeypatch.setattr(data_exporter, 'STREAM_CHUNK_ROWS', 4)
+    # Копия результата по колонкам (_build_output) не строится
+    monkeypatch.setattr(DataExporter, '_build_output', None)
+    rows = [[100000 + i, "", f"Товар {i}", None, float(i)] for i in range(10)]
+    rows[5] = ["Код товара", "Статус", "Номенклатура", "Спец. цена", "Розничная цена"]
+    df = pd.DataFrame(rows)
+
+    parquet = pq.ParquetFile(ParquetExporter(df, MAPPING).export(io.BytesIO()))
+
+    # Заголовок таблицы во второй части пропущен
+    assert [parquet.metadata.row_group(i).num_rows for i in range(parquet.num_row_groups)] == [4, 3, 2]
+    assert parquet.read().column('retail_price').to_pylist() == [0, 1, 2, 3, 4, 6, 7, 8, 9]
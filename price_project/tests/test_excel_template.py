@@ -0,0 +1,106 @@
+import io
+import os
+import shutil
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+import app.services.excel_template as excel_template
+from app.core.config import DEFAULT_TEMPLATE
+from app.services.excel_template import ExcelTemplate, TemplateStore, check_template
+from app.services.processor import PriceProcessor
+from tests.conftest import PREAMBLE_PRICE_ROWS
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch) -> TemplateStore:
+    """Хранилище шаблонов во временном каталоге, файл проверяется при каждом обращении"""
+    shutil.copy(DEFAULT_TEMPLATE, tmp_path / "corp.xlsx")
+    store = TemplateStore(templates_dir=tmp_path, default_template=DEFAULT_TEMPLATE, check_seconds=0)
+    monkeypatch.setattr(excel_template, 'template_store', store)
+    return store
+
+
+def _touch(path, mtime_ns: int):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_default_template_extracted():
+    template = ExcelTemplate(DEFAULT_TEMPLATE)
+
+    assert template.header_row == 5
+    assert template.header_cell('retail_price').value == "Розничная цена"
+    assert template.head_rows("дата: 1 января")[1][0].value == "дата: 1 января"
+    assert {kind for kind, _ in template.styles} == {'item', 'category', 'sale'}
+    # Колонки, которой нет в шаблоне, - оформление первой колонки шаблона
+    assert template.data_style('item', 'unknown') == template.data_style('item', 'code')
+
+
+def test_template_without_header_rejected(tmp_path):
+    wb = Workbook()
+    wb.active.append(["Просто текст"])
+    path = tmp_path / "empty.xlsx"
+    wb.save(path)
+
+    with pytest.raises(ValueError, match="не найдена строка заголовков"):
+        ExcelTemplate(path)
+
+
+def test_store_reloads_changed_file(store, tmp_path):
+    path = tmp_path / "corp.xlsx"
+    _touch(path, 1_000_000_000)
+    first = store.get('corp')
+
+    assert store.get('corp') is first
+
+    _touch(path, 2_000_000_000)
+    assert store.get('corp') is not first
+
+
+def test_store_checks_file_once_per_interval(store, tmp_path):
+    path = tmp_path / "corp.xlsx"
+    store.check_seconds = 3600
+    first = store.get('corp')
+
+    # Внутри интервала файл не проверяется - ни stat, ни перечитывания
+    _touch(path, 2_000_000_000)
+    path.unlink()
+    assert store.get('corp') is first
+
+
+@pytest.mark.parametrize('name, message', [
+    ('missing', "не найден"),
+    ('../corp', "Недопустимое имя"),
+    ('.hidden', "Недопустимое имя"),
+])
+def test_check_template_rejects_bad_names(store, name, message):
+    with pytest.raises(ValueError, match=message):
+        check_template(name)
+
+
+def test_check_template_formats(store, monkeypatch):
+    monkeypatch.setattr(excel_template, 'EXCEL_TEMPLATE', 'default')
+
+    assert check_template('') is None
+    assert check_template('corp') is store.get('corp')
+    # Шаблон по умолчанию к форматам данных не применяется, выбранный явно - ошибка
+    assert check_template('default', 'csv') is None
+    with pytest.raises(ValueError, match="только для формата xlsx"):
+        check_template('corp', 'csv')
+
+
+def test_processed_book_uses_template(make_workbook, store):
+    output = io.BytesIO()
+
+    success, message, _ = PriceProcessor(make_workbook(PREAMBLE_PRICE_ROWS)).process(
+        output=output, template='corp'
+    )
+
+    assert success, message
+    ws = load_workbook(output).active
+    rows = list(ws.iter_rows(values_only=True))
+    # Шапка документа шаблона, заголовок таблицы в его строке, дальше - данные
+    assert rows[0][0] == 'Прайс-лист ООО "АЛЬТ-Икс"'
+    assert rows[4] == ("Код товара", "Статус", "Номенклатура", "Спец. цена", "Розничная цена")
+    assert rows[5] == (1234567, "РАСПРОДАЖА", "Краска белая К2", 700, 1000)
+    assert ws.column_dimensions['C'].width == store.get('corp').widths['name']
@@ -0,0 +1,70 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+import app.main as main
+from app.core.executor import ExecutorBusyError, ProcessingExecutor
+
+
+@pytest.fixture
+def gate():
+    """Событие, которого ждут задачи: занятый обработчик, пока его не установят"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_full_queue_rejected_and_slot_released(gate):
+    executor = ProcessingExecutor(kind="thread", max_workers=1, max_queued=1)
+    running = executor.submit(gate.wait, 5)
+    queued = executor.submit(gate.wait, 5)
+
+    # Обработчик занят, место в очереди одно
+    assert executor.is_full
+    assert executor.in_flight == executor.capacity == 2
+    with pytest.raises(ExecutorBusyError):
+        executor.submit(gate.wait, 5)
+
+    gate.set()
+    assert running.result(timeout=5) and queued.result(timeout=5)
+    # Слот освобождается в обработчике после результата - ждём остановки пула
+    executor.shutdown()
+    assert executor.in_flight == 0
+    # Задачи снова принимаются (пул создаётся заново)
+    assert executor.submit(lambda: 42).result(timeout=5) == 42
+    executor.shutdown()
+
+
+def test_failed_task_releases_slot():
+    executor = ProcessingExecutor(kind="thread", max_workers=1, max_queued=0)
+
+    with pytest.raises(ZeroDivisionError):
+        executor.submit(lambda: 1 / 0).result(timeout=5)
+    executor.shutdown()
+
+    assert executor.in_flight == 0
+    assert executor.submit(lambda: "ok").result(timeout=5) == "ok"
+    executor.shutdown()
+
+
+def test_unknown_kind_rejected():
+    with pytest.raises(ValueError):
+        ProcessingExecutor(kind="fiber")
+
+
+@pytest.mark.anyio
+async def test_busy_service_returns_503(client, make_workbook, gate, monkeypatch):
+    busy = ProcessingExecutor(kind="thread", max_workers=1, max_queued=0)
+    monkeypatch.setattr(main, "executor", busy)
+    busy.submit(gate.wait, 5)
+    files = {"file": ("price.xlsx", Path(make_workbook([("Код товара", "Номенклатура")])).read_bytes())}
+
+    for url in ("/process", "/jobs"):
+        response = await client.post(url, files=files)
+        assert response.status_code == 503
+        assert response.headers["retry-after"]
+
+    gate.set()
+    busy.shutdown()
+    assert busy.in_flight == 0
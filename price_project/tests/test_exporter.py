@@ -0,0 +1,116 @@
+import importlib.util
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from app.services.exporter import ExcelExporter, create_exporter
+from app.services.processor import PriceProcessor
+from tests.conftest import _set_defaults
+
+
+MAPPING = {'code': 0, 'status': 1, 'name': 2, 'special_price': 3, 'retail_price': 4}
+
+# Данные после обработки: заголовок таблицы (в вывод не попадает), раздел,
+# товары с распродажей, пустыми и дробными ценами
+ROWS = [
+    ("Код товара", "Статус", "Номенклатура", "Спец. цена", "Розничная цена"),
+    ("КРАСКИ", None, None, None, None),
+    (100001, "", "Краска белая К2", 700.0, 1000.0),
+    ("100002", "РАСПРОДАЖА", "Краска синяя", 1500, 2000),
+    (100003, None, "Грунт", np.nan, 999.5),
+]
+
+BACKENDS = [
+    pytest.param('openpyxl', False, id='openpyxl'),
+    pytest.param('openpyxl', True, id='openpyxl-streaming'),
+    pytest.param('xlsxwriter', False, id='xlsxwriter', marks=pytest.mark.skipif(
+        importlib.util.find_spec('xlsxwriter') is None, reason="xlsxwriter не установлен"
+    )),
+]
+
+
+def _frame(rows=ROWS) -> pd.DataFrame:
+    return pd.DataFrame(rows, dtype=object)
+
+
+def _export(df: pd.DataFrame, backend: str, streaming: bool):
+    """Книга, записанная движком backend, прочитанная обратно openpyxl"""
+    output = io.BytesIO()
+    create_exporter(df, MAPPING, streaming=streaming, backend=backend).export(output)
+    output.seek(0)
+    return load_workbook(output)
+
+
+@pytest.mark.parametrize('backend, streaming', BACKENDS)
+def test_backends_write_same_cells(backend, streaming):
+    expected = _export(_frame(), 'openpyxl', False).active
+
+    ws = _export(_frame(), backend, streaming).active
+
+    assert ws.title == expected.title
+    assert list(ws.iter_rows(values_only=True)) == list(expected.iter_rows(values_only=True))
+    assert ws["A8"].value == "КРАСКИ" and ws["E11"].value == 999.5
+    assert set(map(str, ws.merged_cells.ranges)) == {"A1:E1"}
+    assert ws.auto_filter.ref == expected.auto_filter.ref == "A7:E11"
+    # Оформление ячеек данных: цена, распродажа, раздел
+    assert ws["D9"].number_format == expected["D9"].number_format == '# ##0'
+    assert ws["B10"].font.b and ws["B10"].font.color.rgb.endswith("FF0000")
+    assert ws["A8"].fill.fgColor.rgb.endswith("D6EAF8")
+
+
+@pytest.mark.parametrize('backend, streaming', BACKENDS)
+def test_processed_book_same_for_every_backend(monkeypatch, make_workbook, backend, streaming):
+    # Коды числами и текстом: в колонке есть раздел, она остаётся object в обоих режимах чтения
+    path = make_workbook([("Прайс-лист",)] + [
+        tuple(None if value is np.nan else value for value in row) for row in ROWS
+    ])
+
+    def process(streaming: bool) -> list:
+        output = io.BytesIO()
+        success, message, _ = PriceProcessor(path, streaming=streaming).process(output=output, template='')
+        assert success, message
+        output.seek(0)
+        return list(load_workbook(output).active.iter_rows(values_only=True))
+
+    expected = process(streaming=False)
+    _set_defaults(monkeypatch, create_exporter, backend=backend)
+
+    assert process(streaming) == expected
+    assert expected[7:] == [
+        (100001, None, "Краска белая К2", 700, 1000),
+        ("100002", "РАСПРОДАЖА", "Краска синяя", 1500, 2000),
+        (100003, None, "Грунт", None, 999.5),
+    ]
+
+
+def test_streaming_uses_write_only_workbook():
+    exporter = create_exporter(_frame(), MAPPING, streaming=True, backend='openpyxl')
+
+    assert isinstance(exporter, ExcelExporter)
+    assert exporter.wb.write_only
+    assert not create_exporter(_frame(), MAPPING, backend='openpyxl').wb.write_only
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_styles_built_once_per_kind(monkeypatch, streaming):
+    calls = []
+    styled_cell = ExcelExporter._styled_cell
+
+    def counting_styled_cell(self, *args, **kwargs):
+        calls.append(args)
+        return styled_cell(self, *args, **kwargs)
+
+    monkeypatch.setattr(ExcelExporter, '_styled_cell', counting_styled_cell)
+
+    def styles_for(rows) -> tuple:
+        calls.clear()
+        output = io.BytesIO()
+        ExcelExporter(_frame(rows), MAPPING, streaming=streaming).export(output)
+        output.seek(0)
+        return len(calls), len(load_workbook(output)._cell_styles)
+
+    # Число собранных и записанных в книгу стилей не зависит от числа строк
+    assert styles_for(ROWS) == styles_for(ROWS[:2] + ROWS[2:] * 200)
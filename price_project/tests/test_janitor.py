@@ -0,0 +1,81 @@
+import os
+import time
+
+import pytest
+
+from app.services.cache import ResultCache
+from app.services.janitor import OutputJanitor, mark_used
+
+
+HOUR = 3600
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    path = tmp_path / "output"
+    path.mkdir()
+    return path
+
+
+def _result(output_dir, name: str, size: int, hours_ago: float):
+    """Файл результата, последний раз использованный hours_ago часов назад"""
+    path = output_dir / name
+    path.write_bytes(b"x" * size)
+    used_at = time.time() - hours_ago * HOUR
+    os.utime(path, (used_at, used_at))
+    return path
+
+
+def test_sweep_by_age(output_dir):
+    old = _result(output_dir, "old.xlsx", 10, hours_ago=30)
+    downloaded = _result(output_dir, "downloaded.xlsx", 20, hours_ago=30)
+    fresh = _result(output_dir, "fresh.xlsx", 30, hours_ago=1)
+    janitor = OutputJanitor(output_dir=output_dir, retention_hours=24, max_bytes=10 ** 9)
+
+    # Скачивание продлевает срок хранения
+    mark_used(downloaded)
+    result = janitor.sweep()
+
+    assert result == {"files_removed": 1, "bytes_reclaimed": 10}
+    assert not old.exists()
+    assert downloaded.exists() and fresh.exists()
+    assert janitor.stats["output_bytes"] == 50
+
+
+def test_sweep_by_quota_removes_least_recently_used(output_dir):
+    _result(output_dir, "a.xlsx", 100, hours_ago=3)
+    _result(output_dir, "b.xlsx", 100, hours_ago=2)
+    _result(output_dir, "c.xlsx", 100, hours_ago=1)
+    janitor = OutputJanitor(output_dir=output_dir, retention_hours=24, max_bytes=150)
+
+    result = janitor.sweep()
+
+    assert result == {"files_removed": 2, "bytes_reclaimed": 200}
+    assert [path.name for path in output_dir.iterdir()] == ["c.xlsx"]
+    assert janitor.stats["runs"] == 1
+
+
+def test_cache_hit_refreshes_result(tmp_path, output_dir):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    cache = ResultCache(cache_dir=cache_dir, output_dir=output_dir)
+    path = _result(output_dir, "result.csv", 10, hours_ago=0)
+    cache.put("ab" * 32, {}, False, "Обработано", "result.csv", "csv", "merge", "")
+    _result(output_dir, "result.csv", 10, hours_ago=30)
+
+    assert cache.get("ab" * 32, {}, False, "csv", "merge", "") is not None
+
+    OutputJanitor(output_dir=output_dir, retention_hours=24).sweep()
+    assert path.exists()
+
+
+@pytest.mark.anyio
+async def test_download_refreshes_result(client, service_dirs):
+    # Моложе срока хранения: очистка при запуске сервиса его не удаляет
+    path = _result(service_dirs["output"], "result.csv", 10, hours_ago=12)
+
+    response = await client.get("/download/result.csv")
+
+    assert response.status_code == 200
+    assert time.time() - path.stat().st_mtime < HOUR
+    assert (await client.get("/download/missing.csv")).status_code == 404
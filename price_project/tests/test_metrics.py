@@ -0,0 +1,58 @@
+import io
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+from prometheus_client.parser import text_string_to_metric_families
+
+import app.main as main
+from app.services.processor import PriceProcessor, busy_seconds
+from tests.conftest import PREAMBLE_PRICE_ROWS
+
+
+def test_busy_seconds_counts_overlaps_once():
+    assert busy_seconds([]) == 0
+    assert busy_seconds([(0, 2), (1, 3), (5, 6)]) == 4
+    assert busy_seconds([(5, 6), (0, 10)]) == 10
+
+
+def test_parallel_sheet_stages_within_wall_time(tmp_path):
+    wb = Workbook()
+    for idx in range(4):
+        ws = wb.active if idx == 0 else wb.create_sheet()
+        ws.title = f"Бренд {idx}"
+        for row in PREAMBLE_PRICE_ROWS[:3] + PREAMBLE_PRICE_ROWS[3:] * 50:
+            ws.append(list(row))
+    path = tmp_path / "brands.xlsx"
+    wb.save(path)
+    processor = PriceProcessor(str(path))
+
+    success, message, _ = processor.process(output=io.BytesIO())
+
+    assert success, message
+    total = processor.timings['total']
+    assert total['rows'] == 400
+    # Этап на нескольких листах сразу - время по часам, а не сумма по листам
+    for stage in ('parse', 'clean', 'transform'):
+        assert processor.timings[stage]['seconds'] <= total['seconds']
+
+
+@pytest.mark.anyio
+async def test_metrics_text_format(client, make_workbook):
+    files = {"file": ("price.xlsx", Path(make_workbook(PREAMBLE_PRICE_ROWS)).read_bytes())}
+    assert (await client.post("/process", files=files, data={"format": "csv"})).status_code == 200
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    families = {family.name: family for family in text_string_to_metric_families(response.text)}
+    assert families["price_files_processed"].type == "counter"
+    assert any(sample.name == "price_files_processed_total" and sample.labels == {"result": "success"}
+               and sample.value >= 1 for sample in families["price_files_processed"].samples)
+    histogram = families["price_stage_duration_seconds"]
+    assert histogram.type == "histogram"
+    stages = {sample.labels["stage"] for sample in histogram.samples if sample.name.endswith("_count")}
+    assert {"parse", "clean", "transform", "export", "save"} <= stages
+    assert "total" not in stages
+    assert families["price_jobs_capacity"].samples[0].value == main.executor.capacity
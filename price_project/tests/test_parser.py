@@ -0,0 +1,85 @@
+import io
+
+import pandas as pd
+import pytest
+
+from app.services.parser import ExcelParser, python_calamine, select_engine
+from app.services.processor import PriceProcessor
+from tests.conftest import PREAMBLE_PRICE_ROWS
+
+
+ENGINES = [
+    'openpyxl',
+    pytest.param('calamine', marks=pytest.mark.skipif(python_calamine is None,
+                                                      reason="python-calamine не установлен")),
+]
+
+
+def _read(parser: ExcelParser, streaming: bool) -> pd.DataFrame:
+    if streaming:
+        return pd.concat(list(parser.iter_raw_chunks(chunk_size=1)), ignore_index=True)
+    return parser.read_raw_data()
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('streaming', [False, True])
+def test_data_starts_after_detected_header(make_workbook, engine, streaming):
+    parser = ExcelParser(make_workbook(PREAMBLE_PRICE_ROWS), streaming=streaming, engine=engine)
+    try:
+        mapping = parser.detect_columns()
+        df = _read(parser, streaming)
+    finally:
+        parser.close()
+
+    assert mapping == {'code': 0, 'name': 1, 'status': 2, 'retail_price': 3, 'special_price': 4}
+    assert df.iloc[:, 0].astype(str).tolist() == ['1234567', '1234568']
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_data_start_without_detect_columns(make_workbook, streaming):
+    parser = ExcelParser(make_workbook(PREAMBLE_PRICE_ROWS), streaming=streaming)
+    try:
+        df = _read(parser, streaming)
+    finally:
+        parser.close()
+
+    assert df.iloc[:, 1].tolist() == ['Краска белая К2', 'Краска синяя']
+
+
+def test_no_header_skips_first_row(make_workbook):
+    rows = [("шапка",), ("1234567", "", "Краска", 10, 20), ("1234568", "", "Грунт", 30, 40)]
+    parser = ExcelParser(make_workbook(rows))
+    try:
+        assert parser.detect_columns() == {}
+        df = parser.read_raw_data()
+    finally:
+        parser.close()
+
+    assert len(df) == 2
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_preamble_not_exported(make_workbook, streaming):
+    processor = PriceProcessor(make_workbook(PREAMBLE_PRICE_ROWS), streaming=streaming)
+    success, message, _ = processor.process(output=io.BytesIO())
+
+    assert success, message
+    assert message.startswith("Обработано 2 строк")
+
+
+@pytest.mark.skipif(python_calamine is None, reason="python-calamine не установлен")
+def test_streaming_xlsx_read_with_openpyxl():
+    assert select_engine('xlsx', 1024, 'auto') == 'calamine'
+    assert select_engine('xlsx', 1024, 'auto', streaming=True) == 'openpyxl'
+    # Явно заданный движок и форматы, которые читает только calamine, не меняются
+    assert select_engine('xlsx', 1024, 'calamine', streaming=True) == 'calamine'
+    assert select_engine('xls', 1024, 'auto', streaming=True) == 'calamine'
+
+
+def test_streaming_parser_uses_read_only_openpyxl(make_workbook):
+    parser = ExcelParser(make_workbook(PREAMBLE_PRICE_ROWS), streaming=True, engine='auto')
+    try:
+        assert parser.engine == 'openpyxl'
+        assert parser.wb.read_only
+    finally:
+        parser.close()
@@ -0,0 +1,57 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+
+import app.services.parser as parser_module
+from app.services.processor import PriceProcessor
+from tests.conftest import PREAMBLE_PRICE_ROWS
+
+
+@pytest.fixture
+def workbook_opens(monkeypatch):
+    """Открытия книги любым движком чтения"""
+    opens = []
+    load_workbook = parser_module.load_workbook
+    open_calamine = parser_module.ExcelParser._open_calamine
+
+    def counting_load_workbook(*args, **kwargs):
+        opens.append('openpyxl')
+        return load_workbook(*args, **kwargs)
+
+    def counting_open_calamine(file_path):
+        opens.append('calamine')
+        return open_calamine(file_path)
+
+    monkeypatch.setattr(parser_module, 'load_workbook', counting_load_workbook)
+    monkeypatch.setattr(parser_module.ExcelParser, '_open_calamine', staticmethod(counting_open_calamine))
+    return opens
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+@pytest.mark.parametrize('sheet_mode', ['merge', 'split', 'active'])
+def test_single_sheet_book_opened_once(make_workbook, workbook_opens, sheet_mode, streaming):
+    processor = PriceProcessor(make_workbook(PREAMBLE_PRICE_ROWS), streaming=streaming)
+
+    success, message, _ = processor.process(output=io.BytesIO(), sheet_mode=sheet_mode)
+
+    assert success, message
+    assert len(workbook_opens) == 1
+
+
+def test_sheets_of_multi_sheet_book_processed(tmp_path, workbook_opens):
+    wb = Workbook()
+    wb.active.title = "Бренд 1"
+    for title in ("Бренд 1", "Бренд 2"):
+        ws = wb[title] if title in wb.sheetnames else wb.create_sheet(title)
+        for row in PREAMBLE_PRICE_ROWS:
+            ws.append(list(row))
+    path = tmp_path / "brands.xlsx"
+    wb.save(path)
+
+    success, message, _ = PriceProcessor(str(path)).process(output=io.BytesIO())
+
+    assert success, message
+    assert message == "Обработано 4 строк, из них 4 с распродажей (листов: 2)"
+    # Книга для списка листов и по одной на каждый лист
+    assert len(workbook_opens) == 3
@@ -0,0 +1,85 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.status_normalizer import StatusNormalizer
+
+
+def _write_mapping(path, mapping: dict, mtime_ns: int):
+    """Файл маппинга с заданным временем изменения (изменение видно и при равном размере)"""
+    path.write_text(json.dumps(mapping, ensure_ascii=False), encoding='utf-8')
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def mapping_file(tmp_path):
+    path = tmp_path / "statuses.json"
+    _write_mapping(path, {"хит": "ХИТ", "уценка": "РАСПРОДАЖА"}, 1_000_000_000)
+    return path
+
+
+def test_default_mapping():
+    normalizer = StatusNormalizer(mapping_file=None)
+
+    assert normalizer.normalize("  Уценка  ") == "РАСПРОДАЖА"
+    assert normalizer.normalize("НОВИНКА") == ""
+    # Первый по порядку маппинга ключ выигрывает: "новый" раньше "брак"
+    assert normalizer.normalize("новый брак") == ""
+    assert normalizer.normalize("Под заказ") == "Под заказ"
+    assert normalizer.normalize(None) == ""
+    assert normalizer.digest is None
+
+
+def test_series_and_categorical_match_single_values():
+    normalizer = StatusNormalizer(mapping_file=None)
+    statuses = ["Уценка", "новый", None, "Под заказ", "Уценка", np.nan]
+    expected = ["РАСПРОДАЖА", "", "", "Под заказ", "РАСПРОДАЖА", ""]
+
+    plain = normalizer.normalize_series(pd.Series(statuses, dtype=object))
+    categorical = normalizer.normalize_series(pd.Series(statuses, dtype='category'))
+
+    assert plain.tolist() == expected
+    assert isinstance(categorical.dtype, pd.CategoricalDtype)
+    assert categorical.astype(object).tolist() == expected
+
+
+def test_mapping_file_reloaded_on_change(mapping_file):
+    normalizer = StatusNormalizer(mapping_file=str(mapping_file))
+
+    assert normalizer.normalize("Хит продаж") == "ХИТ"
+    assert normalizer.normalize("распродажа") == "распродажа"
+    first_digest = normalizer.digest
+    assert first_digest is not None
+
+    # Тот же размер файла, другое время изменения
+    _write_mapping(mapping_file, {"хит": "ТОП", "уценка": "РАСПРОДАЖА"}, 2_000_000_000)
+
+    assert normalizer.normalize("Хит продаж") == "ТОП"
+    assert normalizer.digest not in (None, first_digest)
+
+
+def test_invalid_mapping_file_keeps_previous_mapping(mapping_file):
+    normalizer = StatusNormalizer(mapping_file=str(mapping_file))
+    assert normalizer.normalize("Хит") == "ХИТ"
+    digest = normalizer.digest
+
+    mapping_file.write_text("{не json", encoding='utf-8')
+    assert normalizer.normalize("Хит") == "ХИТ"
+    assert normalizer.digest == digest
+
+    _write_mapping(mapping_file, {"хит": 1}, 3_000_000_000)
+    assert normalizer.normalize("Хит") == "ХИТ"
+
+
+def test_removed_mapping_file_falls_back_to_default(mapping_file):
+    normalizer = StatusNormalizer(mapping_file=str(mapping_file))
+    assert normalizer.normalize("Хит") == "ХИТ"
+
+    mapping_file.unlink()
+
+    assert normalizer.normalize("Хит") == "Хит"
+    assert normalizer.normalize("уценка") == "РАСПРОДАЖА"
+    assert normalizer.digest is None
@@ -0,0 +1,109 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.utils import clean_text, parse_price, round_half_up, round_half_up_array
+from app.services.transformer import DataTransformer
+
+
+SETTINGS = {'К2': 30, 'К3': 40}
+
+# Код, статус, номенклатура, спец. цена, розничная цена
+ROWS = [
+    ["1", "", "Краска К2", None, 5],            # 3.5 -> 4
+    ["2", "", "Краска к2 и К3", None, 15],      # оба маркера: К2 раньше по приоритету, 10.5 -> 11
+    ["3", "", "Грунт К3", None, 1000.5],        # 600.3 -> 600
+    ["4", "", "Лак К3", 700, 1250],             # цена есть: пересчёт только с recalculate
+    ["5", "", "Эмаль К4", 500, 1000],           # К4: цена не меняется, статус - распродажа
+    ["6", "", "Эмаль К4", None, 1000],
+    ["7", "", "Клей K2", None, 1000],           # латинская K - не маркер
+    ["8", "РАСПРОДАЖА", "Кисть", None, 300],
+    ["9", "", "Валик К2", None, "1 000,50"],    # 700.35 -> 700
+    ["10", "", "Шпатель К2", None, None],       # нет розничной цены
+    ["11", "", "Скотч К2", "по запросу", 25],   # 17.5 -> 18
+    ["12", "", "Мастерок К2", None, 105],       # 73.5 -> 74
+    ["13", None, None, None, 100],              # пустые номенклатура и статус
+]
+
+
+def _per_row(df: pd.DataFrame, discount_settings, recalculate_existing: bool) -> pd.DataFrame:
+    """Построчный расчёт (прежняя реализация) - эталон для векторного"""
+    df = df.copy()
+    for idx in range(len(df)):
+        row = df.iloc[idx]
+        text = f"{clean_text(row.iloc[2])} {clean_text(row.iloc[1])}"
+        marker = next((name for name, pattern in DataTransformer.MARKER_PATTERNS.items()
+                       if re.search(pattern, text)), None)
+        if marker is None:
+            continue
+        if marker == 'К4':
+            df.iloc[idx, 1] = "РАСПРОДАЖА"
+            continue
+        if marker in discount_settings:
+            special_price = parse_price(row.iloc[3])
+            retail_price = parse_price(row.iloc[4])
+            if (not special_price > 0 or recalculate_existing) and retail_price > 0:
+                df.iloc[idx, 3] = round_half_up(retail_price * (1 - discount_settings[marker] / 100))
+                df.iloc[idx, 1] = "РАСПРОДАЖА"
+    return df
+
+
+@pytest.mark.parametrize('recalculate_existing', [False, True])
+def test_vectorized_matches_per_row(recalculate_existing):
+    df = pd.DataFrame(ROWS, dtype=object)
+
+    expected = _per_row(df, SETTINGS, recalculate_existing)
+    result = DataTransformer(df, SETTINGS).calculate_special_prices(
+        name_col=2, status_col=1, special_price_col=3, retail_price_col=4,
+        recalculate_existing=recalculate_existing
+    ).df
+
+    assert result.values.tolist() == expected.values.tolist()
+    assert result.iloc[:, 3].tolist()[:3] == [4, 11, 600]
+    assert result.iloc[10, 3] == 18 and result.iloc[11, 3] == 74
+    # Исходный DataFrame не меняется
+    assert df.iloc[0, 3] is None
+
+
+def test_numeric_price_column_matches_per_row():
+    df = pd.DataFrame({
+        0: ["1", "2", "3"],
+        1: ["", "", ""],
+        2: ["Краска К2", "Лак К3", "Грунт"],
+        3: [np.nan, 700.0, np.nan],
+        4: [25.0, 1250.0, 100.0],
+    })
+
+    expected = _per_row(df, SETTINGS, False)
+    result = DataTransformer(df, SETTINGS).calculate_special_prices(2, 1, 3, 4).df
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('value', [
+    0.5, 1.5, 2.5, 3.5, -0.5, -2.5, 0.49999999999999994, 73.5, 73.49999999999999,
+    1e6 + 0.5, 700.35, 0.0, 17.499999999999996,
+])
+def test_round_half_up_array_matches_decimal(value):
+    assert round_half_up_array(np.array([value]))[0] == round_half_up(value)
+
+
+@pytest.mark.parametrize('copy_on_write', [False, True])
+def test_source_frame_not_modified(copy_on_write):
+    df = pd.DataFrame({
+        0: ["1", "2", "3"],
+        1: pd.Categorical(["", "новинка", ""]),
+        2: ["Краска К2", "Лак К3", "Эмаль К4"],
+        3: np.array([np.nan, np.nan, 500], dtype=np.float32),
+        4: np.array([25, 1250, 1000], dtype=np.float32),
+    })
+    before = df.copy(deep=True)
+
+    with pd.option_context("mode.copy_on_write", copy_on_write):
+        result = DataTransformer(df, SETTINGS).transform(1, 2, 3, 4)
+
+    pd.testing.assert_frame_equal(df, before)
+    assert result.iloc[:, 3].tolist()[:2] == [18, 750]
+    assert result.iloc[:, 1].tolist() == ["РАСПРОДАЖА"] * 3
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+import app.services.processor as processor_module
+import app.services.uploads as uploads_module
+from app.core.config import MAX_FILE_SIZE, UPLOAD_FORM_OVERHEAD
+from tests.conftest import PREAMBLE_PRICE_ROWS
+
+
+pytestmark = pytest.mark.anyio
+
+BOUNDARY = "price-boundary"
+
+CHUNK = b"x" * (1024 * 1024)
+
+
+async def _multipart(chunks: int):
+    """Тело multipart-формы с файлом из chunks частей по 1MB, частями"""
+    yield (f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="price.csv"\r\n'
+           f'Content-Type: text/csv\r\n\r\n').encode()
+    for _ in range(chunks):
+        yield CHUNK
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+@pytest.mark.parametrize("url", ["/process", "/jobs"])
+async def test_large_content_length_rejected_before_body(client, url):
+    headers = {
+        "content-type": f"multipart/form-data; boundary={BOUNDARY}",
+        "content-length": str(MAX_FILE_SIZE + UPLOAD_FORM_OVERHEAD + 1),
+    }
+
+    response = await client.post(url, content=_multipart(0), headers=headers)
+
+    assert response.status_code == 413
+
+
+@pytest.mark.parametrize("url", ["/process", "/jobs"])
+async def test_large_chunked_body_rejected(client, service_dirs, url):
+    # Без Content-Length (chunked) - по прочитанным байтам, до разбора всей формы
+    chunks = MAX_FILE_SIZE // len(CHUNK) + 1
+
+    response = await client.post(url, content=_multipart(chunks),
+                                 headers={"content-type": f"multipart/form-data; boundary={BOUNDARY}"})
+
+    assert response.status_code == 413
+    assert list(service_dirs["jobs"].iterdir()) == []
+
+
+async def test_small_chunked_body_accepted(client):
+    response = await client.post("/jobs", content=_multipart(0),
+                                 headers={"content-type": f"multipart/form-data; boundary={BOUNDARY}"})
+
+    # Пустой CSV принят в обработку (ошибка - уже в самой задаче)
+    assert response.status_code == 202
+
+
+async def test_process_in_memory(client, service_dirs, make_workbook, monkeypatch):
+    buffers = []
+    sources = []
+    spooled_file = uploads_module.SpooledTemporaryFile
+    price_processor = processor_module.PriceProcessor
+
+    def tracking_spooled_file(*args, **kwargs):
+        buffers.append(spooled_file(*args, **kwargs))
+        return buffers[-1]
+
+    def tracking_processor(source, *args, **kwargs):
+        sources.append(source)
+        return price_processor(source, *args, **kwargs)
+
+    monkeypatch.setattr(uploads_module, "SpooledTemporaryFile", tracking_spooled_file)
+    monkeypatch.setattr(processor_module, "PriceProcessor", tracking_processor)
+    files = {"file": ("price.xlsx", Path(make_workbook(PREAMBLE_PRICE_ROWS)).read_bytes())}
+
+    response = await client.post("/process", files=files)
+
+    assert response.status_code == 200, response.text
+    # Загрузка не уходит на диск: буфер в памяти, обработке передаётся он сам
+    assert len(buffers) == 1 and not buffers[0]._rolled
+    assert sources == [buffers[0]]
+    assert list(service_dirs["uploads"].iterdir()) == []
+    assert (service_dirs["output"] / response.json()["output_filename"]).exists()